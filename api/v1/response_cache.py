@@ -0,0 +1,120 @@
+"""Bounded LRU + TTL cache and ETag helpers for deterministic GET routes."""
+
+from __future__ import annotations
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from typing import Any
+
+from fastapi import Request, Response
+
+
+class ResponseCache:
+    """Thread-safe LRU cache whose entries also expire after *ttl_seconds*.
+
+    Expired entries are dropped lazily on lookup; the least recently used
+    entry is evicted once *maxsize* is reached.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 1024,
+        ttl_seconds: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Any | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= self._clock():
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (self._clock() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def get_or_create(self, key: Hashable, factory: Callable[[], Any]) -> Any:
+        """Return the cached value for *key*, computing and storing it on a miss."""
+        value = self.get(key)
+        if value is None:
+            value = factory()
+            self.put(key, value)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def info(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+            }
+
+
+def key_etag(key: Hashable) -> str:
+    """Weak validator derived from a route's normalized cache key.
+
+    Route keys carry the model version and normalized inputs, which fully
+    determine the response data.  Bodies rebuilt after the TTL can differ
+    in timestamps such as ``scored_at``, so the tag is weak: it stays the
+    same across rebuilds and clients keep getting 304 for unchanged data.
+    """
+    return 'W/"' + hashlib.sha256(repr(key).encode("utf-8")).hexdigest()[:32] + '"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Evaluate ``If-None-Match`` against *etag* (weak comparison, RFC 9110)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(
+        candidate.strip().removeprefix("W/") == opaque
+        for candidate in if_none_match.split(",")
+    )
+
+
+def conditional_json_response(
+    request: Request,
+    cache: ResponseCache,
+    key: Hashable,
+    build: Callable[[], Any],
+) -> Response:
+    """Serve a cached JSON body with an ETag, or 304 if the client has it.
+
+    *build* returns a pydantic model and is only called on a cache miss;
+    the ETag comes from *key*, so a 304 is answered without building.
+    """
+    etag = key_etag(key)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    body = cache.get_or_create(key, lambda: build().model_dump_json().encode("utf-8"))
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -2,6 +2,8 @@
 
 Routes:
     GET  /api/v1/projects/{project_id}/risk                  - Risk assessment
+    POST /api/v1/projects/risk/batch                         - Streaming batch scoring
+    POST /api/v1/projects/{project_id}/risk/sensitivity      - What-if sensitivity sweep
     GET  /api/v1/projects/{project_id}/compliance-status      - Compliance summary
     GET  /api/v1/projects/{project_id}/enforcement-forecast   - Enforcement forecast
     GET  /api/v1/portfolio/{tenant_id}/risk-index             - Portfolio risk summary
@@ -12,15 +14,29 @@ Routes:
 
 from __future__ import annotations
 
+import json
 import time
+from collections.abc import AsyncIterator
 from datetime import datetime, timezone
+from typing import Any
 from uuid import uuid4
 
-from fastapi import APIRouter, Query, Response
-from pydantic import BaseModel, Field
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from pydantic import BaseModel, Field, ValidationError
+from starlette.concurrency import run_in_threadpool
 
+from api.v1.response_cache import ResponseCache, conditional_json_response
+from api.v1.streaming import (
+    DuplexStreamingResponse,
+    StreamFormatError,
+    iter_json_array,
+    iter_ndjson,
+)
+from core.compliance_models import RiskAssessment
 from core.enforcement_engine import EnforcementEngine
 from risk_engine.engine import DeterministicRiskEngine
+from risk_engine.portfolio import PortfolioRiskIndex
+from risk_engine.sensitivity import SensitivityAnalyzer
 
 router = APIRouter(prefix="/api/v1", tags=["risk"])
 
@@ -33,6 +49,17 @@ _webhooks: dict[str, dict] = {}
 # Shared engine instances
 _risk_engine = DeterministicRiskEngine()
 _enforcement_engine = EnforcementEngine()
+_sensitivity_analyzer = SensitivityAnalyzer(_risk_engine)
+
+# Per-tenant aggregates, updated whenever a project is scored for a tenant
+_portfolio_index = PortfolioRiskIndex()
+
+# Deterministic GET results keyed by normalized inputs + model_version.
+# Assessments are shared by the risk and enforcement-forecast routes;
+# rendered bodies are cached per route and project, and their ETags are
+# derived from the same keys.
+_assessment_cache = ResponseCache(maxsize=4096, ttl_seconds=300.0)
+_response_cache = ResponseCache(maxsize=4096, ttl_seconds=300.0)
 
 # ---------------------------------------------------------------------------
 # Pydantic models
@@ -53,6 +80,53 @@ class RiskAssessmentResponse(BaseModel):
     features_snapshot: dict
 
 
+class RiskFeatureSet(BaseModel):
+    """Risk model inputs for a single project."""
+
+    violation_classes: list[str] = Field(default_factory=list)
+    permit_age_days: int = Field(0, ge=0)
+    inspection_failures: int = Field(0, ge=0)
+    inspection_total: int = Field(0, ge=0)
+    milestone_delay_days: int = Field(0, ge=0)
+    complaint_count_90d: int = Field(0, ge=0)
+    prior_stop_work_orders: int = Field(0, ge=0)
+    building_type: str = "commercial"
+    stories: int = Field(1, ge=1)
+    contractor_violation_rate: float = Field(0.0, ge=0.0, le=1.0)
+
+
+class SensitivitySweepRequest(BaseModel):
+    """What-if sweep around a project's current features."""
+
+    baseline: RiskFeatureSet = Field(default_factory=RiskFeatureSet)
+    ranges: dict[str, tuple[float, float]] = Field(
+        ..., description="Absolute (low, high) bounds per perturbed feature"
+    )
+    method: str = Field("grid", pattern="^(grid|lhs)$")
+    steps: int = Field(5, ge=2, le=50, description="Grid values per feature")
+    samples: int = Field(1_000, ge=1, le=100_000, description="Latin-hypercube points")
+    threshold: int = Field(50, ge=0, le=100)
+    direction: str = Field("below", pattern="^(below|above)$")
+    seed: int = 0
+
+
+class SensitivitySweepResponse(BaseModel):
+    """Score surface, threshold crossing and marginal effects of a sweep."""
+
+    project_id: str
+    model_version: str
+    baseline_score: int
+    method: str
+    features: list[str]
+    evaluated_points: int
+    points: list[list[float]]
+    scores: list[int]
+    threshold: int
+    direction: str
+    threshold_crossing: dict | None = None
+    marginal_effects: list[dict] = Field(default_factory=list)
+
+
 class ComplianceStatusResponse(BaseModel):
     """Compliance summary for a project."""
 
@@ -74,13 +148,27 @@ class EnforcementForecastResponse(BaseModel):
     timeline_days: int
 
 
+class PortfolioProjectRisk(BaseModel):
+    """A project's position in its tenant's risk ranking."""
+
+    project_id: str
+    risk_score: int
+
+
 class PortfolioRiskIndexResponse(BaseModel):
     """Portfolio-level risk summary."""
 
     tenant_id: str
     total_projects: int = 0
     avg_risk_score: float = 0.0
+    avg_stop_work_probability_30d: float = 0.0
+    total_fine_exposure: float = 0.0
     high_risk_projects: int = 0
+    histogram: list[int] = Field(
+        default_factory=lambda: [0] * 10,
+        description="Project counts per risk-score decile (last bucket 90-100)",
+    )
+    top_projects: list[PortfolioProjectRisk] = Field(default_factory=list)
 
 
 class WebhookRegisterRequest(BaseModel):
@@ -125,11 +213,104 @@ def _risk_level(score: int) -> str:
     return "low"
 
 
+def _parse_violation_classes(violation_classes: str | None) -> list[str]:
+    """Split a comma-separated query value, dropping blanks and whitespace."""
+    if not violation_classes:
+        return []
+    return [v.strip() for v in violation_classes.split(",") if v.strip()]
+
+
+def _features_key(features: dict[str, Any]) -> tuple:
+    """Hashable, normalized form of a feature dict (class order is kept)."""
+    return tuple(
+        (name, tuple(value) if isinstance(value, list) else value)
+        for name, value in features.items()
+    )
+
+
+def _cached_assessment(features: dict[str, Any]) -> RiskAssessment:
+    """Score *features*, reusing an assessment computed for identical inputs."""
+    key = (_risk_engine.model_version, _features_key(features))
+    return _assessment_cache.get_or_create(
+        key, lambda: _risk_engine.score_project(**features)
+    )
+
+
 def _increment_requests() -> None:
     global _REQUEST_COUNT  # noqa: PLW0603
     _REQUEST_COUNT += 1
 
 
+def _score_chunk(
+    chunk: list[tuple[int, str | None, RiskFeatureSet]], tenant_id: str | None
+) -> bytes:
+    """Score one chunk of validated rows and render it as NDJSON lines.
+
+    Only rows with a ``project_id`` are recorded in the portfolio index.
+    """
+    columns: dict[str, list[Any]] = {
+        name: [getattr(features, name) for _, _, features in chunk]
+        for name in RiskFeatureSet.model_fields
+    }
+    batch = _risk_engine.score_many(columns)
+    if tenant_id is not None:
+        identified = [project_id is not None for _, project_id, _ in chunk]
+        _portfolio_index.record_batch(
+            tenant_id,
+            [project_id for _, project_id, _ in chunk if project_id is not None],
+            batch if all(identified) else batch[identified],
+        )
+    lines = [
+        json.dumps({"row": row, "project_id": project_id, **record})
+        for (row, project_id, _), record in zip(
+            chunk, batch.iter_records(), strict=True
+        )
+    ]
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+async def _stream_batch_scores(
+    rows: AsyncIterator[Any], chunk_size: int, tenant_id: str | None
+) -> AsyncIterator[bytes]:
+    """Validate streamed rows, score them chunk by chunk, and yield NDJSON.
+
+    Invalid rows produce an ``error`` line and are skipped; a malformed body
+    ends the stream with a final ``error`` line after flushing scored rows.
+    """
+    chunk: list[tuple[int, str | None, RiskFeatureSet]] = []
+    row = -1
+    try:
+        async for row_data in rows:
+            row += 1
+            if not isinstance(row_data, dict):
+                yield _error_line(row, None, "Row must be a JSON object")
+                continue
+            project_id = row_data.get("project_id")
+            if project_id is not None:
+                project_id = str(project_id)
+            try:
+                features = RiskFeatureSet.model_validate(row_data)
+            except ValidationError as exc:
+                yield _error_line(row, project_id, exc.errors(include_url=False))
+                continue
+            chunk.append((row, project_id, features))
+            if len(chunk) >= chunk_size:
+                yield await run_in_threadpool(_score_chunk, chunk, tenant_id)
+                chunk = []
+    except StreamFormatError as exc:
+        if chunk:
+            yield await run_in_threadpool(_score_chunk, chunk, tenant_id)
+        yield _error_line(row + 1, None, str(exc))
+        return
+    if chunk:
+        yield await run_in_threadpool(_score_chunk, chunk, tenant_id)
+
+
+def _error_line(row: int, project_id: str | None, error: Any) -> bytes:
+    payload = {"row": row, "project_id": project_id, "error": error}
+    return (json.dumps(payload, default=str) + "\n").encode("utf-8")
+
+
 # ---------------------------------------------------------------------------
 # Endpoints
 # ---------------------------------------------------------------------------
@@ -140,6 +321,7 @@ def _increment_requests() -> None:
     response_model=RiskAssessmentResponse,
 )
 def get_project_risk(
+    request: Request,
     project_id: str,
     violation_classes: str | None = Query(
         None, description="Comma-separated violation classes"
@@ -153,52 +335,125 @@ def get_project_risk(
     building_type: str = Query("commercial"),
     stories: int = Query(1, ge=1),
     contractor_violation_rate: float = Query(0.0, ge=0.0, le=1.0),
-) -> RiskAssessmentResponse:
-    """Return the deterministic risk assessment for a project."""
+    tenant_id: str | None = Query(
+        None, description="Record the score in this tenant's portfolio index"
+    ),
+) -> Response:
+    """Return the deterministic risk assessment for a project.
+
+    Responses carry an ``ETag``; a matching ``If-None-Match`` gets 304.
+    """
     _increment_requests()
-    parsed_classes = (
-        [v.strip() for v in violation_classes.split(",") if v.strip()]
-        if violation_classes
-        else []
+    features = {
+        "violation_classes": _parse_violation_classes(violation_classes),
+        "permit_age_days": permit_age_days,
+        "inspection_failures": inspection_failures,
+        "inspection_total": inspection_total,
+        "milestone_delay_days": milestone_delay_days,
+        "complaint_count_90d": complaint_count_90d,
+        "prior_stop_work_orders": prior_stop_work_orders,
+        "building_type": building_type,
+        "stories": stories,
+        "contractor_violation_rate": contractor_violation_rate,
+    }
+    assessment = _cached_assessment(features)
+    if tenant_id is not None:
+        _portfolio_index.record(tenant_id, project_id, assessment)
+    return conditional_json_response(
+        request,
+        _response_cache,
+        ("risk", project_id, _risk_engine.model_version, _features_key(features)),
+        lambda: RiskAssessmentResponse(
+            project_id=project_id,
+            risk_score=assessment.risk_score,
+            stop_work_probability_30d=assessment.stop_work_probability_30d,
+            insurance_escalation_probability=assessment.insurance_escalation_probability,
+            fine_exposure_estimate=assessment.fine_exposure_estimate,
+            risk_drivers=assessment.risk_drivers,
+            model_version=assessment.model_version,
+            scored_at=assessment.scored_at,
+            features_snapshot=assessment.features_snapshot,
+        ),
     )
-    assessment = _risk_engine.score_project(
-        violation_classes=parsed_classes,
-        permit_age_days=permit_age_days,
-        inspection_failures=inspection_failures,
-        inspection_total=inspection_total,
-        milestone_delay_days=milestone_delay_days,
-        complaint_count_90d=complaint_count_90d,
-        prior_stop_work_orders=prior_stop_work_orders,
-        building_type=building_type,
-        stories=stories,
-        contractor_violation_rate=contractor_violation_rate,
+
+
+@router.post("/projects/risk/batch", response_class=DuplexStreamingResponse)
+async def score_projects_batch(
+    request: Request,
+    chunk_size: int = Query(1_000, ge=1, le=10_000),
+    tenant_id: str | None = Query(
+        None, description="Record the scores in this tenant's portfolio index"
+    ),
+) -> DuplexStreamingResponse:
+    """Score a JSON array or NDJSON stream of feature rows.
+
+    Each row holds a ``project_id`` plus ``RiskFeatureSet`` fields.  Rows are
+    scored in chunks of *chunk_size* through the vectorized engine and
+    streamed back as NDJSON as each chunk completes, so server memory is
+    bounded by one chunk regardless of upload size.  Send
+    ``Content-Type: application/x-ndjson`` for NDJSON input.
+    """
+    _increment_requests()
+    content_type = request.headers.get("content-type", "")
+    parse = (
+        iter_ndjson
+        if "ndjson" in content_type or "jsonl" in content_type
+        else iter_json_array
     )
-    return RiskAssessmentResponse(
-        project_id=project_id,
-        risk_score=assessment.risk_score,
-        stop_work_probability_30d=assessment.stop_work_probability_30d,
-        insurance_escalation_probability=assessment.insurance_escalation_probability,
-        fine_exposure_estimate=assessment.fine_exposure_estimate,
-        risk_drivers=assessment.risk_drivers,
-        model_version=assessment.model_version,
-        scored_at=assessment.scored_at,
-        features_snapshot=assessment.features_snapshot,
+    return DuplexStreamingResponse(
+        _stream_batch_scores(parse(request.stream()), chunk_size, tenant_id),
+        media_type="application/x-ndjson",
     )
 
 
+@router.post(
+    "/projects/{project_id}/risk/sensitivity",
+    response_model=SensitivitySweepResponse,
+)
+def sweep_project_risk(
+    project_id: str,
+    request: SensitivitySweepRequest,
+) -> SensitivitySweepResponse:
+    """Evaluate the risk model over perturbations of the project's features."""
+    _increment_requests()
+    try:
+        result = _sensitivity_analyzer.sweep(
+            request.baseline.model_dump(),
+            request.ranges,
+            method=request.method,
+            steps=request.steps,
+            samples=request.samples,
+            threshold=request.threshold,
+            direction=request.direction,
+            seed=request.seed,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc)) from exc
+    return SensitivitySweepResponse(project_id=project_id, **result)
+
+
 @router.get(
     "/projects/{project_id}/compliance-status",
     response_model=ComplianceStatusResponse,
 )
-def get_compliance_status(project_id: str) -> ComplianceStatusResponse:
+def get_compliance_status(request: Request, project_id: str) -> Response:
     """Return the compliance summary for a project."""
     _increment_requests()
-    assessment = _risk_engine.score_project()
-    return ComplianceStatusResponse(
-        project_id=project_id,
-        status="compliant" if assessment.risk_score < 50 else "non_compliant",
-        risk_level=_risk_level(assessment.risk_score),
-        last_assessed=datetime.now(tz=timezone.utc),
+
+    def build() -> ComplianceStatusResponse:
+        assessment = _cached_assessment({})
+        return ComplianceStatusResponse(
+            project_id=project_id,
+            status="compliant" if assessment.risk_score < 50 else "non_compliant",
+            risk_level=_risk_level(assessment.risk_score),
+            last_assessed=assessment.scored_at,
+        )
+
+    return conditional_json_response(
+        request,
+        _response_cache,
+        ("compliance-status", project_id, _risk_engine.model_version),
+        build,
     )
 
 
@@ -207,6 +462,7 @@ def get_compliance_status(project_id: str) -> ComplianceStatusResponse:
     response_model=EnforcementForecastResponse,
 )
 def get_enforcement_forecast(
+    request: Request,
     project_id: str,
     violation_classes: str | None = Query(
         None, description="Comma-separated violation classes"
@@ -220,40 +476,46 @@ def get_enforcement_forecast(
     building_type: str = Query("commercial"),
     stories: int = Query(1, ge=1),
     contractor_violation_rate: float = Query(0.0, ge=0.0, le=1.0),
-) -> EnforcementForecastResponse:
-    """Return the enforcement forecast for a project."""
+) -> Response:
+    """Return the enforcement forecast for a project.
+
+    The risk assessment is shared with the risk route's cache, so a
+    forecast for inputs that were just scored does not score them again.
+    """
     _increment_requests()
-    parsed_classes = (
-        [v.strip() for v in violation_classes.split(",") if v.strip()]
-        if violation_classes
-        else []
-    )
-    assessment = _risk_engine.score_project(
-        violation_classes=parsed_classes,
-        permit_age_days=permit_age_days,
-        inspection_failures=inspection_failures,
-        inspection_total=inspection_total,
-        milestone_delay_days=milestone_delay_days,
-        complaint_count_90d=complaint_count_90d,
-        prior_stop_work_orders=prior_stop_work_orders,
-        building_type=building_type,
-        stories=stories,
-        contractor_violation_rate=contractor_violation_rate,
-    )
-    forecast = _enforcement_engine.forecast_enforcement(
-        risk_score=assessment.risk_score,
-        violation_classes=parsed_classes,
-        prior_stop_work_orders=prior_stop_work_orders,
-        permit_age_days=permit_age_days,
-    )
-    return EnforcementForecastResponse(
-        project_id=project_id,
-        escalation_level=forecast["escalation_level"],
-        likely_enforcement_actions=forecast["likely_enforcement_actions"],
-        stop_work_probability_30d=forecast["stop_work_probability_30d"],
-        stop_work_probability_60d=forecast["stop_work_probability_60d"],
-        recommended_actions=forecast["recommended_actions"],
-        timeline_days=forecast["timeline_days"],
+    features = {
+        "violation_classes": _parse_violation_classes(violation_classes),
+        "permit_age_days": permit_age_days,
+        "inspection_failures": inspection_failures,
+        "inspection_total": inspection_total,
+        "milestone_delay_days": milestone_delay_days,
+        "complaint_count_90d": complaint_count_90d,
+        "prior_stop_work_orders": prior_stop_work_orders,
+        "building_type": building_type,
+        "stories": stories,
+        "contractor_violation_rate": contractor_violation_rate,
+    }
+
+    def build() -> EnforcementForecastResponse:
+        assessment = _cached_assessment(features)
+        forecast = _enforcement_engine.forecast_enforcement(
+            risk_score=assessment.risk_score,
+            violation_classes=features["violation_classes"],
+            prior_stop_work_orders=prior_stop_work_orders,
+            permit_age_days=permit_age_days,
+        )
+        return EnforcementForecastResponse(project_id=project_id, **forecast)
+
+    return conditional_json_response(
+        request,
+        _response_cache,
+        (
+            "enforcement-forecast",
+            project_id,
+            _risk_engine.model_version,
+            _features_key(features),
+        ),
+        build,
     )
 
 
@@ -261,15 +523,14 @@ def get_enforcement_forecast(
     "/portfolio/{tenant_id}/risk-index",
     response_model=PortfolioRiskIndexResponse,
 )
-def get_portfolio_risk_index(tenant_id: str) -> PortfolioRiskIndexResponse:
-    """Return portfolio-level risk summary (stub)."""
+def get_portfolio_risk_index(
+    tenant_id: str,
+    top_k: int = Query(10, ge=0, le=100),
+) -> PortfolioRiskIndexResponse:
+    """Return the tenant's materialized portfolio risk summary."""
     _increment_requests()
-    return PortfolioRiskIndexResponse(
-        tenant_id=tenant_id,
-        total_projects=0,
-        avg_risk_score=0.0,
-        high_risk_projects=0,
-    )
+    summary = _portfolio_index.summary(tenant_id, top_k=top_k)
+    return PortfolioRiskIndexResponse(**summary)
 
 
 @router.post(
@@ -321,4 +582,17 @@ def metrics() -> Response:
         "# TYPE uptime_seconds gauge\n"
         f"uptime_seconds {uptime_seconds:.2f}\n"
     )
+    for name, cache in (
+        ("assessment_cache", _assessment_cache),
+        ("response_cache", _response_cache),
+    ):
+        info = cache.info()
+        body += (
+            f"# HELP {name}_hits_total Cache lookups served from memory.\n"
+            f"# TYPE {name}_hits_total counter\n"
+            f"{name}_hits_total {info['hits']}\n"
+            f"# HELP {name}_misses_total Cache lookups that had to compute.\n"
+            f"# TYPE {name}_misses_total counter\n"
+            f"{name}_misses_total {info['misses']}\n"
+        )
     return Response(content=body, media_type="text/plain")
@@ -0,0 +1,188 @@
+"""Incremental JSON / NDJSON row parsing for streamed request bodies."""
+
+from __future__ import annotations
+
+import codecs
+import json
+from collections.abc import AsyncIterator
+from typing import Any
+
+from starlette.requests import ClientDisconnect
+from starlette.responses import StreamingResponse
+from starlette.types import Receive, Scope, Send
+
+_DECODER = json.JSONDecoder()
+_WHITESPACE = " \t\r\n"
+_NUMBER_CHARS = "0123456789.eE+-"
+_LITERALS = ("true", "false", "null", "NaN", "Infinity", "-Infinity")
+# Pending-element cap for iter_json_array (and line cap for iter_ndjson)
+MAX_ELEMENT_CHARS = 1 << 20
+
+# iter_json_array states: before "[", after "[", after ",", after an
+# element, after "]"
+_OPEN, _FIRST, _VALUE, _SEPARATOR, _DONE = range(5)
+
+
+class StreamFormatError(ValueError):
+    """Raised when a streamed body is not a JSON array or NDJSON."""
+
+
+class DuplexStreamingResponse(StreamingResponse):
+    """Streams the response while the handler is still reading the request.
+
+    ``StreamingResponse`` may run a disconnect listener that consumes
+    ``receive()`` messages, which would swallow request body chunks that the
+    body iterator has not read yet.  This variant leaves ``receive()`` to the
+    request stream; a client disconnect surfaces as a failed ``send``.
+    """
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            await self.stream_response(send)
+        except OSError as exc:
+            raise ClientDisconnect() from exc
+        if self.background is not None:
+            await self.background()
+
+
+async def iter_ndjson(
+    chunks: AsyncIterator[bytes], max_line_bytes: int = MAX_ELEMENT_CHARS
+) -> AsyncIterator[Any]:
+    """Yield one decoded value per non-blank line of an NDJSON byte stream.
+
+    Only the current partial line, of up to *max_line_bytes* bytes, is
+    buffered and each byte is scanned for a newline once, so memory stays
+    flat however large the upload is.  A longer line raises
+    :class:`StreamFormatError` as soon as it is seen.
+    """
+    buffer = bytearray()
+    line_no = 0
+    async for chunk in chunks:
+        # buffer holds no newline before the new chunk
+        scan = len(buffer)
+        buffer += chunk
+        start = 0
+        while (end := buffer.find(b"\n", scan)) != -1:
+            line_no += 1
+            _check_line(end - start, line_no, max_line_bytes)
+            line = buffer[start:end]
+            if line.strip():
+                yield _decode_line(line, line_no)
+            start = scan = end + 1
+        del buffer[:start]
+        _check_line(len(buffer), line_no + 1, max_line_bytes)
+    if buffer.strip():
+        yield _decode_line(buffer, line_no + 1)
+
+
+async def iter_json_array(
+    chunks: AsyncIterator[bytes], max_element_chars: int = MAX_ELEMENT_CHARS
+) -> AsyncIterator[Any]:
+    """Yield the elements of a top-level JSON array as they arrive.
+
+    Elements are decoded with ``raw_decode`` as soon as they are complete;
+    at most one partially received element, of up to *max_element_chars*
+    characters, is held in memory.  A malformed element, a missing or extra
+    ``,`` and an oversized element raise :class:`StreamFormatError` as soon
+    as they are seen.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    text = ""
+    pos = 0
+    state = _OPEN
+
+    async for chunk in chunks:
+        try:
+            text = text[pos:] + decoder.decode(chunk)
+        except UnicodeDecodeError as exc:
+            raise StreamFormatError("Body is not valid UTF-8") from exc
+        pos = 0
+
+        while True:
+            pos = _skip_ws(text, pos)
+            if pos >= len(text):
+                break
+            char = text[pos]
+            if state == _DONE:
+                raise StreamFormatError("Unexpected data after JSON array")
+            if state == _OPEN:
+                if char != "[":
+                    raise StreamFormatError("Body is not a JSON array")
+                state = _FIRST
+                pos += 1
+                continue
+            if state == _SEPARATOR:
+                if char not in ",]":
+                    raise StreamFormatError("Expected ',' or ']' after array element")
+                state = _VALUE if char == "," else _DONE
+                pos += 1
+                continue
+            if char == "]" and state == _FIRST:
+                state = _DONE
+                pos += 1
+                continue
+            if char in ",]":
+                raise StreamFormatError("Expected a JSON array element")
+            try:
+                value, end = _DECODER.raw_decode(text, pos)
+            except json.JSONDecodeError as exc:
+                if not _incomplete(text, exc):
+                    raise _malformed(exc) from exc
+                break  # element not complete yet
+            if isinstance(value, (int, float)) and (
+                end >= len(text) or text[end] in _NUMBER_CHARS
+            ):
+                break  # a bare number may continue in the next chunk
+            pos = end
+            state = _SEPARATOR
+            yield value
+
+        if len(text) - pos > max_element_chars:
+            raise StreamFormatError(
+                f"JSON array element exceeds {max_element_chars} characters"
+            )
+
+    pos = _skip_ws(text, pos)
+    if pos < len(text):
+        try:
+            _DECODER.raw_decode(text, pos)
+        except json.JSONDecodeError as exc:
+            if not _incomplete(text, exc):
+                raise _malformed(exc) from exc
+    if state != _DONE:
+        raise StreamFormatError("Truncated JSON array body")
+
+
+def _incomplete(text: str, exc: json.JSONDecodeError) -> bool:
+    """Whether more input could still complete the element that failed."""
+    rest = text[exc.pos :]
+    if exc.msg.startswith("Unterminated string"):
+        return True
+    if exc.msg.startswith("Invalid \\uXXXX escape"):
+        return len(rest) < 5
+    # Nothing left, a partial number (``1.``, ``-``) or a partial literal.
+    return all(c in _NUMBER_CHARS for c in rest) or any(
+        literal.startswith(rest) for literal in _LITERALS
+    )
+
+
+def _malformed(exc: json.JSONDecodeError) -> StreamFormatError:
+    return StreamFormatError(f"Malformed JSON array element: {exc.msg}")
+
+
+def _skip_ws(text: str, pos: int) -> int:
+    while pos < len(text) and text[pos] in _WHITESPACE:
+        pos += 1
+    return pos
+
+
+def _check_line(length: int, line_no: int, max_line_bytes: int) -> None:
+    if length > max_line_bytes:
+        raise StreamFormatError(f"Line {line_no} exceeds {max_line_bytes} bytes")
+
+
+def _decode_line(line: bytes, line_no: int) -> Any:
+    try:
+        return json.loads(line)
+    except json.JSONDecodeError as exc:
+        raise StreamFormatError(f"Invalid JSON on line {line_no}: {exc.msg}") from exc
@@ -0,0 +1 @@
+"""Performance benchmarks and regression gate for the scoring engines."""
@@ -0,0 +1,357 @@
+"""Throughput/memory benchmarks with a JSON baseline regression gate.
+
+Usage::
+
+    python -m benchmarks.run --update-baseline        # record a baseline
+    python -m benchmarks.run --tolerance 0.25         # fail on >25% regression
+
+Each case is timed without tracing (best of ``--repeat``) and then run once
+under ``tracemalloc`` to record peak Python/NumPy allocations.  A case
+regresses when its ops/sec drops below ``baseline * (1 - tolerance)`` or
+its peak memory grows above ``baseline * (1 + memory_tolerance)``.
+
+Forensics cases run once per ``--checkpoint-intervals`` setting (``0`` for
+full payloads only) and also record the stored payload bytes.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from collections.abc import Callable, Iterator
+from fnmatch import fnmatch
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from core.enforcement_engine import EnforcementEngine
+from data_forensics import ForensicsEngine
+from risk_engine.engine import DeterministicRiskEngine
+from workers import TaskQueue, WorkerPool
+
+from .synthetic import generate_payload_history, generate_projects, iter_rows
+
+DEFAULT_SIZES = (1_000, 100_000, 1_000_000)
+DEFAULT_BASELINE = Path(__file__).with_name("baseline.json")
+# Forensics delta-codec settings; 0 stores every payload in full.
+DEFAULT_CHECKPOINT_INTERVALS = (0, 8, 32)
+# Worker-pool sizes for the I/O-latency queue case, and its simulated latency.
+QUEUE_WORKERS = (1, 8, 32)
+QUEUE_JOB_LATENCY = 0.002
+QUEUE_MAX_JOBS = 256
+
+# Candidate weight sets for the shadow-scoring case.
+SHADOW_CANDIDATES = {
+    "shadow-a": {"violation_severity_score": 1.2, "permit_age_score": 0.8},
+    "shadow-b": {"complaint_velocity_score": 1.5},
+    "shadow-c": {"building_risk_score": 0.0, "contractor_risk_score": 2.0},
+}
+
+# A case is (name, n_ops, run); run performs n_ops operations per call and
+# may return a dict of extra fields to record with the case's result.
+Case = tuple[str, int, Callable[[], Any]]
+
+
+def build_cases(
+    sizes: tuple[int, ...],
+    seed: int,
+    scalar_limit: int,
+    checkpoint_intervals: tuple[int, ...] = DEFAULT_CHECKPOINT_INTERVALS,
+) -> Iterator[Case]:
+    """Yield benchmark cases, generating one portfolio size at a time.
+
+    Scalar paths are capped at *scalar_limit* rows per size, since their
+    per-op cost is constant and a 1M-row scalar loop only adds wall time.
+    Forensics histories are capped the same way.
+    """
+    for size in sizes:
+        columns = generate_projects(size, seed=seed)
+        rows = list(iter_rows(columns, limit=scalar_limit))
+        engine = DeterministicRiskEngine()
+        enforcement = EnforcementEngine()
+        assessments = [engine.score_project(**row) for row in rows]
+
+        def score_scalar(rows: list[dict] = rows, engine=engine) -> None:
+            for row in rows:
+                engine.score_project(**row)
+
+        def explain(assessments: list = assessments, engine=engine) -> None:
+            for assessment in assessments:
+                engine.explain(assessment)
+
+        def forecast(
+            rows: list[dict] = rows,
+            assessments: list = assessments,
+            enforcement=enforcement,
+        ) -> None:
+            for row, assessment in zip(rows, assessments, strict=True):
+                enforcement.forecast_enforcement(
+                    risk_score=assessment.risk_score,
+                    violation_classes=row["violation_classes"],
+                    prior_stop_work_orders=row["prior_stop_work_orders"],
+                    permit_age_days=row["permit_age_days"],
+                )
+
+        def score_batch(columns: dict = columns, engine=engine) -> None:
+            engine.score_many(columns)
+
+        batch_scores = engine.score_many(columns).risk_score
+
+        def forecast_batch(
+            columns: dict = columns, scores=batch_scores, enforcement=enforcement
+        ) -> None:
+            enforcement.forecast_many(
+                scores,
+                columns["violation_classes"],
+                columns["prior_stop_work_orders"],
+                columns["permit_age_days"],
+            )
+
+        def shadow(columns: dict = columns, engine=engine) -> None:
+            engine.shadow_score(columns, SHADOW_CANDIDATES)
+
+        yield f"score_project@{size}", len(rows), score_scalar
+        yield f"explain@{size}", len(rows), explain
+        yield f"forecast_enforcement@{size}", len(rows), forecast
+        yield f"score_many@{size}", size, score_batch
+        yield f"forecast_many@{size}", size, forecast_batch
+        yield f"shadow_score@{size}", size, shadow
+
+        history = generate_payload_history(min(size, scalar_limit), seed=seed)
+        for interval in checkpoint_intervals:
+            yield from _forensics_cases(size, history, interval)
+
+    jobs = min(scalar_limit, QUEUE_MAX_JOBS)
+    for workers in QUEUE_WORKERS:
+        yield f"task_queue_io[workers={workers}]", jobs, _queue_run(jobs, workers)
+    small_jobs = max(jobs // 16, 4)
+    yield "task_queue_fair", jobs + small_jobs, _fair_queue_run(jobs, small_jobs)
+
+
+def _queue_run(jobs: int, workers: int) -> Callable[[], dict[str, Any]]:
+    """Drain *jobs* simulated I/O calls through a pool of *workers* threads."""
+
+    def run() -> dict[str, Any]:
+        queue = TaskQueue()
+        queue.register("io", lambda payload: time.sleep(QUEUE_JOB_LATENCY))
+        for i in range(jobs):
+            queue.submit("io", {"i": i})
+        with WorkerPool(queue, io_workers=workers) as pool:
+            pool.drain()
+        return {"workers": workers, "job_latency_ms": QUEUE_JOB_LATENCY * 1000}
+
+    return run
+
+
+def _fair_queue_run(bulk_jobs: int, small_jobs: int) -> Callable[[], dict[str, Any]]:
+    """Queue latency of small tenants submitting behind one tenant's backlog."""
+    workers = QUEUE_WORKERS[1]
+
+    def run() -> dict[str, Any]:
+        queue = TaskQueue()
+        queue.register("io", lambda payload: time.sleep(QUEUE_JOB_LATENCY))
+        bulk = [queue.submit("io", {}, tenant_id="bulk") for _ in range(bulk_jobs)]
+        small = [
+            queue.submit("io", {}, tenant_id=f"site-{i % 4}") for i in range(small_jobs)
+        ]
+        with WorkerPool(queue, io_workers=workers) as pool:
+            pool.drain()
+        return {
+            "workers": workers,
+            "small_tenant_p95_wait_ms": _p95_wait_ms(small),
+            "bulk_tenant_p95_wait_ms": _p95_wait_ms(bulk),
+        }
+
+    return run
+
+
+def _p95_wait_ms(jobs: list) -> float:
+    waits = [(job.started_at - job.created_at).total_seconds() for job in jobs]
+    return round(float(np.percentile(waits, 95)) * 1000, 3)
+
+
+def _forensics_cases(size: int, history: list[dict], interval: int) -> Iterator[Case]:
+    """Archive and replay one project's payload history at a checkpoint interval."""
+    checkpoint_interval = interval or None
+    settings = {"checkpoint_interval": interval}
+
+    def archive(history: list[dict] = history) -> dict[str, int]:
+        forensics = ForensicsEngine(checkpoint_interval=checkpoint_interval)
+        for payload in history:
+            forensics.archive_ingestion("BENCH-1", "dob", payload)
+        return {**settings, "payload_bytes": forensics.storage_stats()["payload_bytes"]}
+
+    archived = ForensicsEngine(checkpoint_interval=checkpoint_interval)
+    ids = [
+        archived.archive_ingestion("BENCH-1", "dob", payload).snapshot_id
+        for payload in history
+    ]
+
+    def replay(ids: list[str] = ids) -> dict[str, int]:
+        for snapshot_id in ids:
+            archived.get_snapshot(snapshot_id)
+        return settings
+
+    yield f"forensics_archive[ckpt={interval}]@{size}", len(history), archive
+    yield f"forensics_replay[ckpt={interval}]@{size}", len(history), replay
+
+
+def measure(case: Case, repeat: int = 3) -> dict[str, float]:
+    """Return ops/sec (best of *repeat*) and peak traced memory for a case."""
+    name, n_ops, run = case
+    best = float("inf")
+    for _ in range(max(repeat, 1)):
+        start = time.perf_counter()
+        extra = run()
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    result = {
+        "n": n_ops,
+        "seconds": round(best, 6),
+        "ops_per_sec": round(n_ops / best, 2) if best > 0 else float("inf"),
+        "peak_mb": round(peak / 1_048_576, 3),
+    }
+    if isinstance(extra, dict):
+        result.update(extra)
+    return result
+
+
+def run_suite(
+    sizes: tuple[int, ...] = DEFAULT_SIZES,
+    seed: int = 42,
+    scalar_limit: int = 20_000,
+    repeat: int = 3,
+    log: Callable[[str], None] | None = None,
+    checkpoint_intervals: tuple[int, ...] = DEFAULT_CHECKPOINT_INTERVALS,
+    cases: tuple[str, ...] | None = None,
+) -> dict[str, Any]:
+    """Run every case (or those matching the *cases* globs) and report.
+
+    The report is JSON-serializable.
+    """
+    results: dict[str, dict[str, float]] = {}
+    for case in build_cases(sizes, seed, scalar_limit, checkpoint_intervals):
+        if cases is not None and not any(fnmatch(case[0], p) for p in cases):
+            continue
+        results[case[0]] = measure(case, repeat=repeat)
+        if log is not None:
+            r = results[case[0]]
+            log(
+                f"{case[0]:<36} {r['ops_per_sec']:>14,.0f} ops/s "
+                f"{r['peak_mb']:>10.1f} MB"
+            )
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "seed": seed,
+            "sizes": list(sizes),
+            "scalar_limit": scalar_limit,
+            "checkpoint_intervals": list(checkpoint_intervals),
+            "cases": list(cases) if cases is not None else None,
+        },
+        "results": results,
+    }
+
+
+def compare(
+    current: dict[str, Any],
+    baseline: dict[str, Any],
+    tolerance: float = 0.25,
+    memory_tolerance: float | None = None,
+) -> list[str]:
+    """Return human-readable regressions of *current* against *baseline*.
+
+    Cases missing from either report are ignored, so adding a benchmark
+    never fails the gate.
+    """
+    memory_tolerance = tolerance if memory_tolerance is None else memory_tolerance
+    regressions: list[str] = []
+    for name, base in baseline.get("results", {}).items():
+        now = current.get("results", {}).get(name)
+        if now is None:
+            continue
+        floor = base["ops_per_sec"] * (1 - tolerance)
+        if now["ops_per_sec"] < floor:
+            regressions.append(
+                f"{name}: {now['ops_per_sec']:,.0f} ops/s < {floor:,.0f} "
+                f"(baseline {base['ops_per_sec']:,.0f}, tolerance {tolerance:.0%})"
+            )
+        ceiling = base["peak_mb"] * (1 + memory_tolerance)
+        if base["peak_mb"] > 0 and now["peak_mb"] > ceiling:
+            regressions.append(
+                f"{name}: peak {now['peak_mb']:.1f} MB > {ceiling:.1f} MB "
+                f"(baseline {base['peak_mb']:.1f} MB, tolerance {memory_tolerance:.0%})"
+            )
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES))
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--scalar-limit", type=int, default=20_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--checkpoint-intervals",
+        type=int,
+        nargs="+",
+        default=list(DEFAULT_CHECKPOINT_INTERVALS),
+    )
+    parser.add_argument(
+        "--cases", nargs="+", default=None, help="Only run cases matching these globs"
+    )
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--memory-tolerance", type=float, default=None)
+    parser.add_argument("--output", type=Path, default=None)
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args(argv)
+
+    report = run_suite(
+        tuple(args.sizes),
+        args.seed,
+        args.scalar_limit,
+        args.repeat,
+        log=print,
+        checkpoint_intervals=tuple(args.checkpoint_intervals),
+        cases=tuple(args.cases) if args.cases else None,
+    )
+    if args.output is not None:
+        args.output.write_text(json.dumps(report, indent=2) + "\n")
+
+    if args.update_baseline:
+        args.baseline.write_text(json.dumps(report, indent=2) + "\n")
+        print(f"Baseline written to {args.baseline}")
+        return 0
+    if not args.baseline.exists():
+        print(f"No baseline at {args.baseline}; run with --update-baseline first.")
+        return 0
+
+    regressions = compare(
+        report,
+        json.loads(args.baseline.read_text()),
+        args.tolerance,
+        args.memory_tolerance,
+    )
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,7 +3,7 @@ from __future__ import annotations
 from datetime import date, datetime
 from uuid import uuid4
 
-from pydantic import BaseModel, ConfigDict, Field
+from pydantic import BaseModel, ConfigDict, Field, PrivateAttr
 
 
 class TenantContext(BaseModel):
@@ -140,6 +140,9 @@ class RiskAssessment(BaseModel):
     features_snapshot: dict = Field(
         ..., description="Feature vector snapshot used for scoring reproducibility"
     )
+    # Component vector captured by the engine that scored this assessment;
+    # not serialized, so deserialized assessments fall back to a recompute.
+    _components: tuple[float, ...] | None = PrivateAttr(default=None)
 
 
 class ComplianceSnapshot(BaseModel):
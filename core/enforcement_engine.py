@@ -3,6 +3,11 @@
 from __future__ import annotations
 
 import math
+from collections.abc import Sequence
+from itertools import chain
+from typing import Any
+
+import numpy as np
 
 from ontology.enforcement import EscalationGraph, EscalationLevel
 
@@ -43,6 +48,68 @@ _RECOMMENDED_ACTIONS: dict[EscalationLevel, list[str]] = {
 }
 
 
+# Representative violation class for each enforcement track (default,
+# hazardous), and the ordered distinct-track patterns a project can show.
+_TRACK_CLASSES: tuple[str, ...] = ("", "hazardous")
+_TRACK_PATTERNS: tuple[tuple[int, ...], ...] = ((0,), (1,), (0, 1), (1, 0))
+
+
+# Lookup tables for forecast_many(), evaluated once at import with the
+# scalar EscalationGraph rules for every integer score 0-100.
+_SCORE_LEVELS = [EscalationGraph.get_escalation_level(s) for s in range(101)]
+_LEVEL_NAME_TABLE = np.array([str(level) for level in _SCORE_LEVELS], dtype=object)
+_BASE_STOP_WORK_TABLE = np.array(
+    [_sigmoid(s, midpoint=65, steepness=0.15) for s in range(101)]
+)
+
+
+def _likely_actions_table() -> np.ndarray:
+    """score x track-pattern -> likely actions; identical lists share one tuple."""
+    interned: dict[tuple[str, ...], tuple[str, ...]] = {}
+    table = np.empty((101, len(_TRACK_PATTERNS)), dtype=object)
+    for score in range(101):
+        for p, pattern in enumerate(_TRACK_PATTERNS):
+            actions = tuple(
+                dict.fromkeys(
+                    str(action)
+                    for track in pattern
+                    for action in EscalationGraph.get_likely_enforcement(
+                        score, _TRACK_CLASSES[track]
+                    )
+                )
+            )
+            table[score, p] = interned.setdefault(actions, actions)
+    return table
+
+
+def _recommended_table() -> np.ndarray:
+    recommended = {
+        level: tuple(_RECOMMENDED_ACTIONS.get(level, [])) for level in EscalationLevel
+    }
+    table = np.empty(101, dtype=object)
+    for score, level in enumerate(_SCORE_LEVELS):
+        table[score] = recommended[level]
+    return table
+
+
+_LIKELY_ACTIONS_TABLE = _likely_actions_table()
+_RECOMMENDED_TABLE = _recommended_table()
+
+
+def _round4(values: np.ndarray) -> np.ndarray:
+    """Vectorized ``round(x, 4)`` that agrees with Python's rounding.
+
+    ``np.round`` scales before rounding, so values within a hair of a
+    half-way point are re-rounded with the built-in ``round``.
+    """
+    scaled = values * 10_000
+    rounded = np.round(scaled) / 10_000
+    near_tie = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    for i in np.flatnonzero(near_tie):
+        rounded[i] = round(float(values[i]), 4)
+    return rounded
+
+
 class EnforcementEngine:
     """Forecasts likely enforcement actions and stop-work probability."""
 
@@ -127,3 +194,104 @@ class EnforcementEngine:
             "recommended_actions": recommended,
             "timeline_days": timeline_days,
         }
+
+    def forecast_many(
+        self,
+        risk_scores: Sequence[int] | np.ndarray,
+        violation_classes: Sequence[list[str] | None],
+        prior_stop_work_orders: Sequence[int] | np.ndarray | None = None,
+        permit_age_days: Sequence[int] | np.ndarray | None = None,
+    ) -> dict[str, Any]:
+        """Forecast enforcement for many projects at once.
+
+        Takes equal-length columns with the meaning of the
+        :meth:`forecast_enforcement` parameters (``None`` columns use the
+        scalar defaults) and returns the same fields as columns: NumPy arrays
+        for the numeric outputs and lists for the rest.  Action lists come
+        from precomputed tables and are shared, immutable tuples.
+
+        Integer scores in 0-100 are served from lookup tables; any other
+        score falls back to the scalar path, so every row equals
+        :meth:`forecast_enforcement` for the same inputs.
+        """
+        scores = np.asarray(risk_scores)
+        n = len(scores)
+        if len(violation_classes) != n:
+            raise ValueError(
+                "risk_scores and violation_classes must have the same length"
+            )
+        swo = self._column(prior_stop_work_orders, n, "prior_stop_work_orders")
+        permit_age = self._column(permit_age_days, n, "permit_age_days")
+
+        lists = [classes or [] for classes in violation_classes]
+        has_class_c, pattern = self._class_flags(lists, n)
+
+        tabulated = (scores >= 0) & (scores <= 100) & (scores == np.floor(scores))
+        idx = np.where(tabulated, scores, 0).astype(np.int64)
+
+        # Same additions, in the same order, as the scalar path.
+        base = _BASE_STOP_WORK_TABLE[idx]
+        base = base + np.where(has_class_c, 0.15, 0.0)
+        base = base + np.where(swo > 0, np.minimum(swo * 0.10, 0.25), 0.0)
+        base = base + np.where(
+            permit_age > 365, np.minimum((permit_age - 365) / 3650, 0.10), 0.0
+        )
+        stop_work_30d = _round4(np.minimum(base, 1.0))
+        stop_work_60d = _round4(np.minimum(stop_work_30d * 1.3, 1.0))
+
+        result: dict[str, Any] = {
+            "escalation_level": _LEVEL_NAME_TABLE[idx].tolist(),
+            "likely_enforcement_actions": _LIKELY_ACTIONS_TABLE[idx, pattern].tolist(),
+            "stop_work_probability_30d": stop_work_30d,
+            "stop_work_probability_60d": stop_work_60d,
+            "recommended_actions": _RECOMMENDED_TABLE[idx].tolist(),
+            "timeline_days": np.where(scores >= 80, 7, np.where(scores >= 60, 30, 90)),
+        }
+
+        for i in np.flatnonzero(~tabulated):
+            forecast = self.forecast_enforcement(
+                risk_score=scores[i].item(),
+                violation_classes=lists[i],
+                prior_stop_work_orders=swo[i].item(),
+                permit_age_days=permit_age[i].item(),
+            )
+            for key, value in forecast.items():
+                result[key][i] = tuple(value) if isinstance(value, list) else value
+        return result
+
+    @staticmethod
+    def _column(values: Any, n: int, name: str) -> np.ndarray:
+        if values is None:
+            return np.zeros(n, dtype=np.int64)
+        column = np.asarray(values)
+        if column.shape != (n,):
+            raise ValueError(f"{name} must have one value per project")
+        return column
+
+    @staticmethod
+    def _class_flags(lists: list[list[str]], n: int) -> tuple[np.ndarray, np.ndarray]:
+        """Return per-project Class C flags and enforcement-track pattern codes."""
+        lengths = np.fromiter(map(len, lists), dtype=np.int64, count=n)
+        if not lengths.sum():
+            return np.zeros(n, dtype=bool), np.zeros(n, dtype=np.int64)
+
+        # Classify each distinct class string once.
+        codes: dict[str, int] = {}
+        inverse = np.fromiter(
+            (codes.setdefault(vc, len(codes)) for vc in chain.from_iterable(lists)),
+            dtype=np.int64,
+        )
+        is_c = np.array([vc == "Class C" for vc in codes])[inverse]
+        hazardous = np.array([int("hazardous" in vc.lower()) for vc in codes])[inverse]
+
+        rows = np.repeat(np.arange(n), lengths)
+        has_class_c = np.bincount(rows, weights=is_c, minlength=n) > 0
+        n_hazardous = np.bincount(rows, weights=hazardous, minlength=n)
+
+        nonempty = lengths > 0
+        starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+        first_hazardous = np.zeros(n, dtype=bool)
+        first_hazardous[nonempty] = hazardous[starts[nonempty]] == 1
+        other_track = np.where(first_hazardous, n_hazardous < lengths, n_hazardous > 0)
+        # Index into _TRACK_PATTERNS: first track, plus 2 if the other appears.
+        return has_class_c, first_hazardous.astype(np.int64) + 2 * other_track
@@ -27,3 +27,7 @@ class GeocodingError(SentinelError):
 class ComplianceDataError(SentinelError):
     """Raised when the input data (CSV/Image) is malformed or unreadable."""
     pass
+
+class DataSourceError(SentinelError):
+    """Raised when an upstream data feed (e.g. NYC OpenData) cannot be read."""
+    pass
@@ -1,3 +1,26 @@
+from .bulk_verify import stream_hash, verify_payloads, verify_stored
+from .delta_codec import DeltaCodec, apply_json_delta, diff_json
 from .forensics_engine import ForensicsEngine
+from .merkle import MerkleTree, verify_inclusion
+from .segment_log import (
+    SegmentLog,
+    SegmentReader,
+    SnapshotLocation,
+    canonical_payload,
+)
 
-__all__ = ["ForensicsEngine"]
+__all__ = [
+    "DeltaCodec",
+    "ForensicsEngine",
+    "MerkleTree",
+    "SegmentLog",
+    "SegmentReader",
+    "SnapshotLocation",
+    "apply_json_delta",
+    "canonical_payload",
+    "diff_json",
+    "stream_hash",
+    "verify_inclusion",
+    "verify_payloads",
+    "verify_stored",
+]
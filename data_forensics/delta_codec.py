@@ -0,0 +1,147 @@
+"""Structural JSON deltas between successive snapshot payloads.
+
+A delta is a small JSON document describing how to turn one payload into the
+next:
+
+* ``{"t": "v", "v": value}`` replaces a value outright;
+* ``{"t": "d", "s": {...}, "x": [...], "u": {...}}`` sets, deletes and
+  recursively updates dict keys;
+* ``{"t": "l", "o": [[i1, i2, [items]], ...]}`` replaces list slices
+  ``old[i1:i2]`` with *items* (opcodes from :mod:`difflib`).
+
+:class:`DeltaCodec` decides when to store a delta and when to start a new
+full checkpoint, so any version is rebuilt from its checkpoint by applying
+at most ``checkpoint_interval - 1`` deltas forward.
+"""
+
+from __future__ import annotations
+
+import json
+from collections.abc import Callable
+from difflib import SequenceMatcher
+from typing import Any
+
+# A stored payload is either ("full", payload) or ("delta", base_key, delta).
+PayloadEntry = tuple[Any, ...]
+
+
+def diff_json(old: Any, new: Any) -> dict[str, Any]:
+    """Return a delta turning *old* into *new* (both JSON-compatible)."""
+    if isinstance(old, dict) and isinstance(new, dict):
+        delta: dict[str, Any] = {"t": "d"}
+        added = {k: v for k, v in new.items() if k not in old}
+        removed = [k for k in old if k not in new]
+        updated = {
+            k: diff_json(old[k], v)
+            for k, v in new.items()
+            if k in old and not _same_json(old[k], v)
+        }
+        if added:
+            delta["s"] = added
+        if removed:
+            delta["x"] = removed
+        if updated:
+            delta["u"] = updated
+        return delta
+    if isinstance(old, list) and isinstance(new, list):
+        old_keys = [json.dumps(item, sort_keys=True) for item in old]
+        new_keys = [json.dumps(item, sort_keys=True) for item in new]
+        matcher = SequenceMatcher(None, old_keys, new_keys, autojunk=False)
+        ops = [
+            [i1, i2, new[j1:j2]]
+            for tag, i1, i2, j1, j2 in matcher.get_opcodes()
+            if tag != "equal"
+        ]
+        return {"t": "l", "o": ops}
+    return {"t": "v", "v": new}
+
+
+def _same_json(a: Any, b: Any) -> bool:
+    """Whether *a* and *b* serialize to the same JSON.
+
+    ``==`` is not enough: ``0 == 0.0 == False`` and ``1 == True`` in Python,
+    but each encodes differently, so a delta that skipped such a change
+    would rebuild a payload whose canonical JSON (and hash) differs.
+    """
+    if type(a) is not type(b):
+        return False
+    if isinstance(a, dict):
+        return a.keys() == b.keys() and all(_same_json(a[k], b[k]) for k in a)
+    if isinstance(a, list):
+        return len(a) == len(b) and all(map(_same_json, a, b))
+    return a == b
+
+
+def apply_json_delta(value: Any, delta: dict[str, Any]) -> Any:
+    """Apply *delta* to *value*, updating containers in place; return the result."""
+    kind = delta["t"]
+    if kind == "v":
+        return delta["v"]
+    if kind == "d":
+        for key in delta.get("x", ()):
+            del value[key]
+        value.update(delta.get("s", {}))
+        for key, sub_delta in delta.get("u", {}).items():
+            value[key] = apply_json_delta(value[key], sub_delta)
+        return value
+    if kind == "l":
+        # Later slices first, so earlier indices stay valid.
+        for i1, i2, items in reversed(delta["o"]):
+            value[i1:i2] = items
+        return value
+    raise ValueError(f"Unknown delta type '{kind}'")
+
+
+def reconstruct_payload(key: str, read: Callable[[str], PayloadEntry]) -> dict:
+    """Rebuild the payload stored under *key*.
+
+    *read* returns a fresh ``("full", payload)`` for checkpoints or
+    ``("delta", base_key, delta)``; deltas are applied forward from the
+    nearest checkpoint.
+    """
+    deltas: list[dict[str, Any]] = []
+    entry = read(key)
+    while entry[0] == "delta":
+        deltas.append(entry[2])
+        entry = read(entry[1])
+    payload = entry[1]
+    for delta in reversed(deltas):
+        payload = apply_json_delta(payload, delta)
+    return payload
+
+
+class DeltaCodec:
+    """Chooses between a full checkpoint and a delta for each new payload.
+
+    A payload is delta-encoded against its project's previous payload unless
+    that would exceed *checkpoint_interval* versions since the last
+    checkpoint, or the delta would not be smaller than the payload itself.
+    Larger intervals store less and reconstruct more slowly.
+    """
+
+    def __init__(self, checkpoint_interval: int = 16) -> None:
+        if checkpoint_interval < 1:
+            raise ValueError("checkpoint_interval must be at least 1")
+        self.checkpoint_interval = checkpoint_interval
+
+    def needs_checkpoint(self, base_depth: int) -> bool:
+        """Whether a payload after one *base_depth* deltas deep must be a checkpoint.
+
+        Lets callers skip rebuilding a base that :meth:`encode` would not use.
+        """
+        return base_depth + 1 >= self.checkpoint_interval
+
+    def encode(
+        self,
+        base: dict | None,
+        base_depth: int,
+        payload: dict,
+        payload_size: int,
+    ) -> bytes | None:
+        """Return the encoded delta from *base*, or ``None`` for a checkpoint."""
+        if base is None or self.needs_checkpoint(base_depth):
+            return None
+        encoded = json.dumps(diff_json(base, payload), separators=(",", ":")).encode(
+            "utf-8"
+        )
+        return encoded if len(encoded) < payload_size else None
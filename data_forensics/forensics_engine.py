@@ -1,28 +1,130 @@
 from __future__ import annotations
 
+import copy
 import hashlib
 import json
+from bisect import bisect_left, bisect_right
+from collections.abc import Callable, Iterable, Iterator
 from datetime import datetime, timezone
+from pathlib import Path
 from typing import Any
 from uuid import uuid4
 
 from core.compliance_models import ComplianceSnapshot, RiskAssessment
 
+from .bulk_verify import stream_hash, verify_payloads, verify_stored
+from .delta_codec import DeltaCodec, PayloadEntry, reconstruct_payload
+from .merkle import MerkleTree, snapshot_leaf_hash, verify_inclusion
+from .segment_log import SegmentLog, canonical_payload
+
 
 def _compute_hash(payload: dict) -> str:
     """Compute SHA-256 hex digest of canonical JSON (sorted keys)."""
-    canonical = json.dumps(payload, sort_keys=True, default=str)
-    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+    return stream_hash(payload)
+
+
+class _ProjectTimeline:
+    """A project's snapshot ids kept in timestamp order (ties in arrival order)."""
+
+    __slots__ = ("times", "ids")
+
+    def __init__(self) -> None:
+        self.times: list[datetime] = []
+        self.ids: list[str] = []
+
+    def insert(self, timestamp: datetime, snapshot_id: str) -> None:
+        # Snapshots nearly always arrive in time order, making this an append.
+        if not self.times or timestamp >= self.times[-1]:
+            self.times.append(timestamp)
+            self.ids.append(snapshot_id)
+            return
+        pos = bisect_right(self.times, timestamp)
+        self.times.insert(pos, timestamp)
+        self.ids.insert(pos, snapshot_id)
+
+    def latest_at_or_before(self, at_time: datetime) -> str | None:
+        pos = bisect_right(self.times, at_time)
+        return self.ids[pos - 1] if pos else None
+
+    def ids_between(self, start: datetime, end: datetime) -> list[str]:
+        return self.ids[bisect_left(self.times, start) : bisect_right(self.times, end)]
 
 
 class ForensicsEngine:
-    """In-memory forensic data store for compliance snapshots."""
+    """Forensic data store for compliance snapshots.
+
+    Snapshots are kept in memory by default.  With *storage_dir* they are
+    appended to a durable :class:`SegmentLog` instead; only per-snapshot
+    metadata stays in RAM and the history survives restarts.
+
+    In both modes payloads are content-addressed by their SHA-256: snapshots
+    of identical data reference one stored payload instead of copying it.
+
+    With *checkpoint_interval*, a new payload is stored as a structural diff
+    against the project's previous payload, with a full checkpoint at least
+    every *checkpoint_interval* versions; reads rebuild it by applying the
+    deltas forward from the checkpoint.
+
+    Each project's snapshots are also leaves of an append-only Merkle tree,
+    in archive order: :meth:`merkle_root` gives one hash to notarize,
+    :meth:`inclusion_proof` an O(log n) proof for one snapshot, and
+    :meth:`verify_project` rehashes only snapshots added since the last
+    successful verification.
+    """
 
     SCHEMA_VERSION = "1.0"
 
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        storage_dir: str | Path | None = None,
+        *,
+        segment_max_bytes: int = 64 * 1024 * 1024,
+        fsync_every: int = 64,
+        fsync_interval: float = 1.0,
+        checkpoint_interval: int | None = None,
+    ) -> None:
+        self.checkpoint_interval = checkpoint_interval
+        self._codec = (
+            DeltaCodec(checkpoint_interval) if checkpoint_interval is not None else None
+        )
         self._snapshots: dict[str, ComplianceSnapshot] = {}
-        self._project_index: dict[str, list[str]] = {}
+        # In-memory mode: payload SHA-256 -> the single stored payload dict,
+        # shared by its snapshots and copied whenever one is handed out
+        self._payloads: dict[str, dict] = {}
+        # In-memory mode with a codec: payload SHA-256 -> (base, delta, depth)
+        self._payload_deltas: dict[str, tuple[str, bytes, int]] = {}
+        # project_id -> payload SHA-256 of its most recent archive (delta base);
+        # after a restart each project's next payload starts a new checkpoint
+        self._latest_payload_ref: dict[str, str] = {}
+        # In-memory codec mode: project_id -> its most recent decoded payload
+        self._latest_payload: dict[str, dict] = {}
+        self._payload_bytes = 0
+        # project_id -> Merkle tree and its leaves' snapshot ids; snapshot_id
+        # -> leaf index.  Disk-backed trees are rebuilt on first use from the
+        # leaf hashes kept in the segment indexes.
+        self._merkle: dict[str, MerkleTree] = {}
+        self._leaf_ids: dict[str, list[str]] = {}
+        self._leaf_index: dict[str, int] = {}
+        self._merkle_loaded = storage_dir is None
+        self._project_index: dict[str, _ProjectTimeline] = {}
+        # tenant_id -> project_id -> that tenant's snapshots of the project
+        self._tenant_index: dict[str, dict[str, _ProjectTimeline]] = {}
+        self._log: SegmentLog | None = None
+        if storage_dir is not None:
+            self._log = SegmentLog(
+                storage_dir,
+                segment_max_bytes=segment_max_bytes,
+                fsync_every=fsync_every,
+                fsync_interval=fsync_interval,
+                checkpoint_interval=checkpoint_interval,
+            )
+            for location in self._log.iter_locations():
+                self._index_snapshot(
+                    location.project_id,
+                    location.tenant_id,
+                    location.timestamp,
+                    location.snapshot_id,
+                )
 
     def archive_ingestion(
         self,
@@ -37,7 +139,8 @@ class ForensicsEngine:
             "_source": source,
             "_tenant_id": tenant_id,
         }
-        data_hash = _compute_hash(enriched_payload)
+        canonical = canonical_payload(enriched_payload)
+        data_hash = hashlib.sha256(canonical).hexdigest()
         snapshot = ComplianceSnapshot(
             snapshot_id=uuid4().hex,
             project_id=project_id,
@@ -46,31 +149,374 @@ class ForensicsEngine:
             raw_payload=enriched_payload,
             version=self.SCHEMA_VERSION,
         )
-        self._snapshots[snapshot.snapshot_id] = snapshot
-        self._project_index.setdefault(project_id, []).append(snapshot.snapshot_id)
+        tree = self._merkle_tree(project_id)
+        if self._log is not None:
+            base_ref = self._latest_payload_ref.get(project_id)
+            self._log.append(snapshot, canonical, base_ref)
+            self._latest_payload_ref[project_id] = data_hash
+        elif self._codec is not None:
+            self._store_encoded(project_id, data_hash, canonical)
+            self._snapshots[snapshot.snapshot_id] = snapshot.model_copy(
+                update={"raw_payload": {}}
+            )
+        else:
+            payload = self._payloads.get(data_hash)
+            if payload is None:
+                payload = self._payloads[data_hash] = copy.deepcopy(enriched_payload)
+                self._payload_bytes += len(canonical)
+            self._snapshots[snapshot.snapshot_id] = snapshot.model_copy(
+                update={"raw_payload": payload}
+            )
+            snapshot = snapshot.model_copy(
+                update={"raw_payload": copy.deepcopy(enriched_payload)}
+            )
+        self._index_snapshot(
+            project_id, tenant_id, snapshot.timestamp, snapshot.snapshot_id
+        )
+        self._add_leaf(
+            tree,
+            project_id,
+            snapshot_leaf_hash(
+                snapshot.snapshot_id, project_id, snapshot.timestamp, data_hash
+            ),
+            snapshot.snapshot_id,
+        )
         return snapshot
 
     def get_snapshot(self, snapshot_id: str) -> ComplianceSnapshot | None:
-        """Retrieve a specific snapshot by ID."""
-        return self._snapshots.get(snapshot_id)
+        """Retrieve a specific snapshot by ID.
+
+        The snapshot's ``raw_payload`` is its own copy, so mutating it never
+        reaches the archive or snapshots that share the stored payload.
+        """
+        if self._log is not None:
+            return self._log.get(snapshot_id)
+        snapshot = self._snapshots.get(snapshot_id)
+        if snapshot is None:
+            return None
+        if self._codec is not None:
+            payload = reconstruct_payload(snapshot.data_hash, self._read_payload)
+        else:
+            payload = copy.deepcopy(snapshot.raw_payload)
+        return snapshot.model_copy(update={"raw_payload": payload})
+
+    def _store_encoded(self, project_id: str, key: str, canonical: bytes) -> None:
+        """Store a payload as a checkpoint or a delta (in-memory codec mode)."""
+        base_ref = self._latest_payload_ref.get(project_id)
+        base = self._latest_payload.get(project_id)
+        payload = json.loads(canonical)
+        self._latest_payload_ref[project_id] = key
+        self._latest_payload[project_id] = payload
+        if key in self._payloads or key in self._payload_deltas:
+            return
+        base_depth = (
+            self._payload_deltas[base_ref][2] if base_ref in self._payload_deltas else 0
+        )
+        delta = self._codec.encode(base, base_depth, payload, len(canonical))
+        if delta is None:
+            self._payloads[key] = payload
+            self._payload_bytes += len(canonical)
+        else:
+            self._payload_deltas[key] = (base_ref, delta, base_depth + 1)
+            self._payload_bytes += len(delta)
+
+    def _read_payload(self, key: str) -> PayloadEntry:
+        if key in self._payload_deltas:
+            base_ref, delta, _ = self._payload_deltas[key]
+            return ("delta", base_ref, json.loads(delta))
+        return ("full", copy.deepcopy(self._payloads[key]))
 
     def get_project_snapshots(self, project_id: str) -> list[ComplianceSnapshot]:
         """Return all snapshots for a project, sorted newest first."""
-        ids = self._project_index.get(project_id, [])
-        snapshots = [self._snapshots[sid] for sid in ids if sid in self._snapshots]
-        snapshots.sort(key=lambda s: s.timestamp, reverse=True)
-        return snapshots
+        timeline = self._project_index.get(project_id)
+        if timeline is None:
+            return []
+        snapshots = map(self.get_snapshot, reversed(timeline.ids))
+        return [s for s in snapshots if s is not None]
+
+    def project_ids(self, tenant_id: str | None = None) -> list[str]:
+        """Sorted ids of projects with snapshots, optionally for one tenant."""
+        if tenant_id is not None:
+            return sorted(self._tenant_index.get(tenant_id, {}))
+        return sorted(self._project_index)
+
+    def snapshots_between(
+        self,
+        project_id: str,
+        start: datetime,
+        end: datetime,
+        tenant_id: str | None = None,
+    ) -> Iterator[ComplianceSnapshot]:
+        """Yield a project's snapshots with ``start <= timestamp <= end``, oldest first.
+
+        With *tenant_id*, only that tenant's snapshots of the project are
+        yielded.  The range is located by binary search and snapshots are
+        loaded one at a time as the iterator is consumed.
+        """
+        if tenant_id is None:
+            timeline = self._project_index.get(project_id)
+        else:
+            timeline = self._tenant_index.get(tenant_id, {}).get(project_id)
+        if timeline is None:
+            return
+        for snapshot_id in timeline.ids_between(start, end):
+            snapshot = self.get_snapshot(snapshot_id)
+            if snapshot is not None:
+                yield snapshot
+
+    def _index_snapshot(
+        self, project_id: str, tenant_id: str, timestamp: datetime, snapshot_id: str
+    ) -> None:
+        self._project_index.setdefault(project_id, _ProjectTimeline()).insert(
+            timestamp, snapshot_id
+        )
+        self._tenant_index.setdefault(tenant_id, {}).setdefault(
+            project_id, _ProjectTimeline()
+        ).insert(timestamp, snapshot_id)
+
+    def storage_stats(self) -> dict[str, int]:
+        """Return snapshot and distinct-payload counts and stored payload bytes."""
+        if self._log is not None:
+            return {
+                "snapshots": len(self._log),
+                "unique_payloads": self._log.blob_count,
+                "delta_payloads": self._log.delta_count,
+                "payload_bytes": self._log.payload_bytes,
+            }
+        return {
+            "snapshots": len(self._snapshots),
+            "unique_payloads": len(self._payloads) + len(self._payload_deltas),
+            "delta_payloads": len(self._payload_deltas),
+            "payload_bytes": self._payload_bytes,
+        }
+
+    def flush(self) -> None:
+        """Fsync snapshots not yet made durable (no-op in memory mode)."""
+        if self._log is not None:
+            self._log.flush()
+
+    def close(self) -> None:
+        """Flush and release the segment log, if any."""
+        if self._log is not None:
+            self._log.close()
 
     def reconstruct_state_at(
         self, project_id: str, at_time: datetime
     ) -> ComplianceSnapshot | None:
         """Return the latest snapshot with timestamp <= at_time."""
-        candidates = [
-            s
-            for s in self.get_project_snapshots(project_id)
-            if s.timestamp <= at_time
-        ]
-        return candidates[0] if candidates else None
+        timeline = self._project_index.get(project_id)
+        if timeline is None:
+            return None
+        snapshot_id = timeline.latest_at_or_before(at_time)
+        return self.get_snapshot(snapshot_id) if snapshot_id is not None else None
+
+    def as_of(self, tenant_id: str, at_time: datetime) -> Iterator[ComplianceSnapshot]:
+        """Yield each of a tenant's projects' latest snapshot at or before *at_time*.
+
+        The tenant's per-project timelines are joined against *at_time* with
+        one binary search each, in project-id order; tenants are resolved
+        from index metadata, so no other tenant's payload is read.  Projects
+        with no snapshot by *at_time* are skipped.
+        """
+        projects = self._tenant_index.get(tenant_id, {})
+        for project_id in sorted(projects):
+            snapshot_id = projects[project_id].latest_at_or_before(at_time)
+            if snapshot_id is None:
+                continue
+            snapshot = self.get_snapshot(snapshot_id)
+            if snapshot is not None:
+                yield snapshot
+
+    def merkle_root(self, project_id: str) -> str | None:
+        """Hex root of a project's snapshot Merkle tree, or ``None`` if empty."""
+        tree = self._merkle_tree(project_id, create=False)
+        return tree.root().hex() if tree else None
+
+    def inclusion_proof(self, snapshot_id: str) -> dict[str, Any] | None:
+        """Return an O(log n) proof that a snapshot is in its project's tree."""
+        self._load_merkle_trees()
+        index = self._leaf_index.get(snapshot_id)
+        snapshot = self.get_snapshot(snapshot_id) if index is not None else None
+        if snapshot is None:
+            return None
+        tree = self._merkle[snapshot.project_id]
+        return {
+            "snapshot_id": snapshot_id,
+            "project_id": snapshot.project_id,
+            "leaf_index": index,
+            "tree_size": len(tree),
+            "leaf_hash": tree.leaf(index).hex(),
+            "path": [node.hex() for node in tree.inclusion_proof(index)],
+            "root": tree.root().hex(),
+        }
+
+    @staticmethod
+    def verify_inclusion_proof(
+        proof: dict[str, Any], snapshot: ComplianceSnapshot | None = None
+    ) -> bool:
+        """Check a proof from :meth:`inclusion_proof` against its root.
+
+        With *snapshot*, the leaf hash is recomputed from the snapshot (and
+        its payload hash checked) instead of trusted from the proof.
+        """
+        leaf = bytes.fromhex(proof["leaf_hash"])
+        if snapshot is not None:
+            if _compute_hash(snapshot.raw_payload) != snapshot.data_hash:
+                return False
+            leaf = snapshot_leaf_hash(
+                snapshot.snapshot_id,
+                snapshot.project_id,
+                snapshot.timestamp,
+                snapshot.data_hash,
+            )
+        return verify_inclusion(
+            leaf,
+            proof["leaf_index"],
+            proof["tree_size"],
+            [bytes.fromhex(node) for node in proof["path"]],
+            bytes.fromhex(proof["root"]),
+        )
+
+    def verify_project(
+        self,
+        project_id: str,
+        full: bool = False,
+        workers: int | None = 1,
+        progress: Callable[[dict[str, Any]], None] | None = None,
+    ) -> dict[str, Any]:
+        """Verify a project's snapshots against its Merkle tree.
+
+        Only leaves appended since the last successful verification are
+        rehashed, unless *full* is set.  Each rehashed snapshot must match
+        both its stored ``data_hash`` and its leaf; on success the verified
+        size advances to the current tree size.  Payloads are rehashed as in
+        :meth:`verify_all`, in-process by default.
+        """
+        tree = self._merkle_tree(project_id, create=False) or MerkleTree()
+        start = 0 if full else tree.verified_size
+        size = len(tree)
+        ids = self._leaf_ids.get(project_id, [])
+        failed: set[str] = set()
+
+        def records() -> Iterator[dict[str, Any]]:
+            for index in range(start, size):
+                record = self._snapshot_record(ids[index])
+                if record is None or snapshot_leaf_hash(
+                    record["snapshot_id"],
+                    record["project_id"],
+                    record["timestamp"],
+                    record["data_hash"],
+                ) != tree.leaf(index):
+                    failed.add(ids[index])
+                    continue
+                yield record
+
+        report = self._rehash(records(), workers, progress=progress)
+        failed.update(report["mismatches"])
+        if not failed:
+            tree.verified_size = size
+        return {
+            "project_id": project_id,
+            "verified": not failed,
+            "tree_size": size,
+            "rehashed": size - start,
+            "root": tree.root(size).hex(),
+            "failures": [i for i in ids[start:size] if i in failed],
+            "seconds": report["seconds"],
+            "snapshots_per_sec": report["snapshots_per_sec"],
+        }
+
+    def verify_all(
+        self,
+        workers: int | None = None,
+        batch_size: int = 256,
+        progress: Callable[[dict[str, Any]], None] | None = None,
+    ) -> dict[str, Any]:
+        """Rehash every stored snapshot's payload and report mismatches.
+
+        With *storage_dir*, batches of *batch_size* snapshots are hashed by a
+        pool of *workers* processes (one per CPU by default) that read the
+        payloads from the segment files themselves.  In memory, payloads are
+        always hashed in-process: *workers* has no effect there and the
+        report's ``workers`` is 1.  *progress* receives the running report
+        (``checked``, ``mismatches``, ``snapshots_per_sec``, ``mb_per_sec``
+        ...) after each batch.
+        """
+
+        def records() -> Iterator[dict[str, Any]]:
+            for project_id in sorted(self._project_index):
+                for snapshot_id in self._project_index[project_id].ids:
+                    record = self._snapshot_record(snapshot_id)
+                    if record is not None:
+                        yield record
+
+        report = self._rehash(records(), workers, batch_size, progress)
+        report["verified"] = not report["mismatches"]
+        return report
+
+    def _snapshot_record(self, snapshot_id: str) -> dict[str, Any] | None:
+        """A snapshot's metadata (ids, timestamp, hashes) without its payload."""
+        if self._log is not None:
+            return self._log.get_metadata(snapshot_id)
+        snapshot = self._snapshots.get(snapshot_id)
+        if snapshot is None:
+            return None
+        return snapshot.model_dump(exclude={"raw_payload"})
+
+    def _rehash(
+        self,
+        records: Iterable[dict[str, Any]],
+        workers: int | None,
+        batch_size: int = 256,
+        progress: Callable[[dict[str, Any]], None] | None = None,
+    ) -> dict[str, Any]:
+        """Rehash the payloads of *records* against their ``data_hash``."""
+        if self._log is None:
+            items = (
+                (r["snapshot_id"], r["data_hash"], self._payload_of(r["snapshot_id"]))
+                for r in records
+            )
+            return verify_payloads(items, batch_size, progress)
+        chain = self._log.payload_chain
+        stored = (
+            (r["snapshot_id"], r["data_hash"], chain(r["payload_ref"]) or ())
+            for r in records
+        )
+        return verify_stored(self._log.directory, stored, workers, batch_size, progress)
+
+    def _payload_of(self, snapshot_id: str) -> Any:
+        if self._codec is None:
+            # Only hashed, so the stored payload is read without a copy.
+            snapshot = self._snapshots.get(snapshot_id)
+            return snapshot.raw_payload if snapshot is not None else None
+        snapshot = self.get_snapshot(snapshot_id)
+        return snapshot.raw_payload if snapshot is not None else None
+
+    def _merkle_tree(self, project_id: str, create: bool = True) -> MerkleTree | None:
+        self._load_merkle_trees()
+        tree = self._merkle.get(project_id)
+        if tree is None and create:
+            tree = self._merkle[project_id] = MerkleTree()
+        return tree
+
+    def _add_leaf(
+        self, tree: MerkleTree, project_id: str, leaf: bytes, snapshot_id: str
+    ) -> None:
+        self._leaf_index[snapshot_id] = tree.append(leaf)
+        self._leaf_ids.setdefault(project_id, []).append(snapshot_id)
+
+    def _load_merkle_trees(self) -> None:
+        """Rebuild disk-backed trees from the leaf hashes kept in the index."""
+        if self._merkle_loaded:
+            return
+        self._merkle_loaded = True
+        for location in self._log.iter_locations():
+            self._add_leaf(
+                self._merkle.setdefault(location.project_id, MerkleTree()),
+                location.project_id,
+                location.leaf_hash,
+                location.snapshot_id,
+            )
 
     def replay_risk_score(
         self, snapshot_id: str, risk_engine: Any
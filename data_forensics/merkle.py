@@ -0,0 +1,126 @@
+"""Append-only Merkle tree over a project's snapshots (RFC 9162 hashing).
+
+Leaves are hashed as ``SHA-256(0x00 || data)`` and interior nodes as
+``SHA-256(0x01 || left || right)``; the root of a tree whose size is not a
+power of two splits at the largest power of two below it, as in
+Certificate Transparency.  Appending a leaf costs amortized O(1) hashes,
+and inclusion proofs have O(log n) sibling hashes.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from datetime import datetime
+
+_LEAF_PREFIX = b"\x00"
+_NODE_PREFIX = b"\x01"
+
+
+def _node_hash(left: bytes, right: bytes) -> bytes:
+    return hashlib.sha256(_NODE_PREFIX + left + right).digest()
+
+
+def snapshot_leaf_hash(
+    snapshot_id: str, project_id: str, timestamp: datetime | str, data_hash: str
+) -> bytes:
+    """Leaf hash binding a snapshot's identity, time and payload hash."""
+    if isinstance(timestamp, datetime):
+        timestamp = timestamp.isoformat()
+    data = f"{snapshot_id}|{project_id}|{timestamp}|{data_hash}".encode()
+    return hashlib.sha256(_LEAF_PREFIX + data).digest()
+
+
+def _split(size: int) -> int:
+    """Largest power of two strictly below *size* (``size >= 2``)."""
+    return 1 << ((size - 1).bit_length() - 1)
+
+
+class MerkleTree:
+    """Incrementally built Merkle tree.
+
+    ``levels[k]`` holds the roots of the complete, aligned subtrees of
+    ``2**k`` leaves, so any subtree hash needed for a root or proof is
+    either stored or combined from O(log n) stored hashes.
+    """
+
+    __slots__ = ("levels", "verified_size")
+
+    def __init__(self) -> None:
+        self.levels: list[list[bytes]] = [[]]
+        # Leaves covered by the last successful verification
+        self.verified_size = 0
+
+    def __len__(self) -> int:
+        return len(self.levels[0])
+
+    def leaf(self, index: int) -> bytes:
+        return self.levels[0][index]
+
+    def append(self, leaf_hash: bytes) -> int:
+        """Add a leaf and return its index."""
+        index = len(self.levels[0])
+        self.levels[0].append(leaf_hash)
+        level = 0
+        while len(self.levels[level]) % 2 == 0:
+            nodes = self.levels[level]
+            if level + 1 == len(self.levels):
+                self.levels.append([])
+            self.levels[level + 1].append(_node_hash(nodes[-2], nodes[-1]))
+            level += 1
+        return index
+
+    def root(self, size: int | None = None) -> bytes:
+        """Root over the first *size* leaves (default: all of them)."""
+        size = len(self) if size is None else size
+        if size == 0:
+            return hashlib.sha256(b"").digest()
+        return self._subtree(0, size)
+
+    def inclusion_proof(self, index: int, size: int | None = None) -> list[bytes]:
+        """Sibling hashes proving leaf *index* is in the tree of *size* leaves."""
+        size = len(self) if size is None else size
+        if not 0 <= index < size <= len(self):
+            raise ValueError(f"Leaf {index} is not in a tree of {size} leaves")
+        path: list[bytes] = []
+        lo, hi = 0, size
+        while hi - lo > 1:
+            k = _split(hi - lo)
+            if index < lo + k:
+                path.append(self._subtree(lo + k, hi))
+                hi = lo + k
+            else:
+                path.append(self._subtree(lo, lo + k))
+                lo += k
+        path.reverse()
+        return path
+
+    def _subtree(self, lo: int, hi: int) -> bytes:
+        """Hash of leaves ``[lo, hi)``; *lo* is aligned to the split below *hi*."""
+        size = hi - lo
+        if size & (size - 1) == 0:
+            level = size.bit_length() - 1
+            return self.levels[level][lo >> level]
+        k = _split(size)
+        return _node_hash(self._subtree(lo, lo + k), self._subtree(lo + k, hi))
+
+
+def verify_inclusion(
+    leaf_hash: bytes, index: int, size: int, path: list[bytes], root: bytes
+) -> bool:
+    """Check an inclusion proof (RFC 9162, section 2.1.3.2)."""
+    if not 0 <= index < size:
+        return False
+    fn, sn, r = index, size - 1, leaf_hash
+    for p in path:
+        if sn == 0:
+            return False
+        if fn & 1 or fn == sn:
+            r = _node_hash(p, r)
+            while not fn & 1 and fn != 0:
+                fn >>= 1
+                sn >>= 1
+        else:
+            r = _node_hash(r, p)
+        fn >>= 1
+        sn >>= 1
+    return sn == 0 and r == root
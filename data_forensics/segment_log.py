@@ -0,0 +1,658 @@
+"""Durable, append-only segment log for compliance snapshots.
+
+Layout of a storage directory::
+
+    00000001.seg   records: header (magic, body length, CRC-32) + body
+    00000001.idx   one entry per record: offset, length, timestamp, kind, ids
+                   (+ the Merkle leaf hash for snapshot records)
+
+Segments hold three record kinds.  A *blob* record stores a payload once,
+as the canonical JSON it is hashed from, and is addressed by that SHA-256.
+With a ``checkpoint_interval``, a new payload may instead be stored as a
+*delta* record: a structural diff against the project's previous payload
+(see :mod:`data_forensics.delta_codec`).  A *snapshot* record holds the
+snapshot's metadata plus a reference to its payload, so re-archiving
+identical data appends only a small record.
+
+Only the segment files are authoritative.  Index entries are written after
+the segment bytes they describe have been fsynced, so an index can lag its
+segment but never run ahead of it; on open, each index is memory-mapped to
+rebuild the in-RAM locations and the segment tail past the last indexed
+record is scanned to recover anything the index missed.  A torn record at
+the tail of the newest segment (a crash mid-append) is truncated away.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from collections.abc import Iterator
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+from core.compliance_models import ComplianceSnapshot
+
+from .delta_codec import (
+    DeltaCodec,
+    PayloadEntry,
+    apply_json_delta,
+    reconstruct_payload,
+)
+from .merkle import snapshot_leaf_hash
+
+logger = logging.getLogger(__name__)
+
+_SNAPSHOT_MAGIC = b"SNP1"
+_BLOB_MAGIC = b"BLB1"
+# Delta body: payload key (64 hex) + base key (64 hex) + delta JSON
+_DELTA_MAGIC = b"DLT1"
+_KEY_LENGTH = 64
+# magic, body length, CRC-32 of body
+_RECORD_HEADER = struct.Struct("<4sII")
+# record offset, record length, timestamp (µs since epoch; chain depth for
+# deltas), kind, then the byte lengths of three ids: snapshot/project/tenant,
+# blob key/-/- or delta key/base key/-
+_INDEX_ENTRY = struct.Struct("<QIqBHHH")
+# Snapshot entries are followed by the snapshot's 32-byte Merkle leaf hash,
+# so trees are rebuilt on open without reading any snapshot record
+_KIND_SNAPSHOT = 0
+_KIND_BLOB = 1
+_KIND_DELTA = 2
+_LEAF_LENGTH = 32
+_INDEX_KINDS = (_KIND_SNAPSHOT, _KIND_BLOB, _KIND_DELTA)
+
+# (segment, offset, length) of the records that rebuild one payload: its
+# checkpoint first, then each delta in order
+PayloadChain = tuple[tuple[int, int, int], ...]
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=UTC)
+
+
+def canonical_payload(raw_payload: dict) -> bytes:
+    """Canonical JSON bytes of a payload (sorted keys, non-JSON values as str).
+
+    This is the exact byte string a snapshot's ``data_hash`` is computed
+    over, and the content a payload blob stores.
+    """
+    return json.dumps(raw_payload, sort_keys=True, default=str).encode("utf-8")
+
+
+def _to_micros(ts: datetime) -> int:
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=UTC)
+    delta = ts - _EPOCH
+    return (delta.days * 86_400 + delta.seconds) * 1_000_000 + delta.microseconds
+
+
+def _from_micros(micros: int) -> datetime:
+    return datetime.fromtimestamp(micros // 1_000_000, tz=UTC).replace(
+        microsecond=micros % 1_000_000
+    )
+
+
+def _tenant_of(raw_payload: dict) -> str:
+    return str(raw_payload.get("_tenant_id", "default"))
+
+
+def _encode_snapshot(snapshot: ComplianceSnapshot, payload_ref: str) -> bytes:
+    """Serialize a snapshot's metadata with a reference to its payload blob."""
+    record = {
+        "snapshot_id": snapshot.snapshot_id,
+        "project_id": snapshot.project_id,
+        "tenant_id": _tenant_of(snapshot.raw_payload),
+        "timestamp": snapshot.timestamp.isoformat(),
+        "data_hash": snapshot.data_hash,
+        "payload_ref": payload_ref,
+        "risk_assessment": (
+            snapshot.risk_assessment.model_dump(mode="json")
+            if snapshot.risk_assessment is not None
+            else None
+        ),
+        "version": snapshot.version,
+    }
+    return json.dumps(record, separators=(",", ":")).encode("utf-8")
+
+
+class SnapshotLocation:
+    """Hot, in-RAM metadata for one stored snapshot."""
+
+    __slots__ = (
+        "snapshot_id",
+        "project_id",
+        "tenant_id",
+        "timestamp",
+        "segment",
+        "offset",
+        "length",
+        "leaf_hash",
+    )
+
+    def __init__(
+        self,
+        snapshot_id: str,
+        project_id: str,
+        tenant_id: str,
+        timestamp: datetime,
+        segment: int,
+        offset: int,
+        length: int,
+        leaf_hash: bytes,
+    ) -> None:
+        self.snapshot_id = snapshot_id
+        self.project_id = project_id
+        self.tenant_id = tenant_id
+        self.timestamp = timestamp
+        self.segment = segment
+        self.offset = offset
+        self.length = length
+        self.leaf_hash = leaf_hash
+
+
+class _Segment:
+    """An open segment file and its index file."""
+
+    def __init__(self, directory: Path, number: int) -> None:
+        self.number = number
+        self.path = directory / f"{number:08d}.seg"
+        self.index_path = directory / f"{number:08d}.idx"
+        flags = os.O_RDWR | os.O_CREAT | getattr(os, "O_BINARY", 0)
+        self.fd = os.open(self.path, flags, 0o644)
+        self.index_fd = os.open(self.index_path, flags | os.O_APPEND, 0o644)
+        self.size = os.fstat(self.fd).st_size
+
+    def close(self) -> None:
+        os.close(self.fd)
+        os.close(self.index_fd)
+
+
+class SegmentLog:
+    """Append-only snapshot storage in size-bounded segment files.
+
+    Appends are written immediately and fsynced in batches.  There is no
+    background timer: an append fsyncs once *fsync_every* records are
+    pending or *fsync_interval* seconds have passed since the last fsync,
+    and :meth:`flush` / :meth:`close` fsync whatever is left.  A writer
+    that goes idle keeps its last appends unsynced until one of those
+    happens, so call :meth:`flush` when durability matters.  Only
+    :class:`SnapshotLocation` metadata is held in memory; snapshot bodies
+    are read from disk on demand.
+
+    With *checkpoint_interval*, new payloads are delta-encoded against the
+    ``base_ref`` passed to :meth:`append`, with a full checkpoint at least
+    every *checkpoint_interval* versions.
+    """
+
+    def __init__(
+        self,
+        directory: str | Path,
+        *,
+        segment_max_bytes: int = 64 * 1024 * 1024,
+        fsync_every: int = 64,
+        fsync_interval: float = 1.0,
+        checkpoint_interval: int | None = None,
+        payload_cache_size: int = 64,
+    ) -> None:
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.segment_max_bytes = segment_max_bytes
+        self.fsync_every = max(fsync_every, 1)
+        self.fsync_interval = fsync_interval
+        self._codec = (
+            DeltaCodec(checkpoint_interval) if checkpoint_interval is not None else None
+        )
+
+        self._lock = threading.RLock()
+        self._segments: dict[int, _Segment] = {}
+        self._locations: dict[str, SnapshotLocation] = {}
+        self._order: list[SnapshotLocation] = []
+        # payload SHA-256 -> (segment, offset, length) of its blob record
+        self._blobs: dict[str, tuple[int, int, int]] = {}
+        # delta payload key -> (base key, versions since checkpoint)
+        self._deltas: dict[str, tuple[str, int]] = {}
+        # Recently written/read canonical payloads, to diff and rebuild cheaply
+        self._payload_cache: OrderedDict[str, bytes] = OrderedDict()
+        self._payload_cache_size = payload_cache_size
+        self._pending_index: list[bytes] = []
+        self._last_sync = time.monotonic()
+        self._closed = False
+
+        numbers = sorted(int(p.stem) for p in self.directory.glob("*.seg"))
+        for number in numbers:
+            self._recover_segment(number, is_last=number == numbers[-1])
+        self._active = self._segments[numbers[-1]] if numbers else self._open_segment(1)
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def append(
+        self,
+        snapshot: ComplianceSnapshot,
+        canonical: bytes | None = None,
+        base_ref: str | None = None,
+    ) -> SnapshotLocation:
+        """Append *snapshot* and return its location.
+
+        The payload is written only if no payload with the same content is
+        stored; *canonical* may pass its precomputed
+        :func:`canonical_payload` bytes.  *base_ref* names the payload to
+        delta-encode against when a checkpoint interval is configured.
+        """
+        if canonical is None:
+            canonical = canonical_payload(snapshot.raw_payload)
+        payload_ref = hashlib.sha256(canonical).hexdigest()
+        body = _encode_snapshot(snapshot, payload_ref)
+        with self._lock:
+            self._check_open()
+            if payload_ref not in self._blobs:
+                self._store_payload(payload_ref, canonical, base_ref)
+            segment, offset, length = self._write(_SNAPSHOT_MAGIC, body)
+            location = SnapshotLocation(
+                snapshot.snapshot_id,
+                snapshot.project_id,
+                _tenant_of(snapshot.raw_payload),
+                snapshot.timestamp,
+                segment,
+                offset,
+                length,
+                snapshot_leaf_hash(
+                    snapshot.snapshot_id,
+                    snapshot.project_id,
+                    snapshot.timestamp,
+                    snapshot.data_hash,
+                ),
+            )
+            self._add_location(location)
+            self._pending_index.append(self._location_entry(location))
+            if (
+                len(self._pending_index) >= self.fsync_every
+                or time.monotonic() - self._last_sync >= self.fsync_interval
+            ):
+                self._sync()
+            return location
+
+    def get(self, snapshot_id: str) -> ComplianceSnapshot | None:
+        """Read and decode a snapshot, or ``None`` if it is not stored."""
+        with self._lock:
+            location = self._locations.get(snapshot_id)
+            if location is None:
+                return None
+            self._check_open()
+            record = json.loads(
+                self._read_body(location.segment, location.offset, location.length)
+            )
+            payload_ref = record.pop("payload_ref")
+            payload = (
+                reconstruct_payload(payload_ref, self._read_payload)
+                if payload_ref in self._blobs
+                else {}
+            )
+        record.pop("tenant_id")
+        record["raw_payload"] = payload
+        return ComplianceSnapshot.model_validate(record)
+
+    def get_metadata(self, snapshot_id: str) -> dict | None:
+        """Read a snapshot's metadata record without loading its payload."""
+        with self._lock:
+            location = self._locations.get(snapshot_id)
+            if location is None:
+                return None
+            self._check_open()
+            return json.loads(
+                self._read_body(location.segment, location.offset, location.length)
+            )
+
+    @property
+    def blob_count(self) -> int:
+        """Number of distinct payloads stored (checkpoints and deltas)."""
+        return len(self._blobs)
+
+    @property
+    def delta_count(self) -> int:
+        """Number of distinct payloads stored as deltas."""
+        return len(self._deltas)
+
+    @property
+    def payload_bytes(self) -> int:
+        """Bytes of payload records (checkpoints and deltas) on disk."""
+        with self._lock:
+            return sum(length for _, _, length in self._blobs.values())
+
+    def location(self, snapshot_id: str) -> SnapshotLocation | None:
+        return self._locations.get(snapshot_id)
+
+    def payload_chain(self, payload_ref: str) -> PayloadChain | None:
+        """Record locations that rebuild *payload_ref*, for a :class:`SegmentReader`."""
+        with self._lock:
+            if payload_ref not in self._blobs:
+                return None
+            chain = [self._blobs[payload_ref]]
+            while payload_ref in self._deltas:
+                payload_ref = self._deltas[payload_ref][0]
+                chain.append(self._blobs[payload_ref])
+        return tuple(reversed(chain))
+
+    def iter_locations(self) -> Iterator[SnapshotLocation]:
+        """Yield the metadata of every stored snapshot in append order."""
+        with self._lock:
+            order = list(self._order)
+        yield from order
+
+    def __contains__(self, snapshot_id: object) -> bool:
+        return snapshot_id in self._locations
+
+    def __len__(self) -> int:
+        return len(self._locations)
+
+    def flush(self) -> None:
+        """Fsync pending appends and persist their index entries."""
+        with self._lock:
+            if not self._closed:
+                self._sync()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            self._sync()
+            for segment in self._segments.values():
+                segment.close()
+            self._closed = True
+
+    def __enter__(self) -> SegmentLog:
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _check_open(self) -> None:
+        if self._closed:
+            raise ValueError("SegmentLog is closed")
+
+    def _add_location(self, location: SnapshotLocation) -> None:
+        self._locations[location.snapshot_id] = location
+        self._order.append(location)
+
+    def _write(self, magic: bytes, body: bytes) -> tuple[int, int, int]:
+        """Append one record to the active segment; return its location."""
+        record = _RECORD_HEADER.pack(magic, len(body), zlib.crc32(body)) + body
+        if (
+            self._active.size
+            and self._active.size + len(record) > self.segment_max_bytes
+        ):
+            self._roll_segment()
+        segment = self._active
+        offset = segment.size
+        os.pwrite(segment.fd, record, offset)
+        segment.size += len(record)
+        return segment.number, offset, len(record)
+
+    def _store_payload(self, key: str, canonical: bytes, base_ref: str | None) -> None:
+        """Write a payload as a delta against *base_ref* or as a full blob."""
+        delta = None
+        if self._codec is not None and base_ref in self._blobs:
+            base_depth = self._deltas[base_ref][1] if base_ref in self._deltas else 0
+            if not self._codec.needs_checkpoint(base_depth):
+                delta = self._codec.encode(
+                    reconstruct_payload(base_ref, self._read_payload),
+                    base_depth,
+                    json.loads(canonical),
+                    len(canonical),
+                )
+        if delta is None:
+            location = self._write(_BLOB_MAGIC, canonical)
+            entry = self._index_entry(_KIND_BLOB, location[1], location[2], 0, key)
+        else:
+            body = key.encode("ascii") + base_ref.encode("ascii") + delta
+            location = self._write(_DELTA_MAGIC, body)
+            self._deltas[key] = (base_ref, base_depth + 1)
+            entry = self._index_entry(
+                _KIND_DELTA, location[1], location[2], base_depth + 1, key, base_ref
+            )
+        self._blobs[key] = location
+        self._pending_index.append(entry)
+        self._cache_payload(key, canonical)
+
+    def _read_payload(self, key: str) -> PayloadEntry:
+        cached = self._payload_cache.get(key)
+        if cached is not None:
+            self._payload_cache.move_to_end(key)
+            return ("full", json.loads(cached))
+        body = self._read_body(*self._blobs[key])
+        if key in self._deltas:
+            return ("delta", self._deltas[key][0], json.loads(body[2 * _KEY_LENGTH :]))
+        self._cache_payload(key, body)
+        return ("full", json.loads(body))
+
+    def _cache_payload(self, key: str, canonical: bytes) -> None:
+        if self._payload_cache_size <= 0:
+            return
+        self._payload_cache[key] = canonical
+        self._payload_cache.move_to_end(key)
+        while len(self._payload_cache) > self._payload_cache_size:
+            self._payload_cache.popitem(last=False)
+
+    def _read_body(self, segment: int, offset: int, length: int) -> bytes:
+        data = os.pread(self._segments[segment].fd, length, offset)
+        return data[_RECORD_HEADER.size :]
+
+    @staticmethod
+    def _index_entry(
+        kind: int, offset: int, length: int, micros: int, *ids: str
+    ) -> bytes:
+        encoded = [value.encode("utf-8") for value in ids]
+        encoded += [b""] * (3 - len(encoded))
+        return _INDEX_ENTRY.pack(
+            offset, length, micros, kind, *map(len, encoded)
+        ) + b"".join(encoded)
+
+    def _location_entry(self, location: SnapshotLocation) -> bytes:
+        return (
+            self._index_entry(
+                _KIND_SNAPSHOT,
+                location.offset,
+                location.length,
+                _to_micros(location.timestamp),
+                location.snapshot_id,
+                location.project_id,
+                location.tenant_id,
+            )
+            + location.leaf_hash
+        )
+
+    def _sync(self) -> None:
+        if self._pending_index:
+            os.fsync(self._active.fd)
+            os.write(self._active.index_fd, b"".join(self._pending_index))
+            self._pending_index.clear()
+        self._last_sync = time.monotonic()
+
+    def _open_segment(self, number: int) -> _Segment:
+        segment = _Segment(self.directory, number)
+        self._segments[number] = segment
+        return segment
+
+    def _roll_segment(self) -> None:
+        self._sync()
+        os.fsync(self._active.index_fd)
+        self._active = self._open_segment(self._active.number + 1)
+
+    def _recover_segment(self, number: int, *, is_last: bool) -> None:
+        segment = self._open_segment(number)
+        indexed_end = self._load_index(segment)
+        recovered, valid_end = self._scan_tail(segment, indexed_end)
+
+        if valid_end < segment.size:
+            if is_last:
+                logger.warning(
+                    "Truncating torn tail of %s at byte %d", segment.path, valid_end
+                )
+                os.ftruncate(segment.fd, valid_end)
+                segment.size = valid_end
+            else:
+                logger.error(
+                    "Unreadable records in sealed segment %s from byte %d",
+                    segment.path,
+                    valid_end,
+                )
+        if recovered:
+            os.write(segment.index_fd, b"".join(recovered))
+            os.fsync(segment.index_fd)
+
+    def _load_index(self, segment: _Segment) -> int:
+        """Load index entries via mmap; return the end offset they cover."""
+        index_size = os.fstat(segment.index_fd).st_size
+        if index_size == 0:
+            return 0
+        end = 0
+        valid = 0
+        with mmap.mmap(segment.index_fd, index_size, access=mmap.ACCESS_READ) as view:
+            pos = 0
+            while pos + _INDEX_ENTRY.size <= index_size:
+                offset, length, micros, kind, *id_lengths = _INDEX_ENTRY.unpack_from(
+                    view, pos
+                )
+                ids_end = pos + _INDEX_ENTRY.size + sum(id_lengths)
+                if kind == _KIND_SNAPSHOT:
+                    ids_end += _LEAF_LENGTH
+                if (
+                    kind not in _INDEX_KINDS
+                    or ids_end > index_size
+                    or offset != end
+                    or offset + length > segment.size
+                ):
+                    break
+                ids = []
+                start = pos + _INDEX_ENTRY.size
+                for id_length in id_lengths:
+                    ids.append(view[start : start + id_length].decode("utf-8"))
+                    start += id_length
+                if kind == _KIND_BLOB:
+                    self._blobs[ids[0]] = (segment.number, offset, length)
+                elif kind == _KIND_DELTA:
+                    self._blobs[ids[0]] = (segment.number, offset, length)
+                    self._deltas[ids[0]] = (ids[1], micros)
+                else:
+                    self._add_location(
+                        SnapshotLocation(
+                            *ids,
+                            _from_micros(micros),
+                            segment.number,
+                            offset,
+                            length,
+                            bytes(view[start:ids_end]),
+                        )
+                    )
+                end = offset + length
+                pos = valid = ids_end
+        if valid < index_size:
+            # Partial or stale trailing entries; the tail scan re-derives them.
+            os.ftruncate(segment.index_fd, valid)
+        return end
+
+    def _scan_tail(self, segment: _Segment, start: int) -> tuple[list[bytes], int]:
+        """Decode records from *start*; return their index entries and the
+        end of valid data."""
+        recovered: list[bytes] = []
+        pos = start
+        while pos + _RECORD_HEADER.size <= segment.size:
+            magic, length, crc = _RECORD_HEADER.unpack(
+                os.pread(segment.fd, _RECORD_HEADER.size, pos)
+            )
+            end = pos + _RECORD_HEADER.size + length
+            if (
+                magic not in (_SNAPSHOT_MAGIC, _BLOB_MAGIC, _DELTA_MAGIC)
+                or end > segment.size
+            ):
+                break
+            body = os.pread(segment.fd, length, pos + _RECORD_HEADER.size)
+            if zlib.crc32(body) != crc:
+                break
+            if magic == _BLOB_MAGIC:
+                key = hashlib.sha256(body).hexdigest()
+                self._blobs[key] = (segment.number, pos, end - pos)
+                recovered.append(self._index_entry(_KIND_BLOB, pos, end - pos, 0, key))
+            elif magic == _DELTA_MAGIC:
+                key = body[:_KEY_LENGTH].decode("ascii")
+                base = body[_KEY_LENGTH : 2 * _KEY_LENGTH].decode("ascii")
+                depth = (self._deltas[base][1] if base in self._deltas else 0) + 1
+                self._blobs[key] = (segment.number, pos, end - pos)
+                self._deltas[key] = (base, depth)
+                recovered.append(
+                    self._index_entry(_KIND_DELTA, pos, end - pos, depth, key, base)
+                )
+            else:
+                record = json.loads(body)
+                location = SnapshotLocation(
+                    record["snapshot_id"],
+                    record["project_id"],
+                    record["tenant_id"],
+                    datetime.fromisoformat(record["timestamp"]),
+                    segment.number,
+                    pos,
+                    end - pos,
+                    snapshot_leaf_hash(
+                        record["snapshot_id"],
+                        record["project_id"],
+                        record["timestamp"],
+                        record["data_hash"],
+                    ),
+                )
+                self._add_location(location)
+                recovered.append(self._location_entry(location))
+            pos = end
+        return recovered, pos
+
+
+class SegmentReader:
+    """Read-only access to payload records of a :class:`SegmentLog` directory.
+
+    Records are immutable once written, so a reader in another process can
+    run alongside the writer; segment files are opened lazily and never
+    written.  Locations come from :meth:`SegmentLog.payload_chain`.
+    """
+
+    def __init__(self, directory: str | Path) -> None:
+        self.directory = Path(directory)
+        self._fds: dict[int, int] = {}
+
+    def read_body(self, segment: int, offset: int, length: int) -> bytes:
+        fd = self._fds.get(segment)
+        if fd is None:
+            path = self.directory / f"{segment:08d}.seg"
+            fd = self._fds[segment] = os.open(
+                path, os.O_RDONLY | getattr(os, "O_BINARY", 0)
+            )
+        return os.pread(fd, length, offset)[_RECORD_HEADER.size :]
+
+    def read_payload(self, chain: PayloadChain) -> Any:
+        """Decode a checkpoint and apply the deltas that follow it."""
+        payload = json.loads(self.read_body(*chain[0]))
+        for location in chain[1:]:
+            delta = json.loads(self.read_body(*location)[2 * _KEY_LENGTH :])
+            payload = apply_json_delta(payload, delta)
+        return payload
+
+    def close(self) -> None:
+        for fd in self._fds.values():
+            os.close(fd)
+        self._fds.clear()
+
+    def __enter__(self) -> SegmentReader:
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
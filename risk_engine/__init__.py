@@ -1,3 +1,20 @@
-from .engine import DeterministicRiskEngine
+from .arrow_io import iter_scored_batches, score_parquet
+from .backtest import BacktestEngine
+from .batch import RiskAssessmentBatch
+from .dob_features import violation_classes
+from .engine import DeterministicRiskEngine, extract_risk_features
+from .incremental import IncrementalRiskScorer, RescoreResult
+from .portfolio import PortfolioRiskIndex
 
-__all__ = ["DeterministicRiskEngine"]
+__all__ = [
+    "BacktestEngine",
+    "DeterministicRiskEngine",
+    "IncrementalRiskScorer",
+    "PortfolioRiskIndex",
+    "RescoreResult",
+    "RiskAssessmentBatch",
+    "extract_risk_features",
+    "iter_scored_batches",
+    "score_parquet",
+    "violation_classes",
+]
@@ -0,0 +1,272 @@
+"""Out-of-core risk scoring over Parquet and Arrow (Feather) files.
+
+``pyarrow`` is an optional dependency (the ``arrow`` extra)
+imported only when one of these functions is called.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterator, Sequence
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from .engine import _FEATURE_DEFAULTS, DeterministicRiskEngine
+
+_ARROW_SUFFIXES = frozenset({".arrow", ".feather", ".ipc"})
+
+
+def _require_pyarrow() -> Any:
+    try:
+        import pyarrow
+    except ImportError as exc:  # pragma: no cover - depends on environment
+        raise ImportError(
+            "Parquet/Arrow scoring requires pyarrow; install the arrow extra"
+        ) from exc
+    return pyarrow
+
+
+def _read_batches(
+    source: str | Path, columns: list[str], chunk_size: int
+) -> Iterator[Any]:
+    """Yield record batches of at most *chunk_size* rows from *source*.
+
+    Parquet is decoded a whole row group at a time (for the selected
+    columns only), so memory is bounded by the larger of *chunk_size* and
+    the source's row-group size, not by *chunk_size* alone.
+    """
+    pa = _require_pyarrow()
+    if Path(source).suffix.lower() in _ARROW_SUFFIXES:
+        import pyarrow.ipc as ipc
+
+        # Memory-mapped, so only the slices being scored are paged in.
+        with pa.memory_map(str(source)) as mapped:
+            reader = ipc.open_file(mapped)
+            for i in range(reader.num_record_batches):
+                batch = reader.get_batch(i).select(columns)
+                for offset in range(0, batch.num_rows, chunk_size):
+                    yield batch.slice(offset, chunk_size)
+        return
+
+    import pyarrow.parquet as pq
+
+    with pq.ParquetFile(str(source)) as parquet_file:
+        yield from parquet_file.iter_batches(batch_size=chunk_size, columns=columns)
+
+
+def _source_schema(source: str | Path) -> Any:
+    pa = _require_pyarrow()
+    if Path(source).suffix.lower() in _ARROW_SUFFIXES:
+        import pyarrow.ipc as ipc
+
+        with pa.memory_map(str(source)) as mapped:
+            return ipc.open_file(mapped).schema
+    import pyarrow.parquet as pq
+
+    return pq.read_schema(str(source))
+
+
+def _input_schema(source: str | Path, passthrough: Sequence[str]) -> Any:
+    """Return the schema of the passthrough and feature columns to read."""
+    schema = _source_schema(source)
+    available = set(schema.names)
+    missing = [name for name in passthrough if name not in available]
+    if missing:
+        raise ValueError(f"Passthrough columns not in source: {missing}")
+    features = [name for name in _FEATURE_DEFAULTS if name in available]
+    if not features:
+        raise ValueError(
+            f"Source has no risk feature columns; expected any of "
+            f"{list(_FEATURE_DEFAULTS)}"
+        )
+    keep = list(dict.fromkeys([*passthrough, *features]))
+    return _require_pyarrow().schema([schema.field(name) for name in keep])
+
+
+def _batch_to_columns(batch: Any) -> dict[str, Any]:
+    """Convert an Arrow record batch to ``score_many`` columns, filling nulls."""
+    import pyarrow.compute as pc
+
+    columns: dict[str, Any] = {}
+    for name in batch.schema.names:
+        if name not in _FEATURE_DEFAULTS:
+            continue
+        column = batch.column(name)
+        if name == "violation_classes":
+            columns[name] = column.to_pylist()  # nulls become None -> []
+            continue
+        if column.null_count:
+            column = pc.fill_null(column, _FEATURE_DEFAULTS[name])
+        columns[name] = column.to_numpy(zero_copy_only=False)
+    return columns
+
+
+def iter_scored_batches(
+    source: str | Path,
+    *,
+    engine: DeterministicRiskEngine | None = None,
+    chunk_size: int = 65_536,
+    passthrough: Sequence[str] = ("project_id",),
+    include_components: bool = False,
+) -> Iterator[Any]:
+    """Score *source* chunk by chunk, yielding one result batch per chunk.
+
+    Only the feature columns and *passthrough* columns present in the file
+    are read; a file with no feature column is rejected.  Each chunk of at
+    most *chunk_size* rows is scored with the engine's vectorized core and
+    converted to a ``pyarrow.RecordBatch`` of results.  Peak memory does
+    not grow with the file size: it is bounded by the larger of
+    *chunk_size* and the source's Parquet row-group size, since a row
+    group's selected columns are decoded whole.  Write large sources with
+    row groups no bigger than the chunk you want held in memory.
+    """
+    pa = _require_pyarrow()
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+    engine = engine or DeterministicRiskEngine()
+
+    keep = _input_schema(source, passthrough).names
+    scored_at = datetime.now(tz=UTC)
+    for batch in _read_batches(source, keep, chunk_size):
+        if batch.num_rows == 0:
+            continue
+        yield _score_batch(
+            pa, engine, batch, passthrough, scored_at, include_components
+        )
+
+
+def score_parquet(
+    source: str | Path,
+    destination: str | Path,
+    *,
+    engine: DeterministicRiskEngine | None = None,
+    chunk_size: int = 65_536,
+    passthrough: Sequence[str] = ("project_id",),
+    include_components: bool = False,
+    compression: str = "zstd",
+) -> dict:
+    """Score a Parquet/Feather file and write results to Parquet incrementally.
+
+    Each scored chunk is appended to *destination* as its own row group
+    before the next chunk is read.  A source without rows still produces
+    an empty *destination* with the result schema.  Returns a summary of
+    the run.
+    """
+    pa = _require_pyarrow()
+    import pyarrow.parquet as pq
+
+    engine = engine or DeterministicRiskEngine()
+    rows = chunks = 0
+    writer = None
+    try:
+        for result in iter_scored_batches(
+            source,
+            engine=engine,
+            chunk_size=chunk_size,
+            passthrough=passthrough,
+            include_components=include_components,
+        ):
+            if writer is None:
+                writer = pq.ParquetWriter(
+                    str(destination), result.schema, compression=compression
+                )
+            writer.write_batch(result)
+            rows += result.num_rows
+            chunks += 1
+        if writer is None:
+            empty = pa.RecordBatch.from_pylist(
+                [], schema=_input_schema(source, passthrough)
+            )
+            result = _score_batch(
+                pa,
+                engine,
+                empty,
+                passthrough,
+                datetime.now(tz=UTC),
+                include_components,
+            )
+            writer = pq.ParquetWriter(
+                str(destination), result.schema, compression=compression
+            )
+            writer.write_batch(result)
+    finally:
+        if writer is not None:
+            writer.close()
+
+    return {
+        "source": str(source),
+        "destination": str(destination),
+        "model_version": engine.model_version,
+        "rows": rows,
+        "chunks": chunks,
+        "chunk_size": chunk_size,
+    }
+
+
+def _score_batch(
+    pa: Any,
+    engine: DeterministicRiskEngine,
+    batch: Any,
+    passthrough: Sequence[str],
+    scored_at: datetime,
+    include_components: bool,
+) -> Any:
+    """Score one input record batch and return its result batch."""
+    data = engine._score_columns(_batch_to_columns(batch))
+    return _result_batch(
+        pa,
+        batch,
+        passthrough,
+        data,
+        engine.model_version,
+        scored_at,
+        include_components,
+    )
+
+
+def _result_batch(
+    pa: Any,
+    batch: Any,
+    passthrough: Sequence[str],
+    data: dict[str, Any],
+    model_version: str,
+    scored_at: datetime,
+    include_components: bool,
+) -> Any:
+    """Build the output record batch for one scored chunk."""
+    n = data["n"]
+    names = np.array(data["component_names"], dtype=object)
+
+    # risk_drivers as a list<string> column straight from the driver arrays.
+    counts = data["driver_count"]
+    ranked = np.arange(len(names)) < counts[:, None]
+    offsets = np.zeros(n + 1, dtype=np.int32)
+    np.cumsum(counts, out=offsets[1:])
+    drivers = pa.ListArray.from_arrays(
+        pa.array(offsets), pa.array(names[data["driver_order"][ranked]], pa.string())
+    )
+
+    arrays = [batch.column(name) for name in passthrough]
+    fields = [batch.schema.field(name) for name in passthrough]
+    outputs = {
+        "risk_score": pa.array(data["risk_score"], pa.int64()),
+        "stop_work_probability_30d": pa.array(data["stop_work_probability_30d"]),
+        "insurance_escalation_probability": pa.array(
+            data["insurance_escalation_probability"]
+        ),
+        "fine_exposure_estimate": pa.array(data["fine_exposure_estimate"]),
+        "risk_drivers": drivers,
+    }
+    if include_components:
+        for j, name in enumerate(data["component_names"]):
+            outputs[name] = pa.array(data["components"][:, j])
+    outputs["model_version"] = pa.repeat(pa.scalar(model_version, pa.string()), n)
+    outputs["scored_at"] = pa.repeat(
+        pa.scalar(scored_at, pa.timestamp("us", tz="UTC")), n
+    )
+    for name, array in outputs.items():
+        arrays.append(array)
+        fields.append(pa.field(name, array.type))
+    return pa.RecordBatch.from_arrays(arrays, schema=pa.schema(fields))
@@ -0,0 +1,236 @@
+"""Compact, array-backed container for batch risk scoring results."""
+
+from __future__ import annotations
+
+from collections.abc import Iterator
+from datetime import datetime
+from typing import Any
+
+import numpy as np
+
+from core.compliance_models import RiskAssessment
+
+
+def _native(value: Any) -> Any:
+    """Convert NumPy scalars to their Python equivalents."""
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def _row_features(columns: dict[str, Any], i: int) -> dict[str, Any]:
+    """Materialize the ``features_snapshot`` dict for base row *i*.
+
+    Columns are either per-row lists/arrays or a single scalar default that
+    applies to every row.
+    """
+    return {
+        name: _native(column[i]) if isinstance(column, (list, np.ndarray)) else column
+        for name, column in columns.items()
+    }
+
+
+class RiskAssessmentBatch:
+    """Scores for many projects stored in contiguous arrays.
+
+    Scores, probabilities, fine exposure and component contributions live in
+    NumPy arrays shared by every view of the batch.  A full
+    :class:`RiskAssessment` is only built when a row is indexed with an
+    integer or the batch is iterated.  Slicing, boolean/fancy indexing,
+    :meth:`filter` and :meth:`top_k` return new views that hold just an
+    index array into the shared data.
+    """
+
+    def __init__(
+        self,
+        data: dict[str, Any],
+        *,
+        model_version: str,
+        scored_at: datetime,
+        index: np.ndarray | None = None,
+    ) -> None:
+        self._data = data
+        self.model_version = model_version
+        self.scored_at = scored_at
+        self._index = np.arange(data["n"], dtype=np.int64) if index is None else index
+
+    # ------------------------------------------------------------------
+    # Column access (views in batch order)
+    # ------------------------------------------------------------------
+
+    @property
+    def component_names(self) -> tuple[str, ...]:
+        return self._data["component_names"]
+
+    @property
+    def risk_score(self) -> np.ndarray:
+        return self._data["risk_score"][self._index]
+
+    @property
+    def stop_work_probability_30d(self) -> np.ndarray:
+        return self._data["stop_work_probability_30d"][self._index]
+
+    @property
+    def insurance_escalation_probability(self) -> np.ndarray:
+        return self._data["insurance_escalation_probability"][self._index]
+
+    @property
+    def fine_exposure_estimate(self) -> np.ndarray:
+        return self._data["fine_exposure_estimate"][self._index]
+
+    @property
+    def component_scores(self) -> np.ndarray:
+        """``(len(self), n_components)`` matrix of component contributions."""
+        return self._data["components"][self._index]
+
+    @property
+    def row_ids(self) -> np.ndarray:
+        """Positions of this view's rows in the originally scored input."""
+        return self._index.copy()
+
+    # ------------------------------------------------------------------
+    # Sequence protocol
+    # ------------------------------------------------------------------
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __iter__(self) -> Iterator[RiskAssessment]:
+        for row in self._index:
+            yield self._materialize(int(row))
+
+    def __getitem__(self, key: Any) -> Any:
+        if isinstance(key, (int, np.integer)):
+            return self._materialize(int(self._index[key]))
+        if isinstance(key, slice):
+            return self._view(self._index[key])
+        key = np.asarray(key)
+        if key.dtype == bool and key.shape != self._index.shape:
+            raise IndexError("Boolean mask length does not match batch length")
+        return self._view(self._index[key])
+
+    def __repr__(self) -> str:
+        return (
+            f"RiskAssessmentBatch(n={len(self)}, model_version={self.model_version!r})"
+        )
+
+    # ------------------------------------------------------------------
+    # Selection
+    # ------------------------------------------------------------------
+
+    def filter(
+        self,
+        mask: np.ndarray | None = None,
+        *,
+        min_score: int | None = None,
+        max_score: int | None = None,
+    ) -> RiskAssessmentBatch:
+        """Return the rows matching *mask* and/or an inclusive score range."""
+        keep = (
+            np.ones(len(self), dtype=bool) if mask is None else np.asarray(mask, bool)
+        )
+        if keep.shape != self._index.shape:
+            raise IndexError("Boolean mask length does not match batch length")
+        scores = self.risk_score
+        if min_score is not None:
+            keep &= scores >= min_score
+        if max_score is not None:
+            keep &= scores <= max_score
+        return self._view(self._index[keep])
+
+    def top_k(self, k: int, by: str = "risk_score") -> RiskAssessmentBatch:
+        """Return the *k* highest rows by *by*, descending, ties in input order."""
+        if by not in (
+            "risk_score",
+            "stop_work_probability_30d",
+            "insurance_escalation_probability",
+            "fine_exposure_estimate",
+        ):
+            raise ValueError(f"Cannot rank by '{by}'")
+        k = max(0, min(k, len(self)))
+        if k == 0:
+            return self._view(self._index[:0])
+        values = self._data[by][self._index]
+        # Partition to the k-th largest value, keeping every row tied with it
+        # so the stable sort below decides which ties survive.
+        threshold = np.partition(values, len(values) - k)[len(values) - k]
+        candidates = np.flatnonzero(values >= threshold)
+        order = candidates[np.argsort(-values[candidates], kind="stable")][:k]
+        return self._view(self._index[order])
+
+    def iter_records(self) -> Iterator[dict[str, Any]]:
+        """Yield plain-dict results (no ``features_snapshot``) for serialization.
+
+        Cheaper than iterating assessments when the caller only needs the
+        scored outputs, e.g. to stream them as JSON.
+        """
+        data = self._data
+        names = data["component_names"]
+        scored_at = self.scored_at.isoformat()
+        rows = zip(
+            self._index.tolist(),
+            data["risk_score"][self._index].tolist(),
+            data["stop_work_probability_30d"][self._index].tolist(),
+            data["insurance_escalation_probability"][self._index].tolist(),
+            data["fine_exposure_estimate"][self._index].tolist(),
+            strict=True,
+        )
+        for row, score, stop_work, insurance, fine in rows:
+            drivers = data["driver_order"][row, : data["driver_count"][row]]
+            yield {
+                "risk_score": score,
+                "stop_work_probability_30d": stop_work,
+                "insurance_escalation_probability": insurance,
+                "fine_exposure_estimate": fine,
+                "risk_drivers": [names[j] for j in drivers],
+                "model_version": self.model_version,
+                "scored_at": scored_at,
+            }
+
+    def to_frame(self) -> Any:
+        """Return the scalar outputs and components as a ``pandas.DataFrame``."""
+        import pandas as pd
+
+        frame = pd.DataFrame(
+            {
+                "row_id": self._index,
+                "risk_score": self.risk_score,
+                "stop_work_probability_30d": self.stop_work_probability_30d,
+                "insurance_escalation_probability": (
+                    self.insurance_escalation_probability
+                ),
+                "fine_exposure_estimate": self.fine_exposure_estimate,
+            }
+        )
+        for j, name in enumerate(self.component_names):
+            frame[name] = self._data["components"][self._index, j]
+        return frame
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _view(self, index: np.ndarray) -> RiskAssessmentBatch:
+        return RiskAssessmentBatch(
+            self._data,
+            model_version=self.model_version,
+            scored_at=self.scored_at,
+            index=index,
+        )
+
+    def _materialize(self, row: int) -> RiskAssessment:
+        data = self._data
+        names = data["component_names"]
+        drivers = data["driver_order"][row, : data["driver_count"][row]]
+        assessment = RiskAssessment(
+            risk_score=int(data["risk_score"][row]),
+            stop_work_probability_30d=float(data["stop_work_probability_30d"][row]),
+            insurance_escalation_probability=float(
+                data["insurance_escalation_probability"][row]
+            ),
+            fine_exposure_estimate=float(data["fine_exposure_estimate"][row]),
+            risk_drivers=[names[j] for j in drivers],
+            model_version=self.model_version,
+            scored_at=self.scored_at,
+            features_snapshot=_row_features(data["features"], row),
+        )
+        assessment._components = tuple(data["components"][row].tolist())
+        return assessment
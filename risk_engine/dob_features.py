@@ -0,0 +1,39 @@
+"""Risk features derived from raw DOB violation records."""
+
+from __future__ import annotations
+
+from collections.abc import Iterable, Mapping
+from typing import Any
+
+# DOB / ECB severity labels -> risk-engine violation classes
+_SEVERITY_CLASSES = {
+    "CLASS A": "Class A",
+    "CLASS B": "Class B",
+    "CLASS C": "Class C",
+    "CLASS - 1": "Class C",
+    "CLASS - 2": "Class B",
+    "CLASS - 3": "Class A",
+    "IMMEDIATELY HAZARDOUS": "Class C",
+    "HAZARDOUS": "Class B",
+    "NON-HAZARDOUS": "Class A",
+}
+
+
+def violation_classes(records: Iterable[Mapping[str, Any]]) -> list[str]:
+    """Risk-engine classes of the open violations among DOB *records*.
+
+    Records without a recognised ``severity`` and resolved violations are
+    skipped.
+    """
+    classes = []
+    for record in records:
+        if not isinstance(record, Mapping):
+            continue
+        status = str(record.get("ecb_violation_status") or "").upper()
+        category = str(record.get("violation_category") or "").upper()
+        if status.startswith("RESOLVE") or "RESOLVED" in category:
+            continue
+        severity = str(record.get("severity") or "").strip().upper()
+        if severity in _SEVERITY_CLASSES:
+            classes.append(_SEVERITY_CLASSES[severity])
+    return classes
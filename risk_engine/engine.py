@@ -3,11 +3,19 @@
 from __future__ import annotations
 
 import math
-from datetime import datetime, timezone
+import threading
+from collections import OrderedDict
+from collections.abc import Hashable, Mapping
+from datetime import UTC, datetime, timezone
 from typing import Any
 
+import numpy as np
+
 from core.compliance_models import RiskAssessment
 
+from .batch import RiskAssessmentBatch
+from .dob_features import violation_classes as dob_violation_classes
+
 # Violation class severity points (higher = more severe)
 _VIOLATION_CLASS_SCORES: dict[str, int] = {
     "Class C": 30,
@@ -32,12 +40,228 @@ _BUILDING_TYPE_RISK: dict[str, float] = {
 # NYC supertall threshold; height factor saturates at this story count.
 _MAX_HEIGHT_STORIES = 40
 
+# Component order used by every columnar code path (matches score_project).
+_COMPONENT_NAMES: tuple[str, ...] = (
+    "violation_severity_score",
+    "permit_age_score",
+    "inspection_failure_score",
+    "schedule_delay_score",
+    "complaint_velocity_score",
+    "enforcement_history_score",
+    "building_risk_score",
+    "contractor_risk_score",
+)
+
+# Feature inputs read by each component; drives incremental re-scoring.
+_COMPONENT_INPUTS: dict[str, tuple[str, ...]] = {
+    "violation_severity_score": ("violation_classes",),
+    "permit_age_score": ("permit_age_days",),
+    "inspection_failure_score": ("inspection_failures", "inspection_total"),
+    "schedule_delay_score": ("milestone_delay_days",),
+    "complaint_velocity_score": ("complaint_count_90d",),
+    "enforcement_history_score": ("prior_stop_work_orders",),
+    "building_risk_score": ("building_type", "stories"),
+    "contractor_risk_score": ("contractor_violation_rate",),
+}
+
+# score_project keyword defaults, shared by the batch path for missing columns.
+_FEATURE_DEFAULTS: dict[str, Any] = {
+    "violation_classes": None,
+    "permit_age_days": 0,
+    "inspection_failures": 0,
+    "inspection_total": 0,
+    "milestone_delay_days": 0,
+    "complaint_count_90d": 0,
+    "prior_stop_work_orders": 0,
+    "building_type": "commercial",
+    "stories": 1,
+    "contractor_violation_rate": 0.0,
+}
+
+# Violation classes in count-matrix column order.
+_VIOLATION_CLASSES: tuple[str, ...] = tuple(_FINE_SCHEDULE)
+
 
 def _sigmoid(x: float, midpoint: float, steepness: float = 0.15) -> float:
     """Standard sigmoid mapped to [0, 1]."""
     return 1.0 / (1.0 + math.exp(-steepness * (x - midpoint)))
 
 
+# risk_score is an integer in [0, 100], so the rounded probabilities are
+# tabulated once with the scalar sigmoid and looked up by the batch path.
+_STOP_WORK_TABLE = np.array(
+    [round(_sigmoid(s, midpoint=65, steepness=0.15), 4) for s in range(101)]
+)
+_INSURANCE_TABLE = np.array(
+    [round(_sigmoid(s, midpoint=55, steepness=0.15), 4) for s in range(101)]
+)
+
+
+def _as_class_list(classes: Any) -> list[str]:
+    """Normalize one row of violation classes to a list of ``str``.
+
+    Lists are used as-is (score_project also keeps the caller's list).
+    """
+    if isinstance(classes, list):
+        return classes
+    if classes is None:
+        return []
+    if isinstance(classes, np.ndarray):
+        return classes.tolist()
+    return list(classes)
+
+
+def extract_risk_features(payload: Mapping[str, Any]) -> dict[str, Any]:
+    """Pick :meth:`DeterministicRiskEngine.score_project` inputs out of a payload.
+
+    Archived DOB syncs (``{"bbl": ..., "violations": [...]}``) yield
+    ``violation_classes`` from their open violations; other features are
+    read from top-level keys.  Missing, null or malformed features take
+    their ``score_project`` defaults.  :meth:`DeterministicRiskEngine.score`
+    and :class:`~risk_engine.backtest.BacktestEngine` both use it, so a
+    replayed snapshot scores the same either way.
+    """
+    features: dict[str, Any] = {}
+    for name, default in _FEATURE_DEFAULTS.items():
+        value = payload.get(name)
+        if name == "violation_classes":
+            records = payload.get("violations")
+            if isinstance(records, list):
+                value = dob_violation_classes(records)
+            elif isinstance(value, (list, tuple)):
+                value = list(value)
+            else:
+                value = default
+        elif isinstance(default, str):
+            value = value if isinstance(value, str) and value else default
+        else:
+            value = _as_number(value, default)
+        features[name] = value
+    return features
+
+
+def _as_number(value: Any, default: int | float) -> int | float:
+    """*value* as a finite number, or *default* if it is not one.
+
+    Numbers pass through unchanged; numeric strings are parsed, as ``int``
+    for integer features when they hold a whole number.
+    """
+    if isinstance(value, bool) or value is None:
+        return default
+    if isinstance(value, (int, float)):
+        return value if math.isfinite(value) else default
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return default
+    if not math.isfinite(number):
+        return default
+    if isinstance(default, int) and number.is_integer():
+        return int(number)
+    return number
+
+
+def _encode_violation_classes(
+    column: Any, n: int
+) -> tuple[list[list[str]], np.ndarray]:
+    """Return ``(lists, counts)`` for a column of violation class lists.
+
+    *counts* is an ``(n, 3)`` array of Class A/B/C occurrences per row;
+    unknown classes carry neither severity nor fines and are not counted.
+    """
+    lists = [_as_class_list(classes) for classes in column]
+    width = len(_VIOLATION_CLASSES) + 1  # last slot collects unknown classes
+    code_of = {vc: j for j, vc in enumerate(_VIOLATION_CLASSES)}
+    unknown = width - 1
+    codes = np.fromiter(
+        (code_of.get(vc, unknown) for classes in lists for vc in classes),
+        dtype=np.int64,
+    )
+    rows = np.repeat(np.arange(n), [len(classes) for classes in lists])
+    counts = np.bincount(rows * width + codes, minlength=n * width)
+    return lists, counts.reshape(n, width)[:, :unknown]
+
+
+def _coerce_columns(features: Any) -> tuple[int, dict[str, Any]]:
+    """Normalize a DataFrame or column mapping to ``(n_rows, {name: array})``."""
+    if not isinstance(features, Mapping) and not hasattr(features, "columns"):
+        raise TypeError("features must be a DataFrame or a mapping of columns")
+    unknown = [name for name in features if name not in _FEATURE_DEFAULTS]
+    if unknown:
+        raise ValueError(f"Unknown feature columns: {sorted(map(str, unknown))}")
+
+    columns: dict[str, Any] = {}
+    lengths: set[int] = set()
+    for name in features:
+        column = features[name]
+        if name == "violation_classes":
+            columns[name] = list(column)
+        else:
+            columns[name] = np.asarray(column)
+        lengths.add(len(columns[name]))
+
+    if hasattr(features, "columns"):
+        lengths.add(len(features))
+    if not lengths:
+        raise ValueError("features must contain at least one column")
+    if len(lengths) > 1:
+        raise ValueError(f"Feature columns have mismatched lengths: {sorted(lengths)}")
+    return lengths.pop(), columns
+
+
+def _snapshot_key(features_snapshot: dict[str, Any]) -> Hashable | None:
+    """Hashable identity of a features snapshot, or None if it has none."""
+    snap = {**_FEATURE_DEFAULTS, **features_snapshot}
+    key = tuple(
+        tuple(snap[name] or ()) if name == "violation_classes" else snap[name]
+        for name in _FEATURE_DEFAULTS
+    )
+    try:
+        hash(key)
+    except TypeError:
+        return None
+    return key
+
+
+class _ComponentCache:
+    """Thread-safe LRU of component vectors keyed by (model_version, snapshot)."""
+
+    def __init__(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[Hashable, tuple[float, ...]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> tuple[float, ...] | None:
+        with self._lock:
+            values = self._entries.get(key)
+            if values is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return values
+
+    def put(self, key: Hashable, values: tuple[float, ...]) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = values
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def info(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+            }
+
+
 class DeterministicRiskEngine:
     """Fully deterministic, reproducible risk scorer.
 
@@ -45,8 +269,16 @@ class DeterministicRiskEngine:
     that any two runs with identical inputs produce identical outputs.
     """
 
-    def __init__(self, model_version: str = "1.0.0") -> None:
+    def __init__(
+        self,
+        model_version: str = "1.0.0",
+        explain_cache_size: int = 4096,
+    ) -> None:
         self.model_version = model_version
+        # Scoring stores each assessment's component vector on the assessment
+        # itself; this LRU serves the components explain() had to re-derive
+        # for assessments without one (e.g. deserialized); 0 disables it.
+        self._component_cache = _ComponentCache(explain_cache_size)
 
     # ------------------------------------------------------------------
     # Component scorers (pure functions of their inputs)
@@ -127,40 +359,46 @@ class DeterministicRiskEngine:
         return total
 
     # ------------------------------------------------------------------
-    # Public API
+    # Assembly
     # ------------------------------------------------------------------
 
-    def score_project(
-        self,
-        *,
-        violation_classes: list[str] | None = None,
-        permit_age_days: int = 0,
-        inspection_failures: int = 0,
-        inspection_total: int = 0,
-        milestone_delay_days: int = 0,
-        complaint_count_90d: int = 0,
-        prior_stop_work_orders: int = 0,
-        building_type: str = "commercial",
-        stories: int = 1,
-        contractor_violation_rate: float = 0.0,
-    ) -> RiskAssessment:
-        """Score a project and return a fully populated ``RiskAssessment``."""
-        violation_classes = violation_classes or []
-
-        # Component scores
-        components: dict[str, float] = {
-            "violation_severity_score": self._violation_severity_score(violation_classes),
-            "permit_age_score": self._permit_age_score(permit_age_days),
-            "inspection_failure_score": self._inspection_failure_score(
-                inspection_failures, inspection_total
-            ),
-            "schedule_delay_score": self._schedule_delay_score(milestone_delay_days),
-            "complaint_velocity_score": self._complaint_velocity_score(complaint_count_90d),
-            "enforcement_history_score": self._enforcement_history_score(prior_stop_work_orders),
-            "building_risk_score": self._building_risk_score(building_type, stories),
-            "contractor_risk_score": self._contractor_risk_score(contractor_violation_rate),
+    def _component_score(self, name: str, features: dict[str, Any]) -> float:
+        """Evaluate one component from a complete feature dict."""
+        if name == "violation_severity_score":
+            return self._violation_severity_score(features["violation_classes"])
+        if name == "permit_age_score":
+            return self._permit_age_score(features["permit_age_days"])
+        if name == "inspection_failure_score":
+            return self._inspection_failure_score(
+                features["inspection_failures"], features["inspection_total"]
+            )
+        if name == "schedule_delay_score":
+            return self._schedule_delay_score(features["milestone_delay_days"])
+        if name == "complaint_velocity_score":
+            return self._complaint_velocity_score(features["complaint_count_90d"])
+        if name == "enforcement_history_score":
+            return self._enforcement_history_score(features["prior_stop_work_orders"])
+        if name == "building_risk_score":
+            return self._building_risk_score(
+                features["building_type"], features["stories"]
+            )
+        if name == "contractor_risk_score":
+            return self._contractor_risk_score(features["contractor_violation_rate"])
+        raise KeyError(f"Unknown risk component '{name}'")
+
+    def _component_scores(self, features: dict[str, Any]) -> dict[str, float]:
+        """Evaluate every component, in canonical order."""
+        return {
+            name: self._component_score(name, features) for name in _COMPONENT_NAMES
         }
 
+    def _assessment_from_components(
+        self,
+        components: dict[str, float],
+        features_snapshot: dict[str, Any],
+        fine_exposure: float | None = None,
+    ) -> RiskAssessment:
+        """Combine component scores into a ``RiskAssessment``."""
         raw_total = sum(components.values())
         risk_score = int(min(max(round(raw_total), 0), 100))
 
@@ -168,7 +406,11 @@ class DeterministicRiskEngine:
         stop_work_prob = round(_sigmoid(risk_score, midpoint=65, steepness=0.15), 4)
         insurance_prob = round(_sigmoid(risk_score, midpoint=55, steepness=0.15), 4)
 
-        fine_exposure = self._fine_exposure(violation_classes, building_type)
+        if fine_exposure is None:
+            fine_exposure = self._fine_exposure(
+                features_snapshot["violation_classes"],
+                features_snapshot["building_type"],
+            )
 
         # Risk drivers – sorted by contribution, descending
         risk_drivers = [
@@ -179,8 +421,40 @@ class DeterministicRiskEngine:
             if components[name] > 0
         ]
 
+        assessment = RiskAssessment(
+            risk_score=risk_score,
+            stop_work_probability_30d=stop_work_prob,
+            insurance_escalation_probability=insurance_prob,
+            fine_exposure_estimate=fine_exposure,
+            risk_drivers=risk_drivers,
+            model_version=self.model_version,
+            scored_at=datetime.now(tz=timezone.utc),
+            features_snapshot=features_snapshot,
+        )
+        assessment._components = tuple(components[name] for name in _COMPONENT_NAMES)
+        return assessment
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def score_project(
+        self,
+        *,
+        violation_classes: list[str] | None = None,
+        permit_age_days: int = 0,
+        inspection_failures: int = 0,
+        inspection_total: int = 0,
+        milestone_delay_days: int = 0,
+        complaint_count_90d: int = 0,
+        prior_stop_work_orders: int = 0,
+        building_type: str = "commercial",
+        stories: int = 1,
+        contractor_violation_rate: float = 0.0,
+    ) -> RiskAssessment:
+        """Score a project and return a fully populated ``RiskAssessment``."""
         features_snapshot: dict[str, Any] = {
-            "violation_classes": violation_classes,
+            "violation_classes": violation_classes or [],
             "permit_age_days": permit_age_days,
             "inspection_failures": inspection_failures,
             "inspection_total": inspection_total,
@@ -191,48 +465,267 @@ class DeterministicRiskEngine:
             "stories": stories,
             "contractor_violation_rate": contractor_violation_rate,
         }
+        return self._assessment_from_components(
+            self._component_scores(features_snapshot), features_snapshot
+        )
 
-        return RiskAssessment(
-            risk_score=risk_score,
-            stop_work_probability_30d=stop_work_prob,
-            insurance_escalation_probability=insurance_prob,
-            fine_exposure_estimate=fine_exposure,
-            risk_drivers=risk_drivers,
+    def score(self, features: Mapping[str, Any]) -> RiskAssessment:
+        """Score one project from a feature mapping such as a snapshot payload.
+
+        Features are read with :func:`extract_risk_features`: other keys are
+        ignored and missing or malformed features take their defaults, so
+        archived payloads, DOB syncs included, can be replayed directly.
+        """
+        return self.score_project(**extract_risk_features(features))
+
+    def score_many(self, features: Any) -> RiskAssessmentBatch:
+        """Score many projects at once from columnar inputs.
+
+        *features* is a ``pandas.DataFrame`` or a mapping of feature name to
+        an equal-length column (list or NumPy array), using the same names and
+        defaults as :meth:`score_project`.  ``violation_classes`` is a column
+        of lists.  Every component, sigmoid, fine and driver ranking is
+        computed as an array operation; indexing or iterating the returned
+        :class:`RiskAssessmentBatch` yields ``RiskAssessment`` objects that
+        match ``score_project`` row for row.
+        """
+        return RiskAssessmentBatch(
+            self._score_columns(features),
             model_version=self.model_version,
-            scored_at=datetime.now(tz=timezone.utc),
-            features_snapshot=features_snapshot,
+            scored_at=datetime.now(tz=UTC),
         )
 
-    def explain(self, assessment: RiskAssessment) -> dict:
-        """Re-derive all component scores from a ``RiskAssessment``'s snapshot."""
-        snap = assessment.features_snapshot
-        violation_classes = snap.get("violation_classes", [])
-
-        components: dict[str, float] = {
-            "violation_severity_score": self._violation_severity_score(violation_classes),
-            "permit_age_score": self._permit_age_score(snap.get("permit_age_days", 0)),
-            "inspection_failure_score": self._inspection_failure_score(
-                snap.get("inspection_failures", 0),
-                snap.get("inspection_total", 0),
-            ),
-            "schedule_delay_score": self._schedule_delay_score(
-                snap.get("milestone_delay_days", 0)
-            ),
-            "complaint_velocity_score": self._complaint_velocity_score(
-                snap.get("complaint_count_90d", 0)
-            ),
-            "enforcement_history_score": self._enforcement_history_score(
-                snap.get("prior_stop_work_orders", 0)
-            ),
-            "building_risk_score": self._building_risk_score(
-                snap.get("building_type", "commercial"),
-                snap.get("stories", 1),
-            ),
-            "contractor_risk_score": self._contractor_risk_score(
-                snap.get("contractor_violation_rate", 0.0)
-            ),
+    def _score_columns(self, features: Any) -> dict[str, Any]:
+        """Vectorized scoring core shared by the batch entry points."""
+        n, raw = _coerce_columns(features)
+
+        def numeric(name: str) -> np.ndarray:
+            column = raw.get(name)
+            if column is None:
+                return np.full(n, float(_FEATURE_DEFAULTS[name]))
+            return column.astype(np.float64)
+
+        violation_lists, counts = _encode_violation_classes(
+            raw["violation_classes"] if "violation_classes" in raw else [None] * n,
+            n,
+        )
+
+        permit_age = numeric("permit_age_days")
+        failures = numeric("inspection_failures")
+        total = numeric("inspection_total")
+        delay = numeric("milestone_delay_days")
+        complaints = numeric("complaint_count_90d")
+        swo = numeric("prior_stop_work_orders")
+        contractor = numeric("contractor_violation_rate")
+
+        components = np.empty((n, len(_COMPONENT_NAMES)), dtype=np.float64)
+
+        # Severity: highest class present (counts columns are A, B, C).
+        severity = np.zeros(n)
+        for j, vc in enumerate(_VIOLATION_CLASSES):
+            points = float(_VIOLATION_CLASS_SCORES[vc])
+            severity = np.where(
+                counts[:, j] > 0, np.maximum(severity, points), severity
+            )
+        components[:, 0] = severity
+
+        components[:, 1] = np.where(
+            permit_age <= 180,
+            0.0,
+            np.where(permit_age >= 720, 15.0, 15.0 * (permit_age - 180) / (720 - 180)),
+        )
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rate = np.minimum(failures / np.where(total > 0, total, 1.0), 1.0)
+        components[:, 2] = np.where(total <= 0, 0.0, rate * 15.0)
+
+        components[:, 3] = np.where(
+            delay <= 0, 0.0, np.where(delay >= 90, 10.0, 10.0 * delay / 90.0)
+        )
+        components[:, 4] = np.minimum(complaints * 2, 10.0)
+        components[:, 5] = np.minimum(swo * 5, 10.0)
+
+        building, commercial = self._building_columns(raw, n)
+        components[:, 6] = building
+        components[:, 7] = np.minimum(np.maximum(contractor, 0.0), 1.0) * 5.0
+
+        # Accumulate left to right so float sums match the scalar path.
+        raw_total = components[:, 0].copy()
+        for j in range(1, components.shape[1]):
+            raw_total += components[:, j]
+        risk_score = np.clip(np.round(raw_total), 0, 100).astype(np.int64)
+
+        fines = np.zeros(n)
+        for j, vc in enumerate(_VIOLATION_CLASSES):
+            fines += counts[:, j] * _FINE_SCHEDULE[vc]
+        fines = np.where(commercial, fines * 1.5, fines)
+
+        # Stable descending sort keeps ties in component order, like sorted().
+        driver_order = np.argsort(-components, axis=1, kind="stable").astype(np.int8)
+        driver_count = (components > 0).sum(axis=1)
+
+        snapshot_columns: dict[str, Any] = {
+            name: raw.get(name, default) for name, default in _FEATURE_DEFAULTS.items()
+        }
+        snapshot_columns["violation_classes"] = violation_lists
+
+        return {
+            "n": n,
+            "component_names": _COMPONENT_NAMES,
+            "components": components,
+            "risk_score": risk_score,
+            "stop_work_probability_30d": _STOP_WORK_TABLE[risk_score],
+            "insurance_escalation_probability": _INSURANCE_TABLE[risk_score],
+            "fine_exposure_estimate": fines,
+            "driver_order": driver_order,
+            "driver_count": driver_count,
+            "features": snapshot_columns,
         }
 
+    def shadow_score(
+        self,
+        features: Any,
+        candidates: Mapping[str, Mapping[str, float]],
+    ) -> dict:
+        """Score production and candidate weight sets in one pass.
+
+        *features* takes the same columnar input as :meth:`score_many`.
+        *candidates* maps a candidate ``model_version`` to per-component
+        weights; omitted components keep the production weight of 1.0.
+        Components are computed once and multiplied by an
+        ``(n_components, n_models)`` weight matrix, so the cost is close to a
+        single scoring run however many candidates are compared.
+
+        Returns per-model ``risk_score`` arrays and, for every candidate, the
+        distribution of its score differences against production.
+        """
+        if not candidates:
+            raise ValueError("At least one candidate weight set is required")
+        if self.model_version in candidates:
+            raise ValueError(
+                f"Candidate name '{self.model_version}' collides with production"
+            )
+
+        models = [self.model_version, *candidates]
+        weights = np.ones((len(_COMPONENT_NAMES), len(models)))
+        for m, name in enumerate(models[1:], start=1):
+            for component, weight in candidates[name].items():
+                if component not in _COMPONENT_NAMES:
+                    raise ValueError(
+                        f"Unknown risk component '{component}' in candidate '{name}'"
+                    )
+                if not math.isfinite(weight):
+                    raise ValueError(
+                        f"Weight for '{component}' in candidate '{name}' must be finite"
+                    )
+                weights[_COMPONENT_NAMES.index(component), m] = weight
+
+        components = self._score_columns(features)["components"]
+        # components @ weights, accumulated left to right so the production
+        # column (all weights 1.0) reproduces score_many bit for bit.
+        totals = components[:, :1] * weights[0]
+        for j in range(1, components.shape[1]):
+            totals += components[:, j : j + 1] * weights[j]
+        scores = np.clip(np.round(totals), 0, 100).astype(np.int64)
+
+        production = scores[:, 0]
+        return {
+            "model_version": self.model_version,
+            "n": int(components.shape[0]),
+            "models": models,
+            "weights": {
+                name: dict(zip(_COMPONENT_NAMES, weights[:, m].tolist(), strict=True))
+                for m, name in enumerate(models)
+            },
+            "scores": {name: scores[:, m] for m, name in enumerate(models)},
+            "differences": {
+                name: self._score_difference_summary(scores[:, m] - production)
+                for m, name in enumerate(models)
+                if m > 0
+            },
+        }
+
+    @staticmethod
+    def _score_difference_summary(delta: np.ndarray) -> dict:
+        """Distribution of candidate-minus-production integer score deltas."""
+        if delta.size == 0:
+            return {
+                "mean": 0.0,
+                "mean_abs": 0.0,
+                "std": 0.0,
+                "min": 0,
+                "max": 0,
+                "changed": 0,
+                "changed_fraction": 0.0,
+                "percentiles": {},
+                "histogram": {},
+            }
+        # Deltas lie in [-100, 100]; count them with one bincount.
+        counts = np.bincount(delta + 100, minlength=201)
+        changed = int(delta.size - counts[100])
+        return {
+            "mean": round(float(delta.mean()), 4),
+            "mean_abs": round(float(np.abs(delta).mean()), 4),
+            "std": round(float(delta.std()), 4),
+            "min": int(delta.min()),
+            "max": int(delta.max()),
+            "changed": changed,
+            "changed_fraction": round(changed / delta.size, 4),
+            "percentiles": {
+                f"p{q}": float(np.percentile(delta, q)) for q in (5, 25, 50, 75, 95)
+            },
+            "histogram": {int(d) - 100: int(counts[d]) for d in np.flatnonzero(counts)},
+        }
+
+    def _building_columns(
+        self, raw: dict[str, np.ndarray], n: int
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Return building risk scores and commercial flags per row.
+
+        Scores are evaluated once per distinct ``(building_type, stories)``
+        pair with the scalar scorer, so rounding matches exactly.
+        """
+        types = raw.get("building_type")
+        if types is None:
+            types = np.full(n, _FEATURE_DEFAULTS["building_type"], dtype=object)
+        stories = raw.get("stories")
+        if stories is None:
+            stories = np.full(n, _FEATURE_DEFAULTS["stories"])
+
+        type_values, type_idx = np.unique(types.astype(str), return_inverse=True)
+        story_values, story_idx = np.unique(stories, return_inverse=True)
+        pair_idx = type_idx.reshape(-1) * len(story_values) + story_idx.reshape(-1)
+        pairs, inverse = np.unique(pair_idx, return_inverse=True)
+
+        pair_scores = np.array(
+            [
+                self._building_risk_score(
+                    str(type_values[p // len(story_values)]),
+                    story_values[p % len(story_values)].item(),
+                )
+                for p in pairs
+            ]
+        )
+        commercial_types = np.array(
+            [str(t).lower() == "commercial" for t in type_values], dtype=bool
+        )
+        return (
+            pair_scores[inverse.reshape(-1)],
+            commercial_types[type_idx.reshape(-1)],
+        )
+
+    def explain(self, assessment: RiskAssessment) -> dict:
+        """Return the component breakdown behind a ``RiskAssessment``.
+
+        Assessments scored by this ``model_version`` carry the component
+        vector captured at scoring time, which is used as is.  Otherwise
+        (e.g. an assessment deserialized from JSON) the components are
+        served from an LRU cache of earlier explains, and re-derived from
+        ``features_snapshot`` on a miss or when the assessment came from a
+        different ``model_version``.
+        """
+        components = self._explain_components(assessment)
+
         return {
             "model_version": assessment.model_version,
             "risk_score": assessment.risk_score,
@@ -241,3 +734,25 @@ class DeterministicRiskEngine:
             "fine_exposure_estimate": assessment.fine_exposure_estimate,
             "risk_drivers": assessment.risk_drivers,
         }
+
+    def explain_cache_info(self) -> dict[str, int]:
+        """Return hit/miss counters and occupancy of the explain cache."""
+        return self._component_cache.info()
+
+    def _explain_components(self, assessment: RiskAssessment) -> dict[str, float]:
+        captured = assessment._components
+        if captured is not None and assessment.model_version == self.model_version:
+            return dict(zip(_COMPONENT_NAMES, captured, strict=True))
+        snap = {**_FEATURE_DEFAULTS, **assessment.features_snapshot}
+        snap["violation_classes"] = snap["violation_classes"] or []
+        snapshot_key = _snapshot_key(snap)
+        if assessment.model_version != self.model_version or snapshot_key is None:
+            return self._component_scores(snap)
+
+        key = (self.model_version, snapshot_key)
+        cached = self._component_cache.get(key)
+        if cached is not None:
+            return dict(zip(_COMPONENT_NAMES, cached, strict=True))
+        components = self._component_scores(snap)
+        self._component_cache.put(key, tuple(components.values()))
+        return components
@@ -0,0 +1,153 @@
+"""Stateful incremental re-scoring driven by feature deltas."""
+
+from __future__ import annotations
+
+from typing import Any
+
+from pydantic import BaseModel, ConfigDict, Field
+
+from core.compliance_models import RiskAssessment
+
+from .engine import _COMPONENT_INPUTS, _FEATURE_DEFAULTS, DeterministicRiskEngine
+
+
+class RescoreResult(BaseModel):
+    """Outcome of applying a feature delta to one project."""
+
+    model_config = ConfigDict(frozen=True)
+
+    project_id: str = Field(..., description="Project that was re-scored")
+    assessment: RiskAssessment = Field(..., description="Assessment after the update")
+    previous_score: int | None = Field(
+        None, description="Risk score before the update (None on first score)"
+    )
+    changed_features: list[str] = Field(
+        default_factory=list, description="Features whose values changed"
+    )
+    changed_components: list[str] = Field(
+        default_factory=list,
+        description="Components whose contribution changed (all on first score)",
+    )
+
+    @property
+    def score_delta(self) -> int:
+        """Change in risk score (0 on first score)."""
+        if self.previous_score is None:
+            return 0
+        return self.assessment.risk_score - self.previous_score
+
+
+class _ProjectState:
+    __slots__ = ("features", "components", "fine_exposure", "assessment")
+
+    def __init__(
+        self,
+        features: dict[str, Any],
+        components: dict[str, float],
+        fine_exposure: float,
+        assessment: RiskAssessment,
+    ) -> None:
+        self.features = features
+        self.components = components
+        self.fine_exposure = fine_exposure
+        self.assessment = assessment
+
+
+class IncrementalRiskScorer:
+    """Caches per-project components and recomputes only what a delta touches.
+
+    The first :meth:`update` for a project scores it in full (missing
+    features take ``score_project`` defaults).  Later updates compare each
+    supplied feature against the cached vector and re-evaluate only the
+    components that read a changed feature, so the resulting assessment is
+    identical to a fresh ``score_project`` call on the merged features.
+    """
+
+    def __init__(self, engine: DeterministicRiskEngine | None = None) -> None:
+        self._engine = engine or DeterministicRiskEngine()
+        self._state: dict[str, _ProjectState] = {}
+
+    @property
+    def engine(self) -> DeterministicRiskEngine:
+        return self._engine
+
+    def __len__(self) -> int:
+        return len(self._state)
+
+    def __contains__(self, project_id: object) -> bool:
+        return project_id in self._state
+
+    def get_assessment(self, project_id: str) -> RiskAssessment | None:
+        """Return the latest cached assessment for a project."""
+        state = self._state.get(project_id)
+        return state.assessment if state else None
+
+    def forget(self, project_id: str) -> bool:
+        """Drop cached state for a project; return whether it existed."""
+        return self._state.pop(project_id, None) is not None
+
+    def update(self, project_id: str, **changes: Any) -> RescoreResult:
+        """Apply a feature delta and return the re-scored project."""
+        unknown = sorted(set(changes) - set(_FEATURE_DEFAULTS))
+        if unknown:
+            raise ValueError(f"Unknown feature columns: {unknown}")
+        if "violation_classes" in changes:
+            changes["violation_classes"] = list(changes["violation_classes"] or [])
+
+        engine = self._engine
+        state = self._state.get(project_id)
+        if state is None:
+            features = {**_FEATURE_DEFAULTS, **changes}
+            features["violation_classes"] = features["violation_classes"] or []
+            components = engine._component_scores(features)
+            fine = engine._fine_exposure(
+                features["violation_classes"], features["building_type"]
+            )
+            assessment = engine._assessment_from_components(components, features, fine)
+            self._state[project_id] = _ProjectState(
+                features, components, fine, assessment
+            )
+            return RescoreResult(
+                project_id=project_id,
+                assessment=assessment,
+                changed_features=sorted(changes),
+                changed_components=list(components),
+            )
+
+        changed = {
+            name for name, value in changes.items() if state.features[name] != value
+        }
+        if not changed:
+            return RescoreResult(
+                project_id=project_id,
+                assessment=state.assessment,
+                previous_score=state.assessment.risk_score,
+            )
+
+        features = {**state.features, **{name: changes[name] for name in changed}}
+        components = dict(state.components)
+        changed_components: list[str] = []
+        for name, inputs in _COMPONENT_INPUTS.items():
+            if changed.isdisjoint(inputs):
+                continue
+            value = engine._component_score(name, features)
+            if value != components[name]:
+                changed_components.append(name)
+            components[name] = value
+
+        fine = state.fine_exposure
+        if "violation_classes" in changed or "building_type" in changed:
+            fine = engine._fine_exposure(
+                features["violation_classes"], features["building_type"]
+            )
+
+        previous_score = state.assessment.risk_score
+        assessment = engine._assessment_from_components(components, features, fine)
+        self._state[project_id] = _ProjectState(features, components, fine, assessment)
+        return RescoreResult(
+            project_id=project_id,
+            assessment=assessment,
+            previous_score=previous_score,
+            changed_features=sorted(changed),
+            changed_components=changed_components,
+        )
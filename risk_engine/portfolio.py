@@ -0,0 +1,176 @@
+"""Materialized per-tenant portfolio risk aggregates."""
+
+from __future__ import annotations
+
+import threading
+from typing import Any
+
+from core.compliance_models import RiskAssessment
+
+from .batch import RiskAssessmentBatch
+
+# Fixed histogram: ten buckets of width 10, the last one covering 90-100.
+_HISTOGRAM_BUCKETS = 10
+_MAX_SCORE = 100
+
+# Probabilities are rounded to 4 decimals, so they are summed as integer
+# units of 1e-4 and running totals never drift on add/remove.
+_PROBABILITY_UNITS = 10_000
+
+
+def _bucket(score: int) -> int:
+    return min(score // 10, _HISTOGRAM_BUCKETS - 1)
+
+
+class _TenantAggregate:
+    """Running aggregates for one tenant, updated in O(1) per rescore."""
+
+    __slots__ = (
+        "entries",
+        "score_sum",
+        "stop_work_sum",
+        "fine_sum",
+        "high_risk",
+        "histogram",
+        "by_score",
+    )
+
+    def __init__(self) -> None:
+        # project_id -> (risk_score, stop_work_units, fine_exposure)
+        self.entries: dict[str, tuple[int, int, float]] = {}
+        self.score_sum = 0
+        self.stop_work_sum = 0
+        self.fine_sum = 0.0
+        self.high_risk = 0
+        self.histogram = [0] * _HISTOGRAM_BUCKETS
+        # Projects grouped by exact score (insertion-ordered), so top-K stays
+        # exact when a leading project's score drops.
+        self.by_score: list[dict[str, None]] = [{} for _ in range(_MAX_SCORE + 1)]
+
+    def add(self, project_id: str, entry: tuple[int, int, float], high: int) -> None:
+        score, stop_work, fine = entry
+        self.entries[project_id] = entry
+        self.score_sum += score
+        self.stop_work_sum += stop_work
+        self.fine_sum += fine
+        self.high_risk += score >= high
+        self.histogram[_bucket(score)] += 1
+        self.by_score[score][project_id] = None
+
+    def discard(self, project_id: str, high: int) -> bool:
+        entry = self.entries.pop(project_id, None)
+        if entry is None:
+            return False
+        score, stop_work, fine = entry
+        self.score_sum -= score
+        self.stop_work_sum -= stop_work
+        self.fine_sum -= fine
+        self.high_risk -= score >= high
+        self.histogram[_bucket(score)] -= 1
+        del self.by_score[score][project_id]
+        return True
+
+
+class PortfolioRiskIndex:
+    """Per-tenant portfolio aggregates maintained as projects are scored.
+
+    Each :meth:`record` replaces the project's previous contribution, so
+    running sums, the fixed-bucket histogram, the high-risk counter and the
+    top-K ranking stay current without rescoring the portfolio.  Reading a
+    summary costs O(histogram + top_k) regardless of portfolio size.
+    """
+
+    def __init__(self, high_risk_threshold: int = 50) -> None:
+        self.high_risk_threshold = high_risk_threshold
+        self._tenants: dict[str, _TenantAggregate] = {}
+        self._lock = threading.Lock()
+
+    def record(
+        self, tenant_id: str, project_id: str, assessment: RiskAssessment
+    ) -> None:
+        """Insert or replace a project's latest assessment."""
+        self._record(
+            tenant_id,
+            project_id,
+            assessment.risk_score,
+            assessment.stop_work_probability_30d,
+            assessment.fine_exposure_estimate,
+        )
+
+    def record_batch(
+        self, tenant_id: str, project_ids: list[str], batch: RiskAssessmentBatch
+    ) -> None:
+        """Record every row of a ``RiskAssessmentBatch`` without materializing it."""
+        if len(project_ids) != len(batch):
+            raise ValueError("project_ids and batch must have the same length")
+        rows = zip(
+            project_ids,
+            batch.risk_score.tolist(),
+            batch.stop_work_probability_30d.tolist(),
+            batch.fine_exposure_estimate.tolist(),
+            strict=True,
+        )
+        for project_id, score, stop_work, fine in rows:
+            self._record(tenant_id, project_id, score, stop_work, fine)
+
+    def remove(self, tenant_id: str, project_id: str) -> bool:
+        """Drop a project from its tenant's aggregates."""
+        with self._lock:
+            aggregate = self._tenants.get(tenant_id)
+            if aggregate is None:
+                return False
+            return aggregate.discard(project_id, self.high_risk_threshold)
+
+    def summary(self, tenant_id: str, top_k: int = 10) -> dict:
+        """Return the tenant's portfolio risk summary."""
+        with self._lock:
+            aggregate = self._tenants.get(tenant_id)
+            if aggregate is None or not aggregate.entries:
+                return {
+                    "tenant_id": tenant_id,
+                    "total_projects": 0,
+                    "avg_risk_score": 0.0,
+                    "avg_stop_work_probability_30d": 0.0,
+                    "total_fine_exposure": 0.0,
+                    "high_risk_projects": 0,
+                    "histogram": [0] * _HISTOGRAM_BUCKETS,
+                    "top_projects": [],
+                }
+
+            total = len(aggregate.entries)
+            top: list[dict[str, Any]] = []
+            for score in range(_MAX_SCORE, -1, -1):
+                for project_id in aggregate.by_score[score]:
+                    if len(top) >= top_k:
+                        break
+                    top.append({"project_id": project_id, "risk_score": score})
+                if len(top) >= top_k:
+                    break
+
+            return {
+                "tenant_id": tenant_id,
+                "total_projects": total,
+                "avg_risk_score": round(aggregate.score_sum / total, 4),
+                "avg_stop_work_probability_30d": round(
+                    aggregate.stop_work_sum / _PROBABILITY_UNITS / total, 4
+                ),
+                "total_fine_exposure": round(aggregate.fine_sum, 2),
+                "high_risk_projects": aggregate.high_risk,
+                "histogram": list(aggregate.histogram),
+                "top_projects": top,
+            }
+
+    def _record(
+        self,
+        tenant_id: str,
+        project_id: str,
+        risk_score: int,
+        stop_work: float,
+        fine: float,
+    ) -> None:
+        score = int(min(max(risk_score, 0), _MAX_SCORE))
+        with self._lock:
+            aggregate = self._tenants.setdefault(tenant_id, _TenantAggregate())
+            aggregate.discard(project_id, self.high_risk_threshold)
+            entry = (score, round(stop_work * _PROBABILITY_UNITS), float(fine))
+            aggregate.add(project_id, entry, self.high_risk_threshold)
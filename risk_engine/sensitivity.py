@@ -0,0 +1,249 @@
+"""What-if sensitivity sweeps over the deterministic risk model."""
+
+from __future__ import annotations
+
+from typing import Any
+
+import numpy as np
+
+from .engine import _FEATURE_DEFAULTS, DeterministicRiskEngine
+
+# Features that can be perturbed, mapped to whether they are integer-valued.
+_SWEEPABLE_FEATURES: dict[str, bool] = {
+    "permit_age_days": True,
+    "inspection_failures": True,
+    "inspection_total": True,
+    "milestone_delay_days": True,
+    "complaint_count_90d": True,
+    "prior_stop_work_orders": True,
+    "stories": True,
+    "contractor_violation_rate": False,
+}
+
+
+class SensitivityAnalyzer:
+    """Evaluates the risk model over perturbations of a baseline project.
+
+    A sweep builds every sample point, plus a one-at-a-time profile per
+    feature for the marginal effects, as columns and scores them in a single
+    vectorized pass through the engine's batch core.
+    """
+
+    def __init__(
+        self,
+        engine: DeterministicRiskEngine | None = None,
+        max_points: int = 250_000,
+    ) -> None:
+        self._engine = engine or DeterministicRiskEngine()
+        self._max_points = max_points
+
+    def sweep(
+        self,
+        baseline: dict[str, Any],
+        ranges: dict[str, tuple[float, float]],
+        *,
+        method: str = "grid",
+        steps: int = 5,
+        samples: int = 1_000,
+        threshold: int = 50,
+        direction: str = "below",
+        seed: int = 0,
+    ) -> dict:
+        """Sweep *ranges* around *baseline* and summarize the score surface.
+
+        Parameters
+        ----------
+        baseline:
+            Feature values of the project (``score_project`` keywords);
+            missing features take their defaults.
+        ranges:
+            ``{feature: (low, high)}`` absolute bounds for each perturbed
+            numeric feature.
+        method:
+            ``"grid"`` (``steps`` evenly spaced values per feature, full
+            Cartesian product) or ``"lhs"`` (``samples`` Latin-hypercube
+            points).
+        threshold, direction:
+            Target score and whether to get ``"below"`` or ``"above"`` it.
+
+        Returns
+        -------
+        dict
+            Baseline score, the evaluated surface, the smallest change that
+            crosses the threshold (normalized L1 distance over the ranges),
+            and per-feature marginal effects.
+        """
+        if method not in ("grid", "lhs"):
+            raise ValueError(f"Unknown sweep method '{method}'")
+        if direction not in ("below", "above"):
+            raise ValueError(f"Unknown threshold direction '{direction}'")
+        unknown = sorted(set(baseline) - set(_FEATURE_DEFAULTS))
+        if unknown:
+            raise ValueError(f"Unknown feature columns: {unknown}")
+        if not ranges:
+            raise ValueError("At least one feature range is required")
+        for name, (low, high) in ranges.items():
+            if name not in _SWEEPABLE_FEATURES:
+                raise ValueError(f"Feature '{name}' cannot be swept")
+            if high < low:
+                raise ValueError(f"Range for '{name}' has high < low")
+
+        base = {**_FEATURE_DEFAULTS, **baseline}
+        base["violation_classes"] = list(base["violation_classes"] or [])
+        names = list(ranges)
+        lows = np.array([ranges[n][0] for n in names], dtype=np.float64)
+        highs = np.array([ranges[n][1] for n in names], dtype=np.float64)
+        origin = np.array([base[n] for n in names], dtype=np.float64)
+
+        if method == "grid":
+            points = self._grid(names, lows, highs, steps)
+        else:
+            points = self._latin_hypercube(names, lows, highs, samples, seed)
+        profiles, profile_slices = self._profiles(names, lows, highs, origin, steps)
+
+        # Row 0 is the baseline, then the sweep, then the marginal profiles.
+        matrix = np.vstack([origin[None, :], points, profiles])
+        if len(matrix) > self._max_points:
+            raise ValueError(
+                f"Sweep would evaluate {len(matrix)} points (max {self._max_points})"
+            )
+        n = len(matrix)
+        columns: dict[str, Any] = {
+            name: np.full(n, value)
+            for name, value in base.items()
+            if name not in names and name != "violation_classes"
+        }
+        columns["violation_classes"] = [base["violation_classes"]] * n
+        for j, name in enumerate(names):
+            columns[name] = matrix[:, j]
+        scores = self._engine._score_columns(columns)["risk_score"]
+
+        baseline_score = int(scores[0])
+        sweep_scores = scores[1 : 1 + len(points)]
+        profile_scores = scores[1 + len(points) :]
+        return {
+            "model_version": self._engine.model_version,
+            "baseline_score": baseline_score,
+            "method": method,
+            "features": names,
+            "evaluated_points": len(points),
+            "points": points.tolist(),
+            "scores": sweep_scores.tolist(),
+            "threshold": threshold,
+            "direction": direction,
+            "threshold_crossing": self._minimal_crossing(
+                names, points, sweep_scores, origin, highs - lows, threshold, direction
+            ),
+            "marginal_effects": [
+                self._marginal_effect(name, profiles[sl, j], profile_scores[sl])
+                for j, (name, sl) in enumerate(zip(names, profile_slices, strict=True))
+            ],
+        }
+
+    # ------------------------------------------------------------------
+    # Sample designs
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _axis(name: str, low: float, high: float, steps: int) -> np.ndarray:
+        values = np.linspace(low, high, max(steps, 1) if high > low else 1)
+        if _SWEEPABLE_FEATURES[name]:
+            values = np.unique(np.round(values))
+        return values
+
+    def _grid(
+        self, names: list[str], lows: np.ndarray, highs: np.ndarray, steps: int
+    ) -> np.ndarray:
+        axes = [
+            self._axis(n, lo, hi, steps)
+            for n, lo, hi in zip(names, lows, highs, strict=True)
+        ]
+        size = int(np.prod([len(a) for a in axes]))
+        if size > self._max_points:
+            raise ValueError(f"Grid has {size} points (max {self._max_points})")
+        mesh = np.meshgrid(*axes, indexing="ij")
+        return np.stack([m.reshape(-1) for m in mesh], axis=1)
+
+    @staticmethod
+    def _latin_hypercube(
+        names: list[str],
+        lows: np.ndarray,
+        highs: np.ndarray,
+        samples: int,
+        seed: int,
+    ) -> np.ndarray:
+        rng = np.random.default_rng(seed)
+        k = len(names)
+        strata = np.stack([rng.permutation(samples) for _ in range(k)], axis=1)
+        unit = (strata + rng.random((samples, k))) / samples
+        points = lows + unit * (highs - lows)
+        for j, name in enumerate(names):
+            if _SWEEPABLE_FEATURES[name]:
+                points[:, j] = np.round(points[:, j])
+        return points
+
+    def _profiles(
+        self,
+        names: list[str],
+        lows: np.ndarray,
+        highs: np.ndarray,
+        origin: np.ndarray,
+        steps: int,
+    ) -> tuple[np.ndarray, list[slice]]:
+        """One-at-a-time sweeps of each feature with the rest at baseline."""
+        blocks: list[np.ndarray] = []
+        slices: list[slice] = []
+        start = 0
+        for j, name in enumerate(names):
+            axis = self._axis(name, lows[j], highs[j], max(steps, 2))
+            block = np.repeat(origin[None, :], len(axis), axis=0)
+            block[:, j] = axis
+            blocks.append(block)
+            slices.append(slice(start, start + len(axis)))
+            start += len(axis)
+        return np.vstack(blocks), slices
+
+    # ------------------------------------------------------------------
+    # Summaries
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _minimal_crossing(
+        names: list[str],
+        points: np.ndarray,
+        scores: np.ndarray,
+        origin: np.ndarray,
+        widths: np.ndarray,
+        threshold: int,
+        direction: str,
+    ) -> dict | None:
+        crossed = scores < threshold if direction == "below" else scores > threshold
+        if not crossed.any():
+            return None
+        scale = np.where(widths > 0, widths, 1.0)
+        distance = (np.abs(points - origin) / scale).sum(axis=1)
+        candidates = np.flatnonzero(crossed)
+        # Smallest normalized change first; ties go to the larger margin.
+        margin = threshold - scores if direction == "below" else scores - threshold
+        best = candidates[np.lexsort((-margin[candidates], distance[candidates]))[0]]
+        return {
+            "risk_score": int(scores[best]),
+            "distance": round(float(distance[best]), 6),
+            "features": dict(zip(names, points[best].tolist(), strict=True)),
+            "changes": {
+                name: float(points[best, j] - origin[j])
+                for j, name in enumerate(names)
+                if points[best, j] != origin[j]
+            },
+        }
+
+    @staticmethod
+    def _marginal_effect(name: str, values: np.ndarray, scores: np.ndarray) -> dict:
+        span = float(values[-1] - values[0])
+        return {
+            "feature": name,
+            "min_score": int(scores.min()),
+            "max_score": int(scores.max()),
+            "score_range": int(scores.max() - scores.min()),
+            "slope": round(float(scores[-1] - scores[0]) / span, 6) if span else 0.0,
+        }
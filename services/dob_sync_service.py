@@ -4,24 +4,61 @@ from __future__ import annotations
 
 from typing import Any
 
+from core.exceptions import DataSourceError
 from data_forensics.forensics_engine import ForensicsEngine
+from risk_engine.dob_features import violation_classes
+from risk_engine.incremental import IncrementalRiskScorer
 from violations.dob.dob_engine import DOBEngine
 
 
 class DOBSyncService:
     """Wraps DOB data fetching with a forensics layer."""
 
-    def __init__(self, forensics_engine: ForensicsEngine | None = None) -> None:
+    def __init__(
+        self,
+        forensics_engine: ForensicsEngine | None = None,
+        risk_scorer: IncrementalRiskScorer | None = None,
+        fetch_limit: int = 1_000,
+    ) -> None:
         self._forensics = forensics_engine or ForensicsEngine()
+        self._risk_scorer = risk_scorer
+        self._fetch_limit = fetch_limit
 
     def sync_violations(
         self,
         bbl: str,
         project_id: str = "",
         tenant_id: str = "default",
+        risk_features: dict[str, Any] | None = None,
     ) -> dict[str, Any]:
-        """Fetch violations from DOBEngine, archive raw response, and return a structured result."""
-        raw_violations = DOBEngine.fetch_live_dob_alerts({"bbl": bbl})
+        """Fetch violations, archive the raw response and return a summary.
+
+        Each sync fetches the ``fetch_limit`` most recent violations of the
+        BBL.  When the service has a ``risk_scorer``, the project is
+        re-scored incrementally after every sync and the result includes
+        ``risk_update``.  ``violation_classes`` is derived from the synced
+        page only, so older violations beyond ``fetch_limit`` do not count;
+        *risk_features* adds (or overrides) other features.  Syncs without
+        a *project_id* keep their risk state per *bbl*.
+
+        If the DOB API fails, nothing is archived or re-scored: the result
+        carries ``error`` and ``risk_update`` reports the skipped re-score.
+        """
+        try:
+            raw_violations = DOBEngine.fetch_violations(
+                {"bbl": bbl}, limit=self._fetch_limit
+            )
+        except DataSourceError as exc:
+            result: dict[str, Any] = {
+                "project_id": project_id,
+                "bbl": bbl,
+                "error": exc.message,
+                "snapshot_id": None,
+                "tenant_id": tenant_id,
+            }
+            if self._risk_scorer is not None:
+                result["risk_update"] = {"skipped": True, "reason": exc.message}
+            return result
 
         snapshot = self._forensics.archive_ingestion(
             project_id=project_id,
@@ -30,7 +67,7 @@ class DOBSyncService:
             tenant_id=tenant_id,
         )
 
-        return {
+        result = {
             "project_id": project_id,
             "bbl": bbl,
             "violation_count": len(raw_violations),
@@ -39,6 +76,21 @@ class DOBSyncService:
             "tenant_id": tenant_id,
         }
 
+        if self._risk_scorer is not None:
+            features = {
+                "violation_classes": violation_classes(raw_violations),
+                **(risk_features or {}),
+            }
+            update = self._risk_scorer.update(project_id or bbl, **features)
+            result["risk_update"] = {
+                "risk_score": update.assessment.risk_score,
+                "previous_score": update.previous_score,
+                "changed_features": update.changed_features,
+                "changed_components": update.changed_components,
+            }
+
+        return result
+
     def get_sync_history(self, project_id: str) -> list[dict[str, Any]]:
         """Return all archived syncs for a project from the forensics engine."""
         snapshots = self._forensics.get_project_snapshots(project_id)
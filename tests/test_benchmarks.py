@@ -0,0 +1,75 @@
+"""Tests for the benchmark suite – synthetic data and regression gate."""
+
+import numpy as np
+
+from benchmarks.run import build_cases, compare, run_suite
+from benchmarks.synthetic import generate_projects, iter_rows
+
+
+# ✅ TEST: Synthetic generator is seeded
+def test_generate_projects_is_deterministic():
+    """The same (n, seed) should always produce the same portfolio."""
+    a = generate_projects(500, seed=1)
+    b = generate_projects(500, seed=1)
+    assert a["violation_classes"] == b["violation_classes"]
+    assert np.array_equal(a["permit_age_days"], b["permit_age_days"])
+    assert (a["inspection_failures"] <= a["inspection_total"]).all()
+    assert len(list(iter_rows(a, limit=10))) == 10
+
+
+# ✅ TEST: Suite builds every case
+def test_build_cases_names_every_case():
+    """build_cases should yield each benchmark once, without running any."""
+    names = [name for name, _, _ in build_cases((200,), seed=42, scalar_limit=50)]
+    assert len(names) == len(set(names))
+    assert set(names) == {
+        "score_project@200",
+        "explain@200",
+        "forecast_enforcement@200",
+        "score_many@200",
+        "forecast_many@200",
+        "shadow_score@200",
+        *(
+            f"forensics_{kind}[ckpt={interval}]@200"
+            for kind in ("archive", "replay")
+            for interval in (0, 8, 32)
+        ),
+        *(f"task_queue_io[workers={workers}]" for workers in (1, 8, 32)),
+        "task_queue_fair",
+    }
+
+
+# ✅ TEST: Suite report shape
+def test_run_suite_reports_cases():
+    """run_suite should record ops/sec and peak memory for each selected case."""
+    report = run_suite(
+        sizes=(200,),
+        scalar_limit=50,
+        repeat=1,
+        cases=("score_*", "forensics_archive*ckpt=8*"),
+    )
+    assert set(report["results"]) == {
+        "score_project@200",
+        "score_many@200",
+        "forensics_archive[ckpt=8]@200",
+    }
+    assert report["meta"]["checkpoint_intervals"] == [0, 8, 32]
+    assert report["results"]["forensics_archive[ckpt=8]@200"]["payload_bytes"] > 0
+    for result in report["results"].values():
+        assert {"n", "seconds", "ops_per_sec", "peak_mb"} <= set(result)
+        assert result["ops_per_sec"] > 0
+        assert result["peak_mb"] >= 0
+
+
+# ✅ TEST: Regression gate
+def test_compare_flags_regressions():
+    """Throughput drops and memory growth past tolerance should be reported."""
+    baseline = {"results": {"case": {"ops_per_sec": 1000.0, "peak_mb": 10.0}}}
+    ok = {"results": {"case": {"ops_per_sec": 800.0, "peak_mb": 12.0}}}
+    slow = {"results": {"case": {"ops_per_sec": 700.0, "peak_mb": 10.0}}}
+    fat = {"results": {"case": {"ops_per_sec": 1000.0, "peak_mb": 13.0}}}
+
+    assert compare(ok, baseline, tolerance=0.25) == []
+    assert len(compare(slow, baseline, tolerance=0.25)) == 1
+    assert len(compare(fat, baseline, tolerance=0.25)) == 1
+    assert compare({"results": {}}, baseline) == []
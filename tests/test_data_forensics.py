@@ -1,8 +1,9 @@
 """Tests for ForensicsEngine – compliance snapshot archival and replay."""
 
 import pytest
-from datetime import datetime, timezone, timedelta
+from datetime import UTC, datetime, timezone, timedelta
 
+from data_forensics.delta_codec import apply_json_delta, diff_json
 from data_forensics.forensics_engine import ForensicsEngine
 
 
@@ -117,3 +118,415 @@ def test_replay_risk_score(forensics):
 def test_empty_project_returns_empty_list(forensics):
     """get_project_snapshots should return an empty list for unknown project."""
     assert forensics.get_project_snapshots("NONEXISTENT") == []
+
+
+# ✅ TEST: Disk-backed storage survives a restart
+def test_segment_log_persists_across_restart(tmp_path):
+    """Snapshots written to a storage_dir are readable by a new engine."""
+    engine = ForensicsEngine(storage_dir=tmp_path, segment_max_bytes=512)
+    written = [
+        engine.archive_ingestion(
+            f"P{i % 3}", "src", {"i": i, "at": datetime(2024, 1, 1)}
+        )
+        for i in range(20)
+    ]
+    engine.close()
+    assert len(list(tmp_path.glob("*.seg"))) > 1  # rolled into several segments
+
+    reopened = ForensicsEngine(storage_dir=tmp_path)
+    for snapshot in written:
+        loaded = reopened.get_snapshot(snapshot.snapshot_id)
+        assert loaded.raw_payload["i"] == snapshot.raw_payload["i"]
+        assert loaded.timestamp == snapshot.timestamp
+        assert reopened.verify_integrity(snapshot.snapshot_id)
+    assert len(reopened.get_project_snapshots("P0")) == 7
+    reopened.close()
+
+
+# ✅ TEST: Crash recovery truncates a torn tail and rebuilds the index
+def test_segment_log_crash_recovery(tmp_path):
+    """A partial trailing record is dropped; unindexed records are recovered."""
+    engine = ForensicsEngine(
+        storage_dir=tmp_path, fsync_every=1000, fsync_interval=3600
+    )
+    kept = [engine.archive_ingestion("P1", "src", {"n": n}) for n in range(5)]
+    engine._log._sync()
+    engine.archive_ingestion("P1", "src", {"n": 5})
+    # Simulate a crash: the last append is torn and never made it to the index.
+    segment = next(tmp_path.glob("*.seg"))
+    with open(segment, "r+b") as fh:
+        fh.truncate(segment.stat().st_size - 7)
+    (tmp_path / segment.name.replace(".seg", ".idx")).write_bytes(
+        (tmp_path / segment.name.replace(".seg", ".idx")).read_bytes()[:-3]
+    )
+
+    recovered = ForensicsEngine(storage_dir=tmp_path)
+    ids = {s.snapshot_id for s in recovered.get_project_snapshots("P1")}
+    assert ids == {s.snapshot_id for s in kept}
+
+    appended = recovered.archive_ingestion("P1", "src", {"n": 6})
+    recovered.close()
+    again = ForensicsEngine(storage_dir=tmp_path)
+    assert again.get_snapshot(appended.snapshot_id).raw_payload["n"] == 6
+    assert len(again.get_project_snapshots("P1")) == 6
+    again.close()
+
+
+# ✅ TEST: Range queries over the time-ordered project index
+def test_snapshots_between(forensics):
+    """snapshots_between should lazily yield the inclusive range, oldest first."""
+    snaps = [forensics.archive_ingestion("P001", "src", {"n": n}) for n in range(6)]
+    forensics.archive_ingestion("P002", "src", {"n": 99})
+
+    window = forensics.snapshots_between("P001", snaps[1].timestamp, snaps[4].timestamp)
+    assert not isinstance(window, list)
+    assert [s.raw_payload["n"] for s in window] == [1, 2, 3, 4]
+    first, last = snaps[0].timestamp, snaps[5].timestamp
+    assert list(forensics.snapshots_between("NONE", first, last)) == []
+
+    state = forensics.reconstruct_state_at("P001", snaps[2].timestamp)
+    assert state.snapshot_id == snaps[2].snapshot_id
+    before = snaps[0].timestamp - timedelta(seconds=1)
+    assert forensics.reconstruct_state_at("P001", before) is None
+
+
+# ✅ TEST: Out-of-order timestamps are inserted in sorted position
+def test_project_timeline_out_of_order():
+    """Late-arriving snapshots keep the per-project index sorted."""
+    from data_forensics.forensics_engine import _ProjectTimeline
+
+    base = datetime(2024, 1, 1, tzinfo=UTC)
+    timeline = _ProjectTimeline()
+    for hours, sid in [(0, "a"), (5, "c"), (2, "b"), (5, "d"), (9, "e")]:
+        timeline.insert(base + timedelta(hours=hours), sid)
+
+    assert timeline.ids == ["a", "b", "c", "d", "e"]
+    assert timeline.latest_at_or_before(base + timedelta(hours=4)) == "b"
+    assert timeline.latest_at_or_before(base + timedelta(hours=5)) == "d"
+    window = timeline.ids_between(base + timedelta(hours=2), base + timedelta(hours=5))
+    assert window == ["b", "c", "d"]
+
+
+# ✅ TEST: Tenant-wide as-of query
+def test_as_of_tenant(forensics):
+    """as_of should yield one latest-by-time snapshot per project of the tenant."""
+    a1 = forensics.archive_ingestion("A", "src", {"v": 1}, tenant_id="T1")
+    b1 = forensics.archive_ingestion("B", "src", {"v": 1}, tenant_id="T1")
+    forensics.archive_ingestion("C", "src", {"v": 1}, tenant_id="T2")
+    cutoff = b1.timestamp
+    forensics.archive_ingestion("A", "src", {"v": 2}, tenant_id="T1")
+    late = forensics.archive_ingestion("D", "src", {"v": 1}, tenant_id="T1")
+
+    state = list(forensics.as_of("T1", cutoff))
+    assert [s.snapshot_id for s in state] == [a1.snapshot_id, b1.snapshot_id]
+
+    latest = {
+        s.project_id: s.raw_payload["v"] for s in forensics.as_of("T1", late.timestamp)
+    }
+    assert latest == {"A": 2, "B": 1, "D": 1}
+    assert list(forensics.as_of("unknown", late.timestamp)) == []
+
+
+# ✅ TEST: as_of on disk-backed storage after restart
+def test_as_of_segment_log(tmp_path):
+    """Tenant metadata is indexed on disk, so as_of works after reopening."""
+    engine = ForensicsEngine(storage_dir=tmp_path)
+    engine.archive_ingestion("A", "src", {"v": 1}, tenant_id="T1")
+    engine.archive_ingestion("B", "src", {"v": 1}, tenant_id="T2")
+    last = engine.archive_ingestion("A", "src", {"v": 2}, tenant_id="T1")
+    engine.close()
+
+    reopened = ForensicsEngine(storage_dir=tmp_path)
+    state = reopened.as_of("T1", last.timestamp)
+    assert [s.snapshot_id for s in state] == [last.snapshot_id]
+    reopened.close()
+
+
+# ✅ TEST: Identical payloads are stored once
+@pytest.mark.parametrize("on_disk", [False, True])
+def test_payload_deduplication(tmp_path, on_disk):
+    """Re-archiving identical data adds a snapshot but no new payload copy."""
+    engine = ForensicsEngine(storage_dir=tmp_path if on_disk else None)
+    payload = {"violations": [{"id": n, "class": "B"} for n in range(200)]}
+    first = engine.archive_ingestion("P1", "dob_sync", payload)
+    if on_disk:
+        engine.flush()
+        size_after_first = sum(p.stat().st_size for p in tmp_path.glob("*.seg"))
+    repeats = [engine.archive_ingestion("P1", "dob_sync", payload) for _ in range(5)]
+    changed = engine.archive_ingestion("P1", "dob_sync", {"violations": []})
+
+    stats = engine.storage_stats()
+    assert (stats["snapshots"], stats["unique_payloads"]) == (7, 2)
+    assert all(r.data_hash == first.data_hash for r in repeats)
+    assert changed.data_hash != first.data_hash
+    for snapshot in [first, *repeats, changed]:
+        assert engine.verify_integrity(snapshot.snapshot_id)
+    assert engine.get_snapshot(repeats[-1].snapshot_id).raw_payload == first.raw_payload
+
+    if on_disk:
+        engine.flush()
+        size = sum(p.stat().st_size for p in tmp_path.glob("*.seg"))
+        growth = size - size_after_first
+        assert growth < size_after_first  # five repeats cost less than one payload
+        engine.close()
+        reopened = ForensicsEngine(storage_dir=tmp_path)
+        stats = reopened.storage_stats()
+        assert (stats["snapshots"], stats["unique_payloads"]) == (7, 2)
+        assert reopened.verify_integrity(repeats[0].snapshot_id)
+        reopened.close()
+
+
+# ✅ TEST: Deduplicated snapshots never share a mutable payload
+def test_deduplicated_payloads_are_isolated(forensics):
+    """Mutating one snapshot's payload leaves its siblings and the archive intact."""
+    payload = {"violations": [{"id": 1, "class": "B"}]}
+    first = forensics.archive_ingestion("P1", "dob_sync", payload)
+    second = forensics.archive_ingestion("P1", "dob_sync", payload)
+    assert forensics.storage_stats()["unique_payloads"] == 1
+
+    payload["violations"].append({"id": 2})
+    first.raw_payload["violations"][0]["class"] = "C"
+    loaded = forensics.get_snapshot(first.snapshot_id)
+    loaded.raw_payload["violations"].clear()
+
+    expected = [{"id": 1, "class": "B"}]
+    assert second.raw_payload["violations"] == expected
+    assert forensics.get_snapshot(second.snapshot_id).raw_payload["violations"] == (
+        expected
+    )
+    assert forensics.verify_integrity(first.snapshot_id)
+    assert forensics.verify_all()["verified"]
+
+
+# ✅ TEST: Structural JSON deltas round-trip
+@pytest.mark.parametrize(
+    "old, new",
+    [
+        ({"a": 1, "b": [1, 2, 3]}, {"a": 2, "b": [1, 3, 4], "c": {"d": None}}),
+        ({"v": [{"id": 1}, {"id": 2}]}, {"v": [{"id": 0}, {"id": 1, "s": "X"}]}),
+        ({"a": {"b": {"c": 1}}}, {"a": {"b": [1]}}),
+        ([1, 2, 3], []),
+    ],
+)
+def test_json_delta_round_trip(old, new):
+    """Applying diff_json(old, new) to a copy of old should yield new."""
+    import copy
+    import json
+
+    delta = json.loads(json.dumps(diff_json(old, new)))
+    assert apply_json_delta(copy.deepcopy(old), delta) == new
+
+
+# ✅ TEST: Delta codec stores diffs and rebuilds every version
+@pytest.mark.parametrize("on_disk", [False, True])
+def test_delta_codec_reconstructs_versions(tmp_path, on_disk):
+    """Every version should rebuild exactly while storing far fewer bytes."""
+    from benchmarks.synthetic import generate_payload_history
+
+    history = generate_payload_history(40, seed=3)
+    storage_dir = tmp_path if on_disk else None
+    plain = ForensicsEngine()
+    engine = ForensicsEngine(storage_dir=storage_dir, checkpoint_interval=8)
+    snapshots = []
+    for payload in history:
+        plain.archive_ingestion("P1", "dob_sync", payload)
+        snapshots.append(engine.archive_ingestion("P1", "dob_sync", payload))
+
+    stats = engine.storage_stats()
+    assert stats["unique_payloads"] == 40
+    assert stats["delta_payloads"] == 35  # one checkpoint every 8 versions
+    assert stats["payload_bytes"] * 3 < plain.storage_stats()["payload_bytes"]
+    for payload, snapshot in zip(history, snapshots, strict=True):
+        restored = engine.get_snapshot(snapshot.snapshot_id)
+        expected = {**payload, "_source": "dob_sync", "_tenant_id": "default"}
+        assert restored.raw_payload == expected
+        assert engine.verify_integrity(snapshot.snapshot_id)
+
+    if on_disk:
+        engine.close()
+        reopened = ForensicsEngine(storage_dir=tmp_path, checkpoint_interval=8)
+        assert reopened.storage_stats()["delta_payloads"] == 35
+        assert all(reopened.verify_integrity(s.snapshot_id) for s in snapshots)
+        reopened.close()
+
+
+# ✅ TEST: Deltas keep int -> float and int -> bool changes
+@pytest.mark.parametrize("on_disk", [False, True])
+def test_delta_codec_keeps_numeric_types(tmp_path, on_disk):
+    """0 -> 0.0 and 1 -> True compare equal in Python but are real changes."""
+    import json
+
+    filler = [f"record-{n}" for n in range(50)]
+    history = [
+        {"rate": 0, "flag": 1, "nested": {"v": [0, 1]}, "filler": filler},
+        {"rate": 0.0, "flag": True, "nested": {"v": [0.0, True]}, "filler": filler},
+        {"rate": False, "flag": 1.0, "nested": {"v": [False, 1]}, "filler": filler},
+    ]
+    engine = ForensicsEngine(
+        storage_dir=tmp_path if on_disk else None, checkpoint_interval=8
+    )
+    ids = [engine.archive_ingestion("P1", "dob_sync", p).snapshot_id for p in history]
+    assert engine.storage_stats()["delta_payloads"] == 2
+
+    def check(store):
+        for payload, snapshot_id in zip(history, ids, strict=True):
+            restored = store.get_snapshot(snapshot_id).raw_payload
+            for key in ("rate", "flag", "nested"):
+                assert json.dumps(restored[key]) == json.dumps(payload[key])
+            assert store.verify_integrity(snapshot_id)
+        assert store.verify_all(workers=1)["mismatches"] == []
+
+    check(engine)
+    if on_disk:
+        engine.close()
+        reopened = ForensicsEngine(storage_dir=tmp_path, checkpoint_interval=8)
+        check(reopened)
+        reopened.close()
+
+
+# ✅ TEST: Merkle inclusion proofs and incremental verification
+def test_merkle_proofs_and_incremental_verification(forensics):
+    """Proofs verify against the root; verification rehashes only new leaves."""
+    snapshots = [
+        forensics.archive_ingestion("P1", "dob_sync", {"n": n}) for n in range(11)
+    ]
+    forensics.archive_ingestion("P2", "dob_sync", {"n": 0})
+    root = forensics.merkle_root("P1")
+
+    for snapshot in snapshots:
+        proof = forensics.inclusion_proof(snapshot.snapshot_id)
+        assert proof["root"] == root and proof["tree_size"] == 11
+        assert len(proof["path"]) <= 4
+        assert ForensicsEngine.verify_inclusion_proof(proof, snapshot)
+    forged = snapshots[3].model_copy(update={"raw_payload": {"n": 99}})
+    assert not ForensicsEngine.verify_inclusion_proof(
+        forensics.inclusion_proof(snapshots[3].snapshot_id), forged
+    )
+
+    first = forensics.verify_project("P1")
+    assert first["verified"] and first["rehashed"] == 11 and first["root"] == root
+    forensics.archive_ingestion("P1", "dob_sync", {"n": 11})
+    second = forensics.verify_project("P1")
+    assert second["verified"] and second["rehashed"] == 1
+    assert second["root"] == forensics.merkle_root("P1") != root
+
+    forensics._snapshots[snapshots[2].snapshot_id].raw_payload["n"] = -1
+    assert forensics.verify_project("P1")["verified"]  # already verified
+    full = forensics.verify_project("P1", full=True)
+    assert full["failures"] == [snapshots[2].snapshot_id]
+
+
+# ✅ TEST: Merkle roots are rebuilt identically after a restart
+def test_merkle_root_survives_restart(tmp_path):
+    """A disk-backed engine should rebuild the same roots and proofs."""
+    engine = ForensicsEngine(storage_dir=tmp_path)
+    ids = [
+        engine.archive_ingestion("P1", "dob_sync", {"n": n}).snapshot_id
+        for n in range(6)
+    ]
+    root = engine.merkle_root("P1")
+    engine.close()
+
+    reopened = ForensicsEngine(storage_dir=tmp_path)
+    assert reopened.merkle_root("P1") == root
+    proof = reopened.inclusion_proof(ids[4])
+    assert ForensicsEngine.verify_inclusion_proof(proof, reopened.get_snapshot(ids[4]))
+    reopened.archive_ingestion("P1", "dob_sync", {"n": 6})
+    assert reopened.verify_project("P1")["tree_size"] == 7
+    reopened.close()
+
+
+# ✅ TEST: Trees are rebuilt from indexed leaf hashes, not metadata reads
+def test_merkle_rebuild_reads_no_metadata(tmp_path, monkeypatch):
+    """After a restart the first proof uses the index, even for a lost index."""
+    from data_forensics.segment_log import SegmentLog
+
+    engine = ForensicsEngine(storage_dir=tmp_path)
+    ids = [
+        engine.archive_ingestion(f"P{n % 2}", "dob_sync", {"n": n}).snapshot_id
+        for n in range(8)
+    ]
+    roots = {p: engine.merkle_root(p) for p in ("P0", "P1")}
+    engine.close()
+    # Drop one index so its entries are re-derived by the segment tail scan.
+    next(tmp_path.glob("*.idx")).write_bytes(b"")
+
+    def no_metadata(self, snapshot_id):
+        raise AssertionError("metadata read during tree rebuild")
+
+    monkeypatch.setattr(SegmentLog, "get_metadata", no_metadata)
+    reopened = ForensicsEngine(storage_dir=tmp_path)
+    assert {p: reopened.merkle_root(p) for p in ("P0", "P1")} == roots
+    assert reopened.inclusion_proof(ids[5])["leaf_index"] == 2
+    reopened.close()
+
+
+# ✅ TEST: Streaming canonical hash matches the one-shot hash
+@pytest.mark.parametrize(
+    "payload",
+    [
+        {},
+        {"b": [], "a": {}},
+        {"violations": [{"id": n, "tags": ("x", n)} for n in range(300)]},
+        {"when": datetime(2024, 1, 2, tzinfo=UTC), "é": "ü"},
+        {3: "int key", 1.5: None, 10: [None, True]},
+        {"nested": {str(n): list(range(n)) for n in range(100)}},
+    ],
+)
+def test_stream_hash_matches_canonical(payload):
+    """stream_hash should equal SHA-256 over canonical_payload bytes."""
+    import hashlib
+
+    from data_forensics.bulk_verify import stream_hash
+    from data_forensics.segment_log import canonical_payload
+
+    expected = hashlib.sha256(canonical_payload(payload)).hexdigest()
+    assert stream_hash(payload) == expected
+
+
+# ✅ TEST: Bulk verification of in-memory payloads
+def test_verify_all_reports_mismatches(forensics):
+    """verify_all should rehash every snapshot, report progress and mismatches."""
+    ids = [
+        forensics.archive_ingestion(f"P{n % 3}", "dob_sync", {"n": n}).snapshot_id
+        for n in range(30)
+    ]
+    forensics._snapshots[ids[7]].raw_payload["n"] = -1
+    updates = []
+
+    report = forensics.verify_all(workers=2, batch_size=4, progress=updates.append)
+    # workers has no effect in memory: payloads are hashed in-process
+    assert report["checked"] == 30 and report["workers"] == 1
+    assert report["mismatches"] == [ids[7]]
+    assert not report["verified"]
+    assert report["snapshots_per_sec"] > 0 and report["bytes"] > 0
+    assert len(updates) == 8
+
+
+# ✅ TEST: Disk-backed bulk verification reads payloads in the workers
+@pytest.mark.parametrize("workers", [1, 2])
+def test_verify_all_on_disk_reads_segments(tmp_path, workers):
+    """Workers rebuild checkpoints and deltas from disk and flag corrupt records."""
+    engine = ForensicsEngine(storage_dir=tmp_path, checkpoint_interval=4)
+    ids = [
+        engine.archive_ingestion(
+            "P1", "dob_sync", {"n": n, "violations": list(range(50))}
+        ).snapshot_id
+        for n in range(12)
+    ]
+    engine._log.flush()
+    assert engine.verify_all(workers=workers, batch_size=5)["verified"]
+
+    # Corrupt the first checkpoint: it and every delta built on it mismatch.
+    checkpoint = engine._log.get_metadata(ids[0])["payload_ref"]
+    segment, offset, length = engine._log._blobs[checkpoint]
+    path = tmp_path / f"{segment:08d}.seg"
+    data = bytearray(path.read_bytes())
+    data[offset + length - 2] ^= 0x01
+    path.write_bytes(bytes(data))
+
+    report = engine.verify_all(workers=workers, batch_size=5)
+    assert report["checked"] == 12 and report["workers"] == workers
+    assert ids[0] in report["mismatches"] and not report["verified"]
+    assert set(report["mismatches"]) < set(ids)
+    engine.close()
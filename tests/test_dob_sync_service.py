@@ -0,0 +1,116 @@
+"""Tests for DOBSyncService – archival and incremental risk re-scoring."""
+
+import pytest
+
+from core.exceptions import DataSourceError
+from data_forensics.forensics_engine import ForensicsEngine
+from risk_engine.engine import DeterministicRiskEngine
+from risk_engine.incremental import IncrementalRiskScorer
+from services.dob_sync_service import DOBSyncService, violation_classes
+from violations.dob.dob_engine import DOBEngine
+
+OPEN_HAZARD = {"violation_number": "1", "severity": "CLASS - 1"}
+MINOR = {"violation_number": "2", "severity": "Non-Hazardous"}
+RESOLVED = {
+    "violation_number": "3",
+    "severity": "HAZARDOUS",
+    "ecb_violation_status": "RESOLVE",
+}
+
+
+@pytest.fixture
+def feed(monkeypatch):
+    """Replaces the live DOB fetch with a mutable list of records."""
+    records: list[dict] = []
+    monkeypatch.setattr(
+        DOBEngine, "fetch_violations", staticmethod(lambda query, limit: records)
+    )
+    return records
+
+
+# ✅ TEST: Severity labels map to risk-engine classes
+def test_violation_classes_from_records():
+    """ECB severities map to Class A-C; resolved and unknown records are skipped."""
+    records = [OPEN_HAZARD, MINOR, RESOLVED, {"severity": "unknown"}]
+    assert violation_classes(records) == ["Class C", "Class A"]
+
+
+# ✅ TEST: Each sync re-scores the project from the synced violations
+def test_sync_rescores_from_synced_violations(feed):
+    """risk_update should follow the violations each sync brings in."""
+    service = DOBSyncService(ForensicsEngine(), IncrementalRiskScorer())
+    engine = DeterministicRiskEngine()
+
+    feed.append(MINOR)
+    first = service.sync_violations("1000010001", project_id="P1")
+    assert first["risk_update"]["previous_score"] is None
+    assert first["risk_update"]["risk_score"] == (
+        engine.score_project(violation_classes=["Class A"]).risk_score
+    )
+
+    feed.extend([OPEN_HAZARD, RESOLVED])
+    second = service.sync_violations(
+        "1000010001", project_id="P1", risk_features={"permit_age_days": 900}
+    )
+    update = second["risk_update"]
+    expected = engine.score_project(
+        violation_classes=["Class A", "Class C"], permit_age_days=900
+    )
+    assert update["risk_score"] == expected.risk_score
+    assert update["previous_score"] == first["risk_update"]["risk_score"]
+    assert set(update["changed_features"]) == {"violation_classes", "permit_age_days"}
+    assert len(service.get_sync_history("P1")) == 2
+
+
+# ✅ TEST: Syncs without a project_id keep separate risk state per BBL
+def test_sync_without_project_id_keys_on_bbl(feed):
+    """Two BBLs synced without ids must not share scorer state."""
+    service = DOBSyncService(ForensicsEngine(), IncrementalRiskScorer())
+    engine = DeterministicRiskEngine()
+
+    feed.append(OPEN_HAZARD)
+    service.sync_violations("111", risk_features={"permit_age_days": 900})
+
+    feed.clear()
+    update = service.sync_violations("222")["risk_update"]
+    assert update["previous_score"] is None
+    assert update["risk_score"] == engine.score_project().risk_score
+
+
+# ✅ TEST: A failed DOB fetch neither archives nor re-scores
+def test_sync_fetch_failure_keeps_risk_state(feed, monkeypatch):
+    """An outage must not read as a BBL whose violations were all cleared."""
+    forensics = ForensicsEngine()
+    scorer = IncrementalRiskScorer()
+    service = DOBSyncService(forensics, scorer)
+    feed.append(OPEN_HAZARD)
+    first = service.sync_violations("111", project_id="P1")
+
+    def outage(query, limit):
+        raise DataSourceError("DOB API returned HTTP 503")
+
+    monkeypatch.setattr(DOBEngine, "fetch_violations", staticmethod(outage))
+    failed = service.sync_violations("111", project_id="P1")
+    assert failed["error"] == "DOB API returned HTTP 503"
+    assert failed["snapshot_id"] is None
+    assert failed["risk_update"] == {
+        "skipped": True,
+        "reason": "DOB API returned HTTP 503",
+    }
+    assert len(service.get_sync_history("P1")) == 1
+
+    feed.append(MINOR)
+    monkeypatch.setattr(
+        DOBEngine, "fetch_violations", staticmethod(lambda query, limit: feed)
+    )
+    update = service.sync_violations("111", project_id="P1")["risk_update"]
+    assert update["previous_score"] == first["risk_update"]["risk_score"]
+
+
+# ✅ TEST: Without a scorer the result has no risk_update
+def test_sync_without_scorer(feed):
+    """The risk wiring is optional."""
+    feed.append(OPEN_HAZARD)
+    result = DOBSyncService(ForensicsEngine()).sync_violations("1", project_id="P1")
+    assert result["violation_count"] == 1
+    assert "risk_update" not in result
@@ -89,3 +89,43 @@ def test_recommended_actions_present(engine):
         violation_classes=["Class B"],
     )
     assert len(result["recommended_actions"]) > 0
+
+
+# ✅ TEST: Batch forecasting matches the scalar path
+def test_forecast_many_matches_forecast_enforcement(engine):
+    """forecast_many() must reproduce forecast_enforcement() row for row."""
+    import random
+
+    rng = random.Random(11)
+    classes = ["Class A", "Class B", "Class C", "Hazardous materials", "other"]
+    n = 400
+    scores = [rng.choice([rng.randint(0, 100), 20.5, -3, 104]) for _ in range(n)]
+    violations = [
+        [rng.choice(classes) for _ in range(rng.randint(0, 3))] for _ in range(n)
+    ]
+    swo = [rng.randint(0, 4) for _ in range(n)]
+    permit_age = [rng.randint(0, 1500) for _ in range(n)]
+
+    batch = engine.forecast_many(scores, violations, swo, permit_age)
+    for i in range(n):
+        expected = engine.forecast_enforcement(
+            scores[i], violations[i], swo[i], permit_age[i]
+        )
+        for field in ("likely_enforcement_actions", "recommended_actions"):
+            assert list(batch[field][i]) == expected[field]
+        for field in (
+            "escalation_level",
+            "stop_work_probability_30d",
+            "stop_work_probability_60d",
+            "timeline_days",
+        ):
+            assert batch[field][i] == expected[field]
+
+
+# ✅ TEST: Batch forecasting validates column lengths
+def test_forecast_many_rejects_mismatched_columns(engine):
+    """Columns of different lengths should raise ValueError."""
+    with pytest.raises(ValueError):
+        engine.forecast_many([10, 20], [["Class A"]])
+    with pytest.raises(ValueError):
+        engine.forecast_many([10, 20], [[], []], prior_stop_work_orders=[1])
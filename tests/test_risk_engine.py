@@ -2,6 +2,7 @@
 
 import pytest
 
+from core.compliance_models import RiskAssessment
 from risk_engine.engine import DeterministicRiskEngine
 
 
@@ -186,3 +187,534 @@ def test_explain_method(engine):
     assert "model_version" in breakdown
     assert breakdown["model_version"] == "1.0.0"
     assert breakdown["risk_score"] == result.risk_score
+
+
+def _random_projects(n, seed=7):
+    """Seeded feature rows covering every branch of the component scorers."""
+    import random
+
+    rng = random.Random(seed)
+    classes = ["Class A", "Class B", "Class C", "Class X"]
+    return [
+        dict(
+            violation_classes=rng.sample(classes, rng.randint(0, 3)),
+            permit_age_days=rng.choice([0, 180, 450, 720, rng.randint(0, 1200)]),
+            inspection_failures=rng.randint(0, 12),
+            inspection_total=rng.choice([0, 5, 10]),
+            milestone_delay_days=rng.randint(-10, 120),
+            complaint_count_90d=rng.randint(0, 8),
+            prior_stop_work_orders=rng.randint(0, 3),
+            building_type=rng.choice(
+                ["residential", "Commercial", "mixed", "industrial"]
+            ),
+            stories=rng.randint(1, 60),
+            contractor_violation_rate=rng.choice([0.0, 0.25, rng.random(), 1.5]),
+        )
+        for _ in range(n)
+    ]
+
+
+# ✅ TEST: Batch scoring parity with score_project
+def test_score_many_matches_score_project(engine):
+    """score_many() must reproduce score_project() exactly, row for row."""
+    rows = _random_projects(500)
+    columns = {name: [row[name] for row in rows] for name in rows[0]}
+    batch = engine.score_many(columns)
+
+    assert len(batch) == len(rows)
+    for row, result in zip(rows, batch, strict=True):
+        expected = engine.score_project(**row)
+        assert result.model_dump(exclude={"scored_at"}) == expected.model_dump(
+            exclude={"scored_at"}
+        )
+
+
+# ✅ TEST: Batch scoring from a DataFrame with default columns
+def test_score_many_dataframe_defaults(engine):
+    """Missing columns fall back to score_project defaults."""
+    import pandas as pd
+
+    frame = pd.DataFrame({"permit_age_days": [0, 400, 900], "stories": [1, 10, 45]})
+    batch = engine.score_many(frame)
+
+    for age, stories, result in zip([0, 400, 900], [1, 10, 45], batch, strict=True):
+        expected = engine.score_project(permit_age_days=age, stories=stories)
+        assert result.model_dump(exclude={"scored_at"}) == expected.model_dump(
+            exclude={"scored_at"}
+        )
+
+
+# ✅ TEST: Batch scoring rejects malformed columns
+def test_score_many_rejects_bad_columns(engine):
+    """Unknown names and mismatched lengths should raise ValueError."""
+    with pytest.raises(ValueError, match="Unknown feature columns"):
+        engine.score_many({"permit_age": [1]})
+    with pytest.raises(ValueError, match="mismatched lengths"):
+        engine.score_many({"permit_age_days": [1, 2], "stories": [1]})
+
+
+# ✅ TEST: Batch container indexing, slicing and filtering
+def test_risk_assessment_batch_views(engine):
+    """Slices, masks and filter() return views that materialize the right rows."""
+    rows = _random_projects(200, seed=11)
+    batch = engine.score_many({name: [r[name] for r in rows] for name in rows[0]})
+
+    assert batch[5].risk_score == engine.score_project(**rows[5]).risk_score
+    tail = batch[150:]
+    assert len(tail) == 50
+    assert tail[0].features_snapshot == batch[150].features_snapshot
+    assert list(tail.row_ids) == list(range(150, 200))
+
+    high = batch.filter(min_score=50)
+    assert len(high) == int((batch.risk_score >= 50).sum())
+    assert all(a.risk_score >= 50 for a in high)
+    assert len(batch[batch.risk_score < 50]) == len(batch) - len(high)
+
+
+# ✅ TEST: Batch top-K
+def test_risk_assessment_batch_top_k(engine):
+    """top_k() should return the highest scores in descending, stable order."""
+    rows = _random_projects(300, seed=3)
+    batch = engine.score_many({name: [r[name] for r in rows] for name in rows[0]})
+
+    top = batch.top_k(10)
+    expected = sorted(range(300), key=lambda i: -int(batch.risk_score[i]))[:10]
+    assert list(top.row_ids) == expected
+    assert len(batch.top_k(0)) == 0
+    assert len(batch.top_k(1_000)) == 300
+
+
+# ✅ TEST: Incremental re-scoring matches a full rescore
+def test_incremental_rescore_matches_full_score(engine):
+    """A feature delta should recompute only affected components, exactly."""
+    from risk_engine.incremental import IncrementalRiskScorer
+
+    scorer = IncrementalRiskScorer(engine)
+    base = _random_projects(1, seed=5)[0]
+    first = scorer.update("P1", **base)
+    assert first.previous_score is None
+    assert len(first.changed_components) == 8
+
+    result = scorer.update("P1", violation_classes=["Class C"], complaint_count_90d=5)
+    expected = engine.score_project(
+        **{**base, "violation_classes": ["Class C"], "complaint_count_90d": 5}
+    )
+    assert result.assessment.model_dump(exclude={"scored_at"}) == expected.model_dump(
+        exclude={"scored_at"}
+    )
+    assert result.previous_score == first.assessment.risk_score
+    assert set(result.changed_features) <= {"violation_classes", "complaint_count_90d"}
+    assert set(result.changed_components) <= {
+        "violation_severity_score",
+        "complaint_velocity_score",
+    }
+
+
+# ✅ TEST: Unchanged delta is a no-op
+def test_incremental_rescore_no_change(engine):
+    """Re-sending identical features should report no changes."""
+    from risk_engine.incremental import IncrementalRiskScorer
+
+    scorer = IncrementalRiskScorer(engine)
+    first = scorer.update("P1", permit_age_days=400)
+    again = scorer.update("P1", permit_age_days=400)
+    assert again.changed_features == []
+    assert again.changed_components == []
+    assert again.assessment is first.assessment
+    with pytest.raises(ValueError, match="Unknown feature"):
+        scorer.update("P1", permit_age=1)
+
+
+# ✅ TEST: Sensitivity sweep agrees with scalar scoring
+def test_sensitivity_sweep_grid(engine):
+    """Every grid point score should equal score_project at that point."""
+    from risk_engine.sensitivity import SensitivityAnalyzer
+
+    baseline = dict(
+        violation_classes=["Class B"],
+        permit_age_days=600,
+        milestone_delay_days=60,
+        complaint_count_90d=4,
+        building_type="residential",
+        stories=20,
+    )
+    result = SensitivityAnalyzer(engine).sweep(
+        baseline,
+        {"permit_age_days": (0, 600), "complaint_count_90d": (0, 4)},
+        steps=5,
+    )
+    assert result["baseline_score"] == engine.score_project(**baseline).risk_score
+    assert result["evaluated_points"] == 25
+    for (age, complaints), score in zip(
+        result["points"], result["scores"], strict=True
+    ):
+        expected = engine.score_project(
+            **{
+                **baseline,
+                "permit_age_days": int(age),
+                "complaint_count_90d": int(complaints),
+            }
+        )
+        assert score == expected.risk_score
+
+    crossing = result["threshold_crossing"]
+    assert crossing is not None and crossing["risk_score"] < 50
+    effects = {e["feature"]: e for e in result["marginal_effects"]}
+    assert effects["complaint_count_90d"]["slope"] == pytest.approx(2.0)
+
+
+# ✅ TEST: Latin-hypercube sweep and validation
+def test_sensitivity_sweep_lhs(engine):
+    """LHS sampling should be seeded and reject unsweepable features."""
+    from risk_engine.sensitivity import SensitivityAnalyzer
+
+    analyzer = SensitivityAnalyzer(engine)
+    ranges = {"permit_age_days": (0, 900), "contractor_violation_rate": (0.0, 1.0)}
+    a = analyzer.sweep({}, ranges, method="lhs", samples=64, seed=1)
+    b = analyzer.sweep({}, ranges, method="lhs", samples=64, seed=1)
+    assert a["points"] == b["points"]
+    assert a["evaluated_points"] == 64
+    with pytest.raises(ValueError, match="cannot be swept"):
+        analyzer.sweep({}, {"building_type": (0, 1)})
+
+
+# ✅ TEST: explain() uses the components captured at scoring time
+def test_explain_uses_captured_components(engine):
+    """Scored assessments explain without a recompute; others go through the LRU."""
+    result = engine.score_project(violation_classes=["Class C"], permit_age_days=500)
+    captured = engine.explain(result)
+    assert engine.explain_cache_info()["misses"] == 0
+    batch = engine.score_many({"violation_classes": [["Class C"]], "stories": [9]})
+    engine.explain(batch[0])
+    info = engine.explain_cache_info()
+    assert (info["misses"], info["hits"], info["size"]) == (0, 0, 0)
+
+    uncached = DeterministicRiskEngine(explain_cache_size=0).explain(result)
+    assert captured == uncached
+
+    restored = RiskAssessment.model_validate(result.model_dump())
+    assert engine.explain(restored) == captured
+    assert engine.explain(restored) == captured
+    info = engine.explain_cache_info()
+    assert (info["misses"], info["hits"], info["size"]) == (1, 1, 1)
+
+
+# ✅ TEST: explain() cache eviction and model_version mismatch
+def test_explain_cache_eviction_and_version(engine):
+    """The cache is bounded, and other model versions are always recomputed."""
+    small = DeterministicRiskEngine(explain_cache_size=2)
+    restored = [
+        RiskAssessment.model_validate(
+            small.score_project(permit_age_days=days).model_dump()
+        )
+        for days in (200, 300, 400)
+    ]
+    for assessment in restored:
+        small.explain(assessment)
+    assert small.explain_cache_info()["size"] == 2
+
+    small.explain(restored[0])
+    assert small.explain_cache_info()["misses"] == 4
+
+    other = DeterministicRiskEngine(model_version="2.0.0").score_project(
+        permit_age_days=300
+    )
+    breakdown = small.explain(other)
+    assert breakdown["model_version"] == "2.0.0"
+    assert small.explain_cache_info()["hits"] == 0
+
+
+# ✅ TEST: Portfolio index tracks rescoring incrementally
+def test_portfolio_index_rescore(engine):
+    """Rescoring a project should replace its contribution, not add to it."""
+    from risk_engine.portfolio import PortfolioRiskIndex
+
+    index = PortfolioRiskIndex(high_risk_threshold=50)
+    low = engine.score_project()
+    high = engine.score_project(**_random_projects(1, seed=2)[0])
+    worst = engine.score_project(
+        violation_classes=["Class C"],
+        permit_age_days=900,
+        inspection_failures=10,
+        inspection_total=10,
+        milestone_delay_days=120,
+        complaint_count_90d=10,
+    )
+    index.record("T1", "P1", low)
+    index.record("T1", "P2", worst)
+    index.record("T2", "P9", high)
+    summary = index.summary("T1")
+    assert summary["total_projects"] == 2
+    assert summary["high_risk_projects"] == 1
+    assert summary["top_projects"][0] == {
+        "project_id": "P2",
+        "risk_score": worst.risk_score,
+    }
+    assert summary["avg_risk_score"] == pytest.approx(
+        (low.risk_score + worst.risk_score) / 2
+    )
+    assert sum(summary["histogram"]) == 2
+
+    # P2 is remediated: the top-K and counters follow the drop
+    index.record("T1", "P2", low)
+    summary = index.summary("T1")
+    assert summary["total_projects"] == 2
+    assert summary["high_risk_projects"] == 0
+    assert summary["avg_risk_score"] == pytest.approx(low.risk_score)
+    assert [p["project_id"] for p in summary["top_projects"]] == ["P1", "P2"]
+    assert index.summary("unknown")["total_projects"] == 0
+
+
+# ✅ TEST: Portfolio index batch recording
+def test_portfolio_index_record_batch(engine):
+    """record_batch() should match recording each materialized row."""
+    from risk_engine.portfolio import PortfolioRiskIndex
+
+    rows = _random_projects(100, seed=9)
+    batch = engine.score_many({name: [r[name] for r in rows] for name in rows[0]})
+    ids = [f"P{i}" for i in range(100)]
+
+    from_batch = PortfolioRiskIndex()
+    from_batch.record_batch("T1", ids, batch)
+    one_by_one = PortfolioRiskIndex()
+    for project_id, assessment in zip(ids, batch, strict=True):
+        one_by_one.record("T1", project_id, assessment)
+    assert from_batch.summary("T1", top_k=20) == one_by_one.summary("T1", top_k=20)
+
+
+# ✅ TEST: Shadow scoring of candidate weight sets
+def test_shadow_score_candidates(engine):
+    """Production matches score_many; candidates match rescaled components."""
+    rows = _random_projects(300)
+    columns = {name: [row[name] for row in rows] for name in rows[0]}
+    candidates = {
+        "2.0.0-rc1": {"violation_severity_score": 1.5, "permit_age_score": 0.5},
+        "identity": {},
+    }
+    result = engine.shadow_score(columns, candidates)
+
+    assert result["models"] == ["1.0.0", "2.0.0-rc1", "identity"]
+    production = engine.score_many(columns).risk_score
+    assert result["scores"]["1.0.0"].tolist() == production.tolist()
+    assert result["differences"]["identity"]["changed"] == 0
+    assert result["differences"]["identity"]["histogram"] == {0: 300}
+
+    weights = candidates["2.0.0-rc1"]
+    for row, score in zip(rows, result["scores"]["2.0.0-rc1"], strict=True):
+        parts = engine.explain(engine.score_project(**row))["component_scores"]
+        total = sum(parts[name] * weights.get(name, 1.0) for name in parts)
+        assert score == min(max(round(total), 0), 100)
+
+    diff = result["differences"]["2.0.0-rc1"]
+    assert sum(diff["histogram"].values()) == 300
+    assert diff["min"] <= diff["percentiles"]["p50"] <= diff["max"]
+
+    with pytest.raises(ValueError, match="Unknown risk component"):
+        engine.shadow_score(columns, {"bad": {"nope": 1.0}})
+    with pytest.raises(ValueError, match="collides"):
+        engine.shadow_score(columns, {"1.0.0": {}})
+
+
+# ✅ TEST: Chunked Parquet/Feather scoring
+@pytest.mark.parametrize("suffix", [".parquet", ".feather"])
+def test_score_parquet_chunked(engine, tmp_path, suffix):
+    """Scoring a file in small chunks matches score_many, nulls use defaults."""
+    pa = pytest.importorskip("pyarrow")
+    import pyarrow.feather as feather
+    import pyarrow.parquet as pq
+
+    from risk_engine.arrow_io import score_parquet
+
+    rows = _random_projects(250)
+    columns = {name: [row[name] for row in rows] for name in rows[0]}
+    columns["stories"][3] = None
+    table = pa.table(
+        {
+            "project_id": [f"P-{i}" for i in range(len(rows))],
+            "ignored": list(range(len(rows))),
+            **{
+                name: pa.array(values, pa.list_(pa.string()))
+                if name == "violation_classes"
+                else values
+                for name, values in columns.items()
+            },
+        }
+    )
+    source = tmp_path / f"features{suffix}"
+    if suffix == ".parquet":
+        pq.write_table(table, source)
+    else:
+        feather.write_feather(table, source)
+
+    summary = score_parquet(
+        source, tmp_path / "scores.parquet", engine=engine, chunk_size=64
+    )
+    assert summary["rows"] == 250
+    assert summary["chunks"] == 4
+
+    out = pq.read_table(tmp_path / "scores.parquet")
+    assert "ignored" not in out.column_names
+    columns["stories"][3] = 1
+    expected = engine.score_many(columns)
+    assert out["project_id"].to_pylist()[:2] == ["P-0", "P-1"]
+    assert out["risk_score"].to_pylist() == expected.risk_score.tolist()
+    assert out["risk_drivers"].to_pylist() == [a.risk_drivers for a in expected]
+    fines = expected.fine_exposure_estimate.tolist()
+    assert out["fine_exposure_estimate"].to_pylist() == fines
+
+    empty = tmp_path / f"empty{suffix}"
+    if suffix == ".parquet":
+        pq.write_table(table.slice(0, 0), empty)
+    else:
+        feather.write_feather(table.slice(0, 0), empty)
+    summary = score_parquet(empty, tmp_path / "empty.parquet", engine=engine)
+    assert summary["rows"] == summary["chunks"] == 0
+    assert pq.read_table(tmp_path / "empty.parquet").schema == out.schema
+
+    featureless = tmp_path / f"featureless{suffix}"
+    if suffix == ".parquet":
+        pq.write_table(table.select(["project_id", "ignored"]), featureless)
+    else:
+        feather.write_feather(table.select(["project_id", "ignored"]), featureless)
+    with pytest.raises(ValueError, match="no risk feature columns"):
+        score_parquet(featureless, tmp_path / "none.parquet", engine=engine)
+
+
+# ✅ TEST: Backtesting over forensic history
+def test_backtest_replays_history(engine):
+    """Batched backtest scores should match scalar replay, per project and model."""
+    from datetime import UTC, datetime, timedelta
+
+    from benchmarks.synthetic import generate_projects, iter_rows
+    from data_forensics import ForensicsEngine
+    from risk_engine import BacktestEngine
+
+    forensics = ForensicsEngine()
+    rows = list(iter_rows(generate_projects(25, seed=5)))
+    for i, row in enumerate(rows):
+        forensics.archive_ingestion(f"P{i % 4}", "dob_sync", row)
+    now = datetime.now(UTC)
+    backtest = BacktestEngine(forensics, engine, batch_size=7)
+    candidates = {"shadow": {"permit_age_score": 2.0}}
+
+    result = backtest.run(now - timedelta(days=1), now + timedelta(days=1), candidates)
+    assert result["n"] == 25 and result["models"] == ["1.0.0", "shadow"]
+    assert sorted(result["projects"]) == ["P0", "P1", "P2", "P3"]
+    for series in result["projects"].values():
+        assert series["timestamps"] == sorted(series["timestamps"])
+        expected = [
+            forensics.replay_risk_score(snapshot_id, engine).risk_score
+            for snapshot_id in series["snapshot_ids"]
+        ]
+        assert series["scores"]["1.0.0"].tolist() == expected
+        assert (series["scores"]["shadow"] >= series["scores"]["1.0.0"]).all()
+    assert result["differences"]["shadow"]["min"] >= 0
+
+    empty = backtest.run(now - timedelta(days=3), now - timedelta(days=2))
+    assert empty["n"] == 0 and empty["projects"] == {}
+    with pytest.raises(ValueError):
+        backtest.run(now, now - timedelta(days=1))
+
+
+# ✅ TEST: Backtesting archived DOB syncs
+def test_backtest_replays_dob_payloads(engine):
+    """DOB-shaped snapshots replay with classes derived from their violations."""
+    from datetime import UTC, datetime, timedelta
+
+    from data_forensics import ForensicsEngine
+    from risk_engine import BacktestEngine, extract_risk_features
+
+    hazard = {"violation_number": "1", "severity": "CLASS - 1"}
+    minor = {"violation_number": "2", "severity": "Non-Hazardous"}
+    resolved = {
+        "violation_number": "3",
+        "severity": "HAZARDOUS",
+        "ecb_violation_status": "RESOLVE",
+    }
+    forensics = ForensicsEngine()
+    for violations in ([], [minor], [minor, hazard, resolved]):
+        forensics.archive_ingestion(
+            "P1", "dob_sync", {"bbl": "1000010001", "violations": violations}
+        )
+    now = datetime.now(UTC)
+
+    result = BacktestEngine(forensics, engine).run(
+        now - timedelta(days=1), now + timedelta(days=1)
+    )
+    expected = [
+        engine.score_project(violation_classes=classes).risk_score
+        for classes in ([], ["Class A"], ["Class A", "Class C"])
+    ]
+    assert result["projects"]["P1"]["scores"]["1.0.0"].tolist() == expected
+    assert len(set(expected)) == 3
+
+    features = extract_risk_features(
+        {
+            "violations": None,
+            "stories": None,
+            "permit_age_days": "n/a",
+            "contractor_violation_rate": "0.5",
+            "building_type": 7,
+        }
+    )
+    assert features["violation_classes"] is None
+    assert features["stories"] == 1 and features["permit_age_days"] == 0
+    assert features["contractor_violation_rate"] == 0.5
+    assert features["building_type"] == "commercial"
+
+
+# ✅ TEST: Tenant-scoped backtests never replay another tenant's snapshots
+def test_backtest_tenant_isolation(engine):
+    """Two tenants sharing a project_id are replayed separately."""
+    from datetime import UTC, datetime, timedelta
+
+    from data_forensics import ForensicsEngine
+    from risk_engine import BacktestEngine
+
+    forensics = ForensicsEngine()
+    forensics.archive_ingestion("", "dob_sync", {"permit_age_days": 900}, "t1")
+    forensics.archive_ingestion("", "dob_sync", {"stories": 30}, "t2")
+    forensics.archive_ingestion("", "dob_sync", {"stories": 40}, "t2")
+    now = datetime.now(UTC)
+    window = (now - timedelta(days=1), now + timedelta(days=1))
+
+    result = BacktestEngine(forensics, engine).run(*window, tenant_id="t1")
+    assert result["n"] == 1
+    expected = engine.score_project(permit_age_days=900).risk_score
+    assert result["projects"][""]["scores"]["1.0.0"].tolist() == [expected]
+    assert BacktestEngine(forensics, engine).run(*window, tenant_id="t2")["n"] == 2
+    assert len(list(forensics.snapshots_between("", *window, tenant_id="t3"))) == 0
+    assert len(list(forensics.snapshots_between("", *window))) == 3
+
+
+# ✅ TEST: Backtest and scalar replay agree on archived payloads
+def test_backtest_matches_replay(engine):
+    """Batched backtest scores equal replay_risk_score for every payload shape."""
+    from datetime import UTC, datetime, timedelta
+
+    from data_forensics import ForensicsEngine
+    from risk_engine import BacktestEngine
+
+    hazard = {"violation_number": "1", "severity": "CLASS - 1"}
+    payloads = [
+        {"bbl": "1", "violations": [hazard], "permit_age_days": 700},
+        {"bbl": "1", "violations": [], "stories": "12", "building_type": None},
+        {"violation_classes": ("Class B",), "permit_age_days": None},
+        {"inspection_failures": "n/a", "milestone_delay_days": 45.5},
+        {"contractor_violation_rate": float("nan"), "complaint_count_90d": True},
+    ]
+    forensics = ForensicsEngine()
+    for n, payload in enumerate(payloads):
+        forensics.archive_ingestion(f"P{n}", "dob_sync", payload)
+    now = datetime.now(UTC)
+
+    result = BacktestEngine(forensics, engine, batch_size=2).run(
+        now - timedelta(days=1), now + timedelta(days=1)
+    )
+    for series in result["projects"].values():
+        expected = [
+            forensics.replay_risk_score(snapshot_id, engine).risk_score
+            for snapshot_id in series["snapshot_ids"]
+        ]
+        assert series["scores"]["1.0.0"].tolist() == expected
+    assert result["n"] == len(payloads)
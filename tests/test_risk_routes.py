@@ -0,0 +1,269 @@
+"""Tests for the risk API routes – batch streaming and portfolio index."""
+
+import json
+import re
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from api.v1.risk_routes import router
+from api.v1.streaming import StreamFormatError, iter_json_array, iter_ndjson
+from risk_engine.engine import DeterministicRiskEngine
+
+
+@pytest.fixture
+def client():
+    """Returns a TestClient mounted on the v1 risk router."""
+    app = FastAPI()
+    app.include_router(router)
+    return TestClient(app)
+
+
+ROWS = [
+    {"project_id": "A", "violation_classes": ["Class C"], "permit_age_days": 900},
+    {"project_id": "B", "stories": 0},
+    {"project_id": "C", "complaint_count_90d": 3, "building_type": "residential"},
+]
+
+
+def _lines(response):
+    return [json.loads(line) for line in response.text.splitlines() if line]
+
+
+# ✅ TEST: Batch endpoint scores a JSON array
+def test_batch_json_array(client):
+    """Valid rows are scored like score_project; invalid rows yield errors."""
+    response = client.post("/api/v1/projects/risk/batch?chunk_size=2", json=ROWS)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+
+    by_row = {line["row"]: line for line in _lines(response)}
+    assert set(by_row) == {0, 1, 2}
+    assert "error" in by_row[1]
+
+    engine = DeterministicRiskEngine()
+    expected = engine.score_project(violation_classes=["Class C"], permit_age_days=900)
+    assert by_row[0]["project_id"] == "A"
+    assert by_row[0]["risk_score"] == expected.risk_score
+    assert by_row[0]["risk_drivers"] == expected.risk_drivers
+
+
+# ✅ TEST: Batch endpoint accepts NDJSON and reports malformed tails
+def test_batch_ndjson(client):
+    """NDJSON bodies are parsed line by line; a bad line ends the stream."""
+    body = "\n".join(json.dumps(row) for row in ROWS) + "\n{not json\n"
+    response = client.post(
+        "/api/v1/projects/risk/batch",
+        content=body,
+        headers={"content-type": "application/x-ndjson"},
+    )
+    lines = _lines(response)
+    assert sorted(line["row"] for line in lines if "risk_score" in line) == [0, 2]
+    assert "Invalid JSON on line 4" in lines[-1]["error"]
+
+
+# ✅ TEST: A malformed array element ends the stream with a precise error
+def test_batch_json_array_malformed_element(client):
+    """Rows before a malformed element are scored; the error names the element."""
+    body = json.dumps(ROWS[:1])[:-1] + ', {"project_id": x}, ' + json.dumps(ROWS[2])
+    response = client.post(
+        "/api/v1/projects/risk/batch",
+        content=body + "]",
+        headers={"content-type": "application/json"},
+    )
+    lines = _lines(response)
+    assert [line["row"] for line in lines if "risk_score" in line] == [0]
+    assert lines[-1]["error"].startswith("Malformed JSON array element")
+
+
+async def _parse(parts, **options):
+    async def chunks():
+        for part in parts:
+            yield part.encode()
+
+    values = []
+    async for value in iter_json_array(chunks(), **options):
+        values.append(value)
+    return values
+
+
+# ✅ TEST: Array separators, split tokens and the pending-element cap
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "parts, error",
+    [
+        (["[1 2]"], "Expected ',' or ']'"),
+        (["[,,1]"], "Expected a JSON array element"),
+        (["[1,,2]"], "Expected a JSON array element"),
+        (["[1,]"], "Expected a JSON array element"),
+        (['[{"a": x}', ", 2]"], "Malformed JSON array element"),
+        (["[1, 2"], "Truncated JSON array body"),
+        (['[{"note": "', "x" * 100], "exceeds 64 characters"),
+    ],
+)
+async def test_iter_json_array_rejects_bad_arrays(parts, error):
+    """Bad separators and malformed elements fail fast instead of buffering."""
+    with pytest.raises(StreamFormatError, match=re.escape(error)):
+        await _parse(parts, max_element_chars=64)
+
+
+# ✅ TEST: Tokens split across chunks
+@pytest.mark.asyncio
+async def test_iter_json_array_split_tokens():
+    """Elements split mid-number, mid-literal or mid-escape still decode."""
+    parts = ['[ 1 , {"a": [1, 2]} , "x\\u00', 'e9", tr', "ue, -", "1.5e", "3 ]"]
+    assert await _parse(parts) == [1, {"a": [1, 2]}, "xé", True, -1500.0]
+
+
+# ✅ TEST: NDJSON lines split across chunks and the line cap
+@pytest.mark.asyncio
+async def test_iter_ndjson_lines_and_cap():
+    """Lines may span chunks; a line past the cap fails before it completes."""
+
+    async def chunks(parts):
+        for part in parts:
+            yield part.encode()
+
+    parts = ['{"a": ', "1}\n\n[2", ", 3]\n", "4"]
+    assert [value async for value in iter_ndjson(chunks(parts))] == [
+        {"a": 1},
+        [2, 3],
+        4,
+    ]
+    unbounded = ["x" * 40] * 10
+    with pytest.raises(StreamFormatError, match="Line 1 exceeds 64 bytes"):
+        async for _ in iter_ndjson(chunks(unbounded), max_line_bytes=64):
+            pass
+    with pytest.raises(StreamFormatError, match="Line 2 exceeds 64 bytes"):
+        async for _ in iter_ndjson(chunks(["1\n" + "x" * 65 + "\n"]), 64):
+            pass
+
+
+# ✅ TEST: Batch scoring feeds the portfolio index
+def test_batch_updates_portfolio_index(client):
+    """tenant_id on the batch endpoint records scores for the risk index."""
+    client.post("/api/v1/projects/risk/batch?tenant_id=batch-tenant", json=ROWS)
+    summary = client.get("/api/v1/portfolio/batch-tenant/risk-index").json()
+    assert summary["total_projects"] == 2
+    assert summary["top_projects"][0]["project_id"] == "A"
+
+
+# ✅ TEST: Rows without a project_id stay out of the portfolio index
+def test_batch_without_project_id_skips_portfolio_index(client):
+    """Anonymous rows are scored but never recorded under their row number."""
+    rows = [{"permit_age_days": 900}, ROWS[0], {"stories": 3}]
+    url = "/api/v1/projects/risk/batch?tenant_id=anon-tenant"
+    lines = _lines(client.post(url, json=rows))
+    assert [line["project_id"] for line in lines] == [None, "A", None]
+    assert all("risk_score" in line for line in lines)
+    summary = client.get("/api/v1/portfolio/anon-tenant/risk-index").json()
+    assert summary["total_projects"] == 1
+    assert summary["top_projects"][0]["project_id"] == "A"
+
+
+# ✅ TEST: Sensitivity endpoint sweeps the grid and validates its request
+def test_sensitivity_sweep_route(client):
+    """Grid scores match score_project; bad features and bounds are 422s."""
+    baseline = {"violation_classes": ["Class B"], "permit_age_days": 600}
+    url = "/api/v1/projects/P-7/risk/sensitivity"
+    response = client.post(
+        url,
+        json={"baseline": baseline, "ranges": {"permit_age_days": [0, 900]}},
+    )
+    assert response.status_code == 200
+    body = response.json()
+    engine = DeterministicRiskEngine()
+    assert body["project_id"] == "P-7"
+    assert body["baseline_score"] == engine.score_project(**baseline).risk_score
+    assert body["evaluated_points"] == 5
+    for (age,), score in zip(body["points"], body["scores"], strict=True):
+        expected = engine.score_project(**{**baseline, "permit_age_days": int(age)})
+        assert score == expected.risk_score
+
+    unsweepable = client.post(url, json={"ranges": {"building_type": [0, 1]}})
+    assert unsweepable.status_code == 422
+    assert "cannot be swept" in unsweepable.json()["detail"]
+    ranges = {"permit_age_days": [0, 900]}
+    for invalid in ({"method": "random"}, {"direction": "sideways"}, {"steps": 1}):
+        response = client.post(url, json={"ranges": ranges, **invalid})
+        assert response.status_code == 422
+
+
+# ✅ TEST: Risk GET responses carry ETags and honour If-None-Match
+def test_risk_etag_and_not_modified(client):
+    """Identical normalized queries share one ETag; a match returns 304."""
+    url = "/api/v1/projects/E-1/risk"
+    first = client.get(url, params={"violation_classes": "Class B, Class C"})
+    second = client.get(url, params={"violation_classes": "Class B,Class C,"})
+    assert first.status_code == second.status_code == 200
+    assert first.headers["etag"] == second.headers["etag"]
+    assert first.json() == second.json()
+
+    cached = client.get(
+        url,
+        params={"violation_classes": "Class B,Class C"},
+        headers={"If-None-Match": first.headers["etag"]},
+    )
+    assert cached.status_code == 304
+    assert cached.content == b""
+
+    other = client.get(url, params={"violation_classes": "Class A"})
+    assert other.headers["etag"] != first.headers["etag"]
+
+
+# ✅ TEST: ETags survive the cached assessment being rebuilt
+def test_risk_etag_stable_after_expiry(client):
+    """A rebuilt body with a new scored_at keeps its ETag, so 304 still works."""
+    from api.v1 import risk_routes
+
+    url = "/api/v1/projects/E-2/risk"
+    first = client.get(url, params={"permit_age_days": 400})
+    risk_routes._assessment_cache.clear()
+    risk_routes._response_cache.clear()
+    rebuilt = client.get(url, params={"permit_age_days": 400})
+    assert rebuilt.json()["scored_at"] != first.json()["scored_at"]
+    assert rebuilt.headers["etag"] == first.headers["etag"]
+
+    risk_routes._response_cache.clear()
+    revalidated = client.get(
+        url,
+        params={"permit_age_days": 400},
+        headers={"If-None-Match": first.headers["etag"]},
+    )
+    assert revalidated.status_code == 304
+
+
+# ✅ TEST: Enforcement forecast reuses the cached risk assessment
+def test_forecast_reuses_cached_assessment(client, monkeypatch):
+    """A forecast for already-scored inputs must not score them again."""
+    from api.v1 import risk_routes
+
+    params = {"violation_classes": "Class C", "permit_age_days": 400}
+    client.get("/api/v1/projects/F-1/risk", params=params)
+
+    def fail(**_):
+        raise AssertionError("score_project should not be called")
+
+    monkeypatch.setattr(risk_routes._risk_engine, "score_project", fail)
+    response = client.get("/api/v1/projects/F-1/enforcement-forecast", params=params)
+    assert response.status_code == 200
+    assert response.json()["project_id"] == "F-1"
+    assert "etag" in response.headers
+
+
+# ✅ TEST: Response cache evicts by TTL and size
+def test_response_cache_ttl_and_lru():
+    """Entries expire after the TTL and the least recently used is evicted."""
+    from api.v1.response_cache import ResponseCache
+
+    now = [0.0]
+    cache = ResponseCache(maxsize=2, ttl_seconds=10.0, clock=lambda: now[0])
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)  # evicts "b", the least recently used
+    assert cache.get("b") is None
+    now[0] = 10.0
+    assert cache.get("a") is None
+    assert cache.info()["hits"] == 1
@@ -1,14 +1,20 @@
 """Tests for TaskQueue – in-process background task queue."""
 
+import asyncio
+import threading
+import time
+
 import pytest
 
-from workers.task_queue import TaskQueue, JobStatus
+from workers.async_queue import AsyncTaskQueue
+from workers.runtime import WorkerPool
+from workers.task_queue import JobPriority, JobStatus, RetryAfterError, TaskQueue
 
 
 @pytest.fixture
 def queue():
-    """Returns a TaskQueue with a simple echo handler registered."""
-    q = TaskQueue(max_retries=3)
+    """Returns a TaskQueue with an echo handler and immediate retries."""
+    q = TaskQueue(max_retries=3, retry_base_delay=0)
     q.register("echo", lambda payload: payload)
     return q
 
@@ -80,3 +86,413 @@ def test_unregistered_task_fails(queue):
     job = queue.submit("unknown_task", {})
     with pytest.raises(ValueError, match="No handler registered"):
         queue.process(job.job_id)
+
+
+def _square(payload: dict) -> int:
+    """Module-level (picklable) CPU-bound handler."""
+    return payload["n"] ** 2
+
+
+# ✅ TEST: Worker pool runs I/O jobs concurrently
+def test_worker_pool_runs_jobs_concurrently(queue):
+    """Twenty 50 ms jobs on ten threads should finish in a fraction of 1 s."""
+    queue.register("sleep", lambda p: time.sleep(0.05) or p["i"])
+    jobs = [queue.submit("sleep", {"i": i}) for i in range(20)]
+    started = time.perf_counter()
+    with WorkerPool(queue, io_workers=10) as pool:
+        assert pool.drain(timeout=5)
+    assert time.perf_counter() - started < 0.6
+    assert [j.result for j in jobs] == list(range(20))
+    assert pool.stats()["completed"] == 20
+
+
+# ✅ TEST: Worker pool retries, dead-letters and uses the process pool
+def test_worker_pool_retries_and_cpu_pool(queue):
+    """Failures should retry to DEAD_LETTER; cpu_bound handlers run in processes."""
+    queue.register("fail", lambda p: (_ for _ in ()).throw(RuntimeError("boom")))
+    queue.register("square", _square, cpu_bound=True)
+    failing = queue.submit("fail", {})
+    squares = [queue.submit("square", {"n": n}) for n in range(5)]
+    orphan = queue.submit("unknown_task", {})
+
+    pool = WorkerPool(queue, io_workers=2, cpu_workers=2)
+    pool.start()
+    assert pool.drain(timeout=10)
+    pool.stop()
+
+    assert failing.status == JobStatus.DEAD_LETTER and failing.retry_count == 3
+    assert [j.result for j in squares] == [0, 1, 4, 9, 16]
+    assert orphan.status == JobStatus.DEAD_LETTER
+    assert pool.stats() == {
+        "io_in_flight": 0,
+        "cpu_in_flight": 0,
+        "completed": 5,
+        "failed": 6,
+    }
+
+
+# ✅ TEST: A returned RetryAfterError counts as a failed attempt
+def test_worker_pool_counts_returned_retry_after_as_failure():
+    """Pool stats follow the status the queue settles on, not the return path."""
+    queue = TaskQueue(retry_base_delay=0)
+    calls = []
+
+    def throttled(payload):
+        calls.append(payload)
+        return RetryAfterError(0) if len(calls) == 1 else "ok"
+
+    queue.register("throttled", throttled)
+    job = queue.submit("throttled", {})
+    with WorkerPool(queue, io_workers=1) as pool:
+        assert pool.drain(timeout=5)
+    assert job.status == JobStatus.COMPLETED and job.retry_count == 1
+    assert (pool.stats()["completed"], pool.stats()["failed"]) == (1, 1)
+
+
+# ✅ TEST: Graceful stop leaves unclaimed jobs pending
+def test_worker_pool_stop_is_graceful(queue):
+    """stop() should finish in-flight jobs and leave the rest for a later run."""
+    queue.register("sleep", lambda p: time.sleep(0.05))
+    jobs = [queue.submit("sleep", {}) for _ in range(6)]
+    pool = WorkerPool(queue, io_workers=2)
+    pool.start()
+    time.sleep(0.02)
+    pool.stop()
+    statuses = [j.status for j in jobs]
+    assert JobStatus.RUNNING not in statuses
+    assert statuses.count(JobStatus.COMPLETED) == 2
+    assert statuses.count(JobStatus.PENDING) == 4
+
+
+# ✅ TEST: Jobs cancelled by a hard stop go back to the queue
+def test_worker_pool_hard_stop_releases_cancelled_jobs(queue):
+    """A job still queued in the executor at stop(wait=False) is released."""
+    pool = WorkerPool(queue, io_workers=1)
+    pool._open()
+    gate = threading.Event()
+    pool._io_pool.submit(gate.wait)  # keep the only thread busy
+    job = queue.submit("echo", {})
+    assert queue.claim(timeout=0) is job
+    pool._submit(job)
+    pool._shutdown(wait=False)
+    gate.set()
+    assert job.status == JobStatus.PENDING and job.started_at is None
+    assert pool.stats()["io_in_flight"] == 0
+    assert queue.wait_idle(timeout=0) is False
+    assert queue.process_all_pending() == [job]
+
+
+# ✅ TEST: A sweep next to a live pool runs every job exactly once
+def test_sweep_alongside_worker_pool_runs_jobs_once(queue):
+    """process_all_pending and claim() never hand out the same job twice."""
+    runs: dict[int, int] = {}
+    lock = threading.Lock()
+
+    def count(payload):
+        time.sleep(0.001)
+        with lock:
+            runs[payload["i"]] = runs.get(payload["i"], 0) + 1
+
+    queue.register("count", count)
+    jobs = [queue.submit("count", {"i": i}) for i in range(200)]
+    with WorkerPool(queue, io_workers=4) as pool:
+        swept = queue.process_all_pending()
+        assert pool.drain(timeout=5)
+    assert runs == {i: 1 for i in range(200)}
+    assert len(swept) < 200
+    assert all(job.status == JobStatus.COMPLETED for job in jobs)
+
+    claimed = queue.submit("echo", {})
+    assert queue.claim(timeout=0) is claimed
+    with pytest.raises(ValueError, match="not ready"):
+        queue.process(claimed.job_id)
+    queue.finish(claimed, result="done")
+    with pytest.raises(ValueError, match="not ready"):
+        queue.process(claimed.job_id)
+
+
+# ✅ TEST: Async queue awaits coroutine handlers concurrently
+@pytest.mark.asyncio
+async def test_async_queue_runs_coroutines_concurrently():
+    """Coroutine jobs should overlap, bounded by the concurrency semaphore."""
+    queue = AsyncTaskQueue(concurrency=5)
+    active = peak = 0
+
+    async def scout(payload):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.05)
+        active -= 1
+        return payload["i"] * 2
+
+    queue.register("scout", scout)
+    queue.register("sync", lambda p: p["i"])
+    jobs = [queue.submit("scout", {"i": i}) for i in range(20)]
+    sync_job = queue.submit("sync", {"i": 7})
+    started = time.perf_counter()
+    async with queue:
+        await queue.join()
+    assert time.perf_counter() - started < 0.5
+    assert peak == 5
+    assert [j.result for j in jobs] == [i * 2 for i in range(20)]
+    assert sync_job.result == 7
+
+
+# ✅ TEST: Plain callables returning coroutines are awaited on the loop
+@pytest.mark.asyncio
+async def test_async_queue_awaits_coroutine_from_sync_handler():
+    """``lambda p: agent.run(**p)`` completes with the coroutine's result."""
+    queue = AsyncTaskQueue(max_retries=1, retry_base_delay=0)
+
+    async def run(i):
+        await asyncio.sleep(0)
+        if i < 0:
+            raise ValueError("negative")
+        return i + 1
+
+    queue.register("wrapped", lambda p: run(**p))
+    ok = queue.submit("wrapped", {"i": 4})
+    failing = queue.submit("wrapped", {"i": -1})
+    async with queue:
+        await queue.join()
+    assert ok.status == JobStatus.COMPLETED and ok.result == 5
+    assert failing.status == JobStatus.DEAD_LETTER and "negative" in failing.error
+
+
+# ✅ TEST: Async queue retries and dead-letters like the sync queue
+@pytest.mark.asyncio
+async def test_async_queue_retry_and_dead_letter():
+    """Failures retry until max_retries, then land in DEAD_LETTER."""
+    queue = AsyncTaskQueue(max_retries=3, concurrency=2, retry_base_delay=0)
+    attempts = {"flaky": 0}
+
+    async def flaky(payload):
+        attempts["flaky"] += 1
+        if attempts["flaky"] < 2:
+            raise ConnectionError("provider brownout")
+        return "ok"
+
+    async def broken(payload):
+        raise RuntimeError("boom")
+
+    queue.register("flaky", flaky)
+    queue.register("broken", broken)
+    recovered = queue.submit("flaky", {})
+    dead = queue.submit("broken", {})
+    async with queue:
+        await queue.join()
+        late = queue.submit("flaky", {})
+        await queue.join()
+
+    assert recovered.status == JobStatus.COMPLETED and recovered.retry_count == 1
+    assert dead.status == JobStatus.DEAD_LETTER and "boom" in dead.error
+    assert late.status == JobStatus.COMPLETED
+    assert queue.get_dead_letter_jobs() == [dead]
+    single = queue.submit("broken", {})
+    assert (await queue.process_async(single.job_id)).status == JobStatus.RETRYING
+
+
+# ✅ TEST: Status index and FIFO ready queue track every transition
+def test_status_index_and_ready_fifo(queue):
+    """Claims should be FIFO across tasks; listings and stats follow transitions."""
+    queue.register("other", lambda p: p)
+    first = queue.submit("echo", {"n": 1})
+    second = queue.submit("other", {"n": 2})
+    third = queue.submit("echo", {"n": 3})
+
+    assert queue.claim(timeout=0) is first
+    assert queue.claim(timeout=0, accept=lambda name: name == "echo") is third
+    assert queue.get_jobs_by_status(JobStatus.RUNNING) == [first, third]
+    assert queue.get_jobs_by_status(JobStatus.PENDING) == [second]
+
+    queue.finish(first, error=RuntimeError("flaky"))
+    queue.finish(third, result="done")
+    assert queue.get_jobs_by_status(JobStatus.RETRYING) == [first]
+    # A retried job rejoins the back of the ready queue.
+    assert queue.claim(timeout=0) is second
+    queue.release(second)
+    assert [j.job_id for j in queue.process_all_pending()] == [
+        second.job_id,
+        first.job_id,
+    ]
+    assert queue.claim(timeout=0) is None
+    assert queue.get_job_stats() == {
+        "pending": 0,
+        "running": 0,
+        "completed": 3,
+        "failed": 0,
+        "retrying": 0,
+        "dead_letter": 0,
+    }
+
+
+# ✅ TEST: Sweeps drop the scheduler entries of jobs they ran
+def test_sweeps_do_not_accumulate_stale_entries(queue):
+    """Repeated sweeps leave the scheduler holding only the ready set."""
+    for _ in range(3):
+        for n in range(50):
+            queue.submit("echo", {"n": n}, tenant_id=f"t{n % 3}")
+        assert len(queue.process_all_pending()) == 50
+        assert queue.process_all_pending() == []
+        assert len(queue._scheduler) == 0
+
+    queue.submit("echo", {"n": "late"})
+    assert len(queue._scheduler) == 1
+    assert len(queue.process_all_pending()) == 1
+
+
+# ✅ TEST: claim keeps waiting through unrelated changes
+def test_claim_ignores_unrelated_changes(queue):
+    """Rejected submissions do not end the wait; only a match or wake() does."""
+    queue.register("other", lambda p: p)
+
+    def later():
+        time.sleep(0.05)
+        queue.submit("other", {})
+        time.sleep(0.05)
+        queue.submit("echo", {"n": 1})
+
+    threading.Thread(target=later).start()
+    job = queue.claim(timeout=2, accept=lambda name: name == "echo")
+    assert job is not None and job.payload == {"n": 1}
+
+    threading.Timer(0.05, queue.wake).start()
+    started = time.perf_counter()
+    assert queue.claim(accept=lambda name: name == "echo") is None
+    assert time.perf_counter() - started < 1
+
+
+def _claim_all(queue, limit=1_000):
+    """Claim and complete jobs one at a time, returning them in dispatch order."""
+    order = []
+    while len(order) < limit and (job := queue.claim(timeout=0)) is not None:
+        order.append(job)
+        queue.finish(job, result=None)
+    return order
+
+
+# ✅ TEST: Priorities and tenant fairness
+def test_priority_and_fair_share(queue):
+    """Critical jobs jump the line; a small tenant is not stuck behind a backlog."""
+    bulk = [queue.submit("echo", {"i": i}, tenant_id="drone-co") for i in range(200)]
+    small = [queue.submit("echo", {"i": i}, tenant_id="site-a") for i in range(3)]
+    critical = queue.submit(
+        "echo", {"swo": True}, tenant_id="site-b", priority=JobPriority.CRITICAL
+    )
+    order = _claim_all(queue)
+    assert len(order) == 204
+    assert order[0] is critical
+    # site-a alternates with drone-co instead of waiting for all 200 jobs.
+    assert [order.index(job) for job in small] == [2, 4, 6]
+    assert [j for j in order if j.tenant_id == "drone-co"] == bulk
+
+
+# ✅ TEST: Weighted shares and per-tenant concurrency caps
+def test_tenant_weights_and_concurrency_caps():
+    """Weights set dispatch shares; capped tenants yield to others."""
+    queue = TaskQueue(tenant_concurrency=2)
+    queue.register("echo", lambda payload: payload)
+    queue.set_tenant_weight("gold", 3)
+    for tenant in ("gold", "basic"):
+        for i in range(40):
+            queue.submit("echo", {"i": i}, tenant_id=tenant)
+    first = [job.tenant_id for job in _claim_all(queue, limit=40)]
+    assert first.count("gold") == 30 and first.count("basic") == 10
+
+    running = [queue.claim(timeout=0) for _ in range(5)]
+    assert [job.tenant_id for job in running[:4]].count("gold") == 2
+    assert running[4] is None  # both tenants at their cap of 2
+    queue.set_tenant_concurrency("basic", None)
+    assert queue.claim(timeout=0).tenant_id == "basic"
+
+
+# ✅ TEST: Retries back off exponentially with jitter and a cap
+def test_retry_backoff_schedule(monkeypatch):
+    """Failed jobs wait out a capped, jittered exponential backoff."""
+    import workers.task_queue as task_queue
+
+    now = [time.monotonic()]
+    monkeypatch.setattr(task_queue.time, "monotonic", lambda: now[0])
+    queue = TaskQueue(
+        max_retries=10, retry_base_delay=10, retry_max_delay=35, retry_jitter=0.5
+    )
+    queue.register("fail", lambda p: (_ for _ in ()).throw(ConnectionError("503")))
+    job = queue.submit("fail", {})
+    delays = []
+    for _ in range(4):
+        queue.process(job.job_id)
+        delays.append(queue._retry_due[job.job_id] - now[0])
+        # Not eligible while backing off.
+        assert queue.claim(timeout=0) is None
+        assert queue.process_all_pending() == []
+        with pytest.raises(ValueError, match="not ready"):
+            queue.process(job.job_id)
+        now[0] += delays[-1]
+    assert 4.9 < delays[0] <= 10 and 9.9 < delays[1] <= 20
+    assert 17.4 < delays[2] <= 35 and 17.4 < delays[3] <= 35  # capped at 35 s
+    assert job.status == JobStatus.RETRYING and job.retry_at is not None
+
+
+# ✅ TEST: A default queue backs off instead of retrying on the next sweep
+def test_default_queue_backs_off_failed_jobs():
+    """TaskQueue() schedules a failed job on the backoff heap."""
+    queue = TaskQueue()
+    queue.register("fail", lambda p: (_ for _ in ()).throw(ConnectionError("503")))
+    job = queue.submit("fail", {})
+    assert queue.process_all_pending() == [job]
+    assert job.status == JobStatus.RETRYING and job.retry_count == 1
+    assert [entry[2] for entry in queue._delayed] == [job.job_id]
+    assert 0.4 < queue._next_due_in() <= 1.0
+    assert queue.process_all_pending() == []
+    assert queue.get_job_stats()["retrying"] == 1
+
+
+# ✅ TEST: Claim sleeps until the next retry is due
+def test_claim_waits_for_retry_after_hint():
+    """A RetryAfterError hint sets the delay; claim wakes when it expires."""
+    queue = TaskQueue(retry_base_delay=60, retry_max_delay=0.2)
+    calls = []
+
+    def rate_limited(payload):
+        calls.append(time.perf_counter())
+        if len(calls) == 1:
+            raise RetryAfterError(0.1, "429 from provider")
+        if len(calls) == 2:
+            return RetryAfterError(5)  # capped by retry_max_delay
+        return "ok"
+
+    queue.register("vlm", rate_limited)
+    job = queue.submit("vlm", {})
+    queue.process(job.job_id)
+    assert job.error == "429 from provider"
+    assert queue.claim(timeout=0.02) is None
+    assert queue.claim(timeout=1) is job
+    assert 0.095 < time.perf_counter() - calls[0] < 0.5
+    queue.release(job)
+    with WorkerPool(queue, io_workers=1, poll_interval=2) as pool:
+        assert pool.drain(timeout=2)
+    assert job.status == JobStatus.COMPLETED and job.retry_count == 2
+    assert 0.195 < calls[2] - calls[1] < 0.6
+
+
+# ✅ TEST: Async queue sleeps through the backoff
+@pytest.mark.asyncio
+async def test_async_queue_backoff():
+    """The async dispatcher retries after the backoff without busy-polling."""
+    queue = AsyncTaskQueue(retry_base_delay=0.05, retry_jitter=0)
+    attempts = []
+
+    async def flaky(payload):
+        attempts.append(time.perf_counter())
+        if len(attempts) < 3:
+            raise ConnectionError("brownout")
+        return "ok"
+
+    queue.register("flaky", flaky)
+    job = queue.submit("flaky", {})
+    async with queue:
+        await asyncio.wait_for(queue.join(), 2)
+    assert job.status == JobStatus.COMPLETED
+    gaps = [b - a for a, b in zip(attempts, attempts[1:], strict=False)]
+    assert 0.045 < gaps[0] < 0.3 and 0.095 < gaps[1] < 0.4
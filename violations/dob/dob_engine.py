@@ -3,11 +3,16 @@ from typing import Dict, List
 
 import requests
 
+from core.exceptions import DataSourceError
 
-# 1. Standalone function for direct import (Fixes app.py line 16)
-def fetch_live_dob_alerts(query_params: dict) -> list[dict]:
+
+# 1. Standalone functions for direct import (Fixes app.py line 16)
+def fetch_dob_violations(query_params: dict, limit: int = 10) -> list[dict]:
     """
-    Queries NYC OpenData for active DOB ECB Violations using BBL.
+    Queries NYC OpenData for the *limit* most recent DOB ECB Violations of a BBL.
+
+    Raises ``DataSourceError`` when the API is unreachable or does not
+    answer 200, so callers can tell an outage from a BBL with no violations.
     """
     bbl = query_params.get("bbl")
     if not bbl:
@@ -19,24 +24,42 @@ def fetch_live_dob_alerts(query_params: dict) -> list[dict]:
     headers = {"X-App-Token": app_token} if app_token else {}
     params = {
         "bbl": str(bbl),
-        "$limit": 10,
+        "$limit": limit,
         "$order": "issue_date DESC", 
-        "$select": "violation_number, violation_type, issue_date, violation_category, respondent_name"
+        "$select": (
+            "violation_number, violation_type, issue_date, violation_category, "
+            "respondent_name, severity, ecb_violation_status"
+        ),
     }
 
     try:
         response = requests.get(endpoint, params=params, headers=headers, timeout=10)
-        if response.status_code == 200:
-            data = response.json()
-            for item in data:
-                if 'issue_date' in item:
-                    item['issue_date'] = item['issue_date'][:10]
-                if 'respondent_name' in item:
-                    item['respondent_name'] = str(item['respondent_name']).title()
-            return data
-        return []
+        if response.status_code != 200:
+            raise DataSourceError(f"DOB API returned HTTP {response.status_code}")
+        data = response.json()
+    except DataSourceError:
+        raise
     except Exception as e:
-        print(f"DOB API Error: {e}")
+        raise DataSourceError(f"DOB API Error: {e}") from e
+
+    for item in data:
+        if 'issue_date' in item:
+            item['issue_date'] = item['issue_date'][:10]
+        if 'respondent_name' in item:
+            item['respondent_name'] = str(item['respondent_name']).title()
+    return data
+
+
+def fetch_live_dob_alerts(query_params: dict) -> list[dict]:
+    """
+    Queries NYC OpenData for active DOB ECB Violations using BBL.
+
+    Returns an empty list when the API fails (see ``fetch_dob_violations``).
+    """
+    try:
+        return fetch_dob_violations(query_params)
+    except DataSourceError as e:
+        print(e.message)
         return []
 
 # 2. Class wrapper for structural consistency
@@ -46,5 +69,9 @@ class DOBEngine:
     def fetch_live_dob_alerts(query_params: dict) -> list[dict]:
         return fetch_live_dob_alerts(query_params)
 
+    @staticmethod
+    def fetch_violations(query_params: dict, limit: int = 10) -> list[dict]:
+        return fetch_dob_violations(query_params, limit)
+
 # 3. Explicit Export
-__all__ = ['DOBEngine', 'fetch_live_dob_alerts']
+__all__ = ['DOBEngine', 'fetch_dob_violations', 'fetch_live_dob_alerts']
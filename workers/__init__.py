@@ -1,3 +1,13 @@
-from .task_queue import TaskQueue, JobStatus, Job
+from .async_queue import AsyncTaskQueue
+from .runtime import WorkerPool
+from .task_queue import Job, JobPriority, JobStatus, RetryAfterError, TaskQueue
 
-__all__ = ["TaskQueue", "JobStatus", "Job"]
+__all__ = [
+    "TaskQueue",
+    "JobPriority",
+    "JobStatus",
+    "Job",
+    "WorkerPool",
+    "AsyncTaskQueue",
+    "RetryAfterError",
+]
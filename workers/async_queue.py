@@ -0,0 +1,164 @@
+"""asyncio-native execution mode for :class:`TaskQueue`."""
+
+from __future__ import annotations
+
+import asyncio
+import inspect
+import threading
+from collections.abc import Callable
+from typing import Any
+
+from .task_queue import Job, TaskQueue
+
+
+def _is_async(handler: Callable) -> bool:
+    """Whether *handler* is an ``async def`` function or async callable object."""
+    return inspect.iscoroutinefunction(handler) or (
+        callable(handler) and inspect.iscoroutinefunction(type(handler).__call__)
+    )
+
+
+class AsyncTaskQueue(TaskQueue):
+    """Task queue that awaits coroutine handlers on one event loop.
+
+    Jobs, statuses, retries and dead-lettering are exactly those of
+    :class:`TaskQueue`; only execution differs.  A dispatcher task started
+    by :meth:`start` runs up to *concurrency* jobs at once as tasks on the
+    running loop.  Coroutine handlers (``async def`` functions, such as
+    ``VisualScoutAgent.run``) are awaited directly; plain callables are run
+    in the loop's default thread pool so they cannot block it, and an
+    awaitable they return is then awaited on the loop.  Keyword
+    *options* (tenant caps, retry backoff) are passed to :class:`TaskQueue`.
+    """
+
+    def __init__(
+        self, max_retries: int = 3, concurrency: int = 16, **options: Any
+    ) -> None:
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        super().__init__(max_retries, **options)
+        self.concurrency = concurrency
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._event: asyncio.Event | None = None
+        self._loop_thread: int | None = None
+        self._dispatcher: asyncio.Task | None = None
+        self._running: set[asyncio.Task] = set()
+        self._stopping = False
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    def start(self) -> None:
+        """Start dispatching on the running event loop."""
+        if self._dispatcher is not None:
+            raise RuntimeError("AsyncTaskQueue is already running")
+        self._bind_loop()
+        self._stopping = False
+        self._dispatcher = asyncio.create_task(self._dispatch())
+
+    async def join(self) -> None:
+        """Wait until no job is pending, retrying or running."""
+        self._bind_loop()
+        while self._has_active_jobs():
+            self._event.clear()
+            if not self._has_active_jobs():
+                return
+            await self._event.wait()
+
+    async def stop(self) -> None:
+        """Stop claiming jobs and wait for running ones to finish."""
+        self._stopping = True
+        if self._event is not None:
+            self._event.set()
+        dispatcher, self._dispatcher = self._dispatcher, None
+        if dispatcher is not None:
+            await dispatcher
+        if self._running:
+            await asyncio.gather(*self._running, return_exceptions=True)
+
+    async def __aenter__(self) -> AsyncTaskQueue:
+        self.start()
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        await self.stop()
+
+    async def process_async(self, job_id: str) -> Job:
+        """Run a single job on the current loop (the async :meth:`process`)."""
+        job = self._jobs.get(job_id)
+        if job is None:
+            raise KeyError(f"Job {job_id} not found")
+        if self.get_handler(job.task_name) is None:
+            raise ValueError(f"No handler registered for task '{job.task_name}'")
+        with self._lock:
+            if not self._take(job):
+                raise ValueError(f"Job {job_id} is not ready to run ({job.status})")
+        return await self._execute(job)
+
+    # ------------------------------------------------------------------
+    # Dispatch
+    # ------------------------------------------------------------------
+
+    def _bind_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._event = asyncio.Event()
+            self._loop_thread = threading.get_ident()
+
+    def _notify(self) -> None:
+        super()._notify()
+        if self._event is None or self._loop is None or self._loop.is_closed():
+            return
+        if threading.get_ident() == self._loop_thread:
+            self._event.set()
+        else:
+            self._loop.call_soon_threadsafe(self._event.set)
+
+    def _has_active_jobs(self) -> bool:
+        with self._lock:
+            return self._active_count() > 0
+
+    async def _dispatch(self) -> None:
+        slots = asyncio.Semaphore(self.concurrency)
+        while not self._stopping:
+            await slots.acquire()
+            self._event.clear()
+            job = None if self._stopping else self.claim(timeout=0)
+            if job is None:
+                slots.release()
+                if not self._stopping:
+                    await self._idle()
+                continue
+            task = asyncio.create_task(self._execute(job))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+            task.add_done_callback(lambda _: slots.release())
+
+    async def _idle(self) -> None:
+        """Sleep until notified or until the next retry backoff expires."""
+        with self._lock:
+            due_in = self._next_due_in()
+        try:
+            await asyncio.wait_for(self._event.wait(), due_in)
+        except TimeoutError:
+            pass
+
+    async def _execute(self, job: Job) -> Job:
+        handler = self.get_handler(job.task_name)
+        try:
+            if handler is None:
+                raise ValueError(f"No handler registered for task '{job.task_name}'")
+            result: Any
+            if _is_async(handler):
+                result = await handler(job.payload)
+            else:
+                result = await asyncio.to_thread(handler, job.payload)
+                if inspect.isawaitable(result):
+                    # e.g. ``lambda p: agent.run(**p)``: a plain callable
+                    # returning a coroutine, which belongs on the loop.
+                    result = await result
+        except Exception as exc:  # noqa: BLE001
+            return self.finish(job, error=exc)
+        return self.finish(job, result=result)
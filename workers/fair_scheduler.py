@@ -0,0 +1,180 @@
+"""Priority levels with deficit round robin across tenants."""
+
+from __future__ import annotations
+
+from collections import deque
+from collections.abc import Callable
+
+# (sequence, job_id); sequences grow with submission/retry time.
+Entry = tuple[int, str]
+
+
+class _Level:
+    """Ready jobs of one priority level."""
+
+    __slots__ = ("queues", "ring", "deficits")
+
+    def __init__(self) -> None:
+        # tenant -> task_name -> FIFO of entries; a tenant is in ``ring``
+        # exactly while it has an entry in ``queues``
+        self.queues: dict[str, dict[str, deque[Entry]]] = {}
+        self.ring: deque[str] = deque()
+        self.deficits: dict[str, float] = {}
+
+
+class FairScheduler:
+    """Chooses the next ready job.
+
+    Higher priority levels are always served first.  Within a level,
+    tenants take turns by deficit round robin: a tenant reaching the head of
+    the ring is credited its weight (default 1.0) and runs one job per whole
+    credit before yielding the head, so a tenant's share of dispatches is
+    proportional to its weight however many jobs it has queued.  Within a
+    tenant, jobs run oldest first.
+
+    Entries are never removed eagerly; ``is_live(sequence, job_id)`` tells
+    whether an entry still stands for a ready job, and dead entries are
+    dropped when they reach the head of their FIFO or when
+    :meth:`live_entries` walks past them.
+    """
+
+    def __init__(self) -> None:
+        self._levels: dict[int, _Level] = {}
+        self._weights: dict[str, float] = {}
+
+    def set_weight(self, tenant_id: str, weight: float) -> None:
+        if not weight >= 1:
+            raise ValueError("Tenant weight must be at least 1")
+        self._weights[tenant_id] = weight
+
+    def push(
+        self,
+        priority: int,
+        tenant_id: str,
+        task_name: str,
+        entry: Entry,
+        front: bool = False,
+    ) -> None:
+        level = self._levels.get(priority)
+        if level is None:
+            level = self._levels[priority] = _Level()
+        queues = level.queues.get(tenant_id)
+        if queues is None:
+            queues = level.queues[tenant_id] = {}
+            level.ring.append(tenant_id)
+        fifo = queues.get(task_name)
+        if fifo is None:
+            fifo = queues[task_name] = deque()
+        if front:
+            fifo.appendleft(entry)
+        else:
+            fifo.append(entry)
+
+    def pick(
+        self,
+        is_live: Callable[[int, str], bool],
+        accept: Callable[[str], bool] | None = None,
+        eligible: Callable[[str], bool] | None = None,
+    ) -> str | None:
+        """Return the job id to run next and charge its tenant, or ``None``.
+
+        *accept* filters task names and *eligible* tenants (e.g. by
+        concurrency cap); skipped tenants keep their place and credit.
+        """
+        for priority in sorted(self._levels, reverse=True):
+            level = self._levels[priority]
+            job_id = self._pick_level(level, is_live, accept, eligible)
+            if job_id is not None:
+                return job_id
+            if not level.ring:
+                del self._levels[priority]
+        return None
+
+    def live_entries(self, is_live: Callable[[int, str], bool]) -> list[str]:
+        """Ids of every ready job, by priority then age.
+
+        Dead entries met on the way are dropped, so repeated sweeps cost
+        only the current ready set.
+        """
+        entries = []
+        for priority in list(self._levels):
+            level = self._levels[priority]
+            for tenant_id in list(level.queues):
+                queues = level.queues[tenant_id]
+                for task_name in list(queues):
+                    fifo = deque(e for e in queues[task_name] if is_live(*e))
+                    if fifo:
+                        queues[task_name] = fifo
+                        entries.extend((-priority, *entry) for entry in fifo)
+                    else:
+                        del queues[task_name]
+                if not queues:
+                    del level.queues[tenant_id]
+                    level.ring.remove(tenant_id)
+                    level.deficits.pop(tenant_id, None)
+            if not level.ring:
+                del self._levels[priority]
+        entries.sort()
+        # A released job may have two live entries with the same sequence.
+        return list(dict.fromkeys(job_id for _, _, job_id in entries))
+
+    def __len__(self) -> int:
+        """Number of stored entries, dead ones included."""
+        return sum(
+            len(fifo)
+            for level in self._levels.values()
+            for queues in level.queues.values()
+            for fifo in queues.values()
+        )
+
+    def _pick_level(
+        self,
+        level: _Level,
+        is_live: Callable[[int, str], bool],
+        accept: Callable[[str], bool] | None,
+        eligible: Callable[[str], bool] | None,
+    ) -> str | None:
+        ring = level.ring
+        for _ in range(len(ring)):
+            tenant_id = ring[0]
+            queues = level.queues[tenant_id]
+            fifo = None
+            if eligible is None or eligible(tenant_id):
+                fifo = _oldest(queues, is_live, accept)
+            if not queues:
+                ring.popleft()
+                del level.queues[tenant_id]
+                level.deficits.pop(tenant_id, None)
+                continue
+            if fifo is None:
+                ring.rotate(-1)
+                continue
+            deficit = level.deficits.get(tenant_id, 0.0)
+            if deficit < 1:
+                deficit += self._weights.get(tenant_id, 1.0)
+            deficit -= 1
+            level.deficits[tenant_id] = deficit
+            if deficit < 1:
+                ring.rotate(-1)
+            return fifo[0][1]
+        return None
+
+
+def _oldest(
+    queues: dict[str, deque[Entry]],
+    is_live: Callable[[int, str], bool],
+    accept: Callable[[str], bool] | None,
+) -> deque[Entry] | None:
+    """FIFO holding the tenant's oldest live entry among accepted tasks."""
+    best = None
+    for task_name in list(queues):
+        fifo = queues[task_name]
+        while fifo and not is_live(*fifo[0]):
+            fifo.popleft()
+        if not fifo:
+            del queues[task_name]
+        elif (accept is None or accept(task_name)) and (
+            best is None or fifo[0][0] < best[0][0]
+        ):
+            best = fifo
+    return best
@@ -0,0 +1,198 @@
+"""Concurrent worker runtime that pulls jobs from a :class:`TaskQueue`."""
+
+from __future__ import annotations
+
+import logging
+import threading
+from concurrent.futures import (
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+)
+
+from .task_queue import Job, JobStatus, TaskQueue
+
+logger = logging.getLogger(__name__)
+
+
+class WorkerPool:
+    """Runs queued jobs on a thread pool (I/O) and a process pool (CPU).
+
+    A dispatcher claims ready jobs from the queue only while a worker of the
+    matching kind is free, so jobs are never claimed ahead of capacity.
+    Handlers registered with ``cpu_bound=True`` run in the process pool when
+    *cpu_workers* > 0 and on the thread pool otherwise.
+
+    Use :meth:`start` to dispatch from a background thread or
+    :meth:`run_forever` to dispatch on the calling thread; :meth:`drain`
+    waits for the queue to empty and :meth:`stop` shuts down gracefully,
+    letting in-flight jobs finish.
+    """
+
+    def __init__(
+        self,
+        queue: TaskQueue,
+        io_workers: int = 8,
+        cpu_workers: int = 0,
+        poll_interval: float = 0.5,
+    ) -> None:
+        if io_workers < 1:
+            raise ValueError("io_workers must be at least 1")
+        if cpu_workers < 0:
+            raise ValueError("cpu_workers must not be negative")
+        self.queue = queue
+        self.io_workers = io_workers
+        self.cpu_workers = cpu_workers
+        self.poll_interval = poll_interval
+        self._io_pool: ThreadPoolExecutor | None = None
+        self._cpu_pool: ProcessPoolExecutor | None = None
+        self._lock = threading.Lock()
+        self._in_flight = {"io": 0, "cpu": 0}
+        self._stopping = threading.Event()
+        self._thread: threading.Thread | None = None
+        self.completed = 0
+        self.failed = 0
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    def start(self) -> None:
+        """Start dispatching jobs from a background thread."""
+        if self._thread is not None:
+            raise RuntimeError("WorkerPool is already running")
+        self._open()
+        self._thread = threading.Thread(
+            target=self._dispatch, name="worker-pool-dispatcher", daemon=True
+        )
+        self._thread.start()
+
+    def run_forever(self) -> None:
+        """Dispatch jobs on the calling thread until :meth:`stop` is called."""
+        self._open()
+        try:
+            self._dispatch()
+        finally:
+            self._shutdown(wait=True)
+
+    def drain(self, timeout: float | None = None) -> bool:
+        """Wait until no job is pending, retrying or running.
+
+        Returns ``False`` if *timeout* expired first.
+        """
+        return self.queue.wait_idle(timeout)
+
+    def stop(self, wait: bool = True) -> None:
+        """Stop claiming jobs; with *wait*, let in-flight jobs finish first."""
+        self._stopping.set()
+        self.queue.wake()
+        thread, self._thread = self._thread, None
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+            self._shutdown(wait)
+
+    def __enter__(self) -> WorkerPool:
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.stop()
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "io_in_flight": self._in_flight["io"],
+                "cpu_in_flight": self._in_flight["cpu"],
+                "completed": self.completed,
+                "failed": self.failed,
+            }
+
+    # ------------------------------------------------------------------
+    # Dispatch
+    # ------------------------------------------------------------------
+
+    def _open(self) -> None:
+        self._stopping.clear()
+        self._io_pool = ThreadPoolExecutor(
+            max_workers=self.io_workers, thread_name_prefix="worker-io"
+        )
+        if self.cpu_workers:
+            self._cpu_pool = ProcessPoolExecutor(max_workers=self.cpu_workers)
+
+    def _shutdown(self, wait: bool) -> None:
+        for pool in (self._io_pool, self._cpu_pool):
+            if pool is not None:
+                pool.shutdown(wait=wait, cancel_futures=not wait)
+        self._io_pool = self._cpu_pool = None
+
+    def _kind(self, task_name: str) -> str:
+        if self._cpu_pool is not None and self.queue.is_cpu_bound(task_name):
+            return "cpu"
+        return "io"
+
+    def _has_capacity(self, task_name: str) -> bool:
+        kind = self._kind(task_name)
+        limit = self.cpu_workers if kind == "cpu" else self.io_workers
+        return self._in_flight[kind] < limit
+
+    def _dispatch(self) -> None:
+        while not self._stopping.is_set():
+            job = self.queue.claim(self.poll_interval, accept=self._has_capacity)
+            if job is not None and not self._stopping.is_set():
+                self._submit(job)
+            elif job is not None:
+                # Claimed while stopping: hand it back for the next run.
+                self.queue.release(job)
+
+    def _submit(self, job: Job) -> None:
+        handler = self.queue.get_handler(job.task_name)
+        if handler is None:
+            error = ValueError(f"No handler registered for task '{job.task_name}'")
+            self._finish(job, None, error)
+            return
+        kind = self._kind(job.task_name)
+        pool: Executor = self._cpu_pool if kind == "cpu" else self._io_pool
+        with self._lock:
+            self._in_flight[kind] += 1
+        try:
+            future = pool.submit(handler, job.payload)
+        except Exception as exc:  # noqa: BLE001
+            self._done(job, kind, None, exc)
+            return
+        future.add_done_callback(lambda f: self._collect(job, kind, f))
+
+    def _collect(self, job: Job, kind: str, future: Future) -> None:
+        if future.cancelled():
+            # Cancelled by stop(wait=False) before it ran: hand the job back.
+            with self._lock:
+                self._in_flight[kind] -= 1
+            self.queue.release(job)
+            return
+        error = future.exception()
+        self._done(job, kind, None if error else future.result(), error)
+
+    def _done(
+        self, job: Job, kind: str, result: object, error: BaseException | None
+    ) -> None:
+        with self._lock:
+            self._in_flight[kind] -= 1
+        self._finish(job, result, error)
+
+    def _finish(self, job: Job, result: object, error: BaseException | None) -> None:
+        # Counted from the status the queue settles on, so a returned
+        # RetryAfterError is a failed attempt, not a completion.  Held
+        # across finish() so stats() agrees with the queue once it is idle.
+        with self._lock:
+            completed = (
+                self.queue.finish(job, result=result, error=error).status
+                == JobStatus.COMPLETED
+            )
+            if completed:
+                self.completed += 1
+            else:
+                self.failed += 1
+        if not completed:
+            logger.warning(
+                "Job %s (%s) failed: %s", job.job_id, job.task_name, job.error
+            )
@@ -2,13 +2,20 @@
 
 from __future__ import annotations
 
+import heapq
+import itertools
+import random
+import threading
+import time
 import uuid
-from datetime import datetime, timezone
-from enum import StrEnum
+from datetime import datetime, timedelta, timezone
+from enum import IntEnum, StrEnum
 from typing import Any, Callable
 
 from pydantic import BaseModel, Field
 
+from .fair_scheduler import FairScheduler
+
 
 class JobStatus(StrEnum):
     PENDING = "pending"
@@ -19,6 +26,35 @@ class JobStatus(StrEnum):
     DEAD_LETTER = "dead_letter"
 
 
+class JobPriority(IntEnum):
+    """Dispatch priority; ready jobs of a higher level always run first."""
+
+    LOW = 0
+    NORMAL = 1
+    HIGH = 2
+    CRITICAL = 3
+
+
+class RetryAfterError(Exception):
+    """Raise or return from a handler to retry its job after *delay* seconds.
+
+    Any exception with a numeric ``retry_after`` attribute is honoured the
+    same way, e.g. a provider's ``Retry-After`` header on a 429 or 503.
+    The hint replaces the computed backoff but still consumes a retry.
+    """
+
+    def __init__(self, delay: float, reason: str | None = None) -> None:
+        super().__init__(delay, reason)
+        self.retry_after = delay
+
+    def __str__(self) -> str:
+        return self.args[1] or f"retry after {self.retry_after:g}s"
+
+
+_READY_STATUSES = (JobStatus.PENDING, JobStatus.RETRYING)
+_ACTIVE_STATUSES = (JobStatus.PENDING, JobStatus.RETRYING, JobStatus.RUNNING)
+
+
 class Job(BaseModel):
     job_id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     task_name: str
@@ -32,33 +68,146 @@ class Job(BaseModel):
     retry_count: int = 0
     max_retries: int = 3
     tenant_id: str = "default"
+    priority: JobPriority = JobPriority.NORMAL
+    retry_at: datetime | None = None
 
 
 class TaskQueue:
-    """Simple in-process task queue with retry and dead-letter support."""
+    """Simple in-process task queue with retry and dead-letter support.
+
+    The queue is thread-safe: :meth:`claim` and :meth:`finish` let a
+    :class:`~workers.runtime.WorkerPool` run jobs concurrently, while
+    :meth:`process` and :meth:`process_all_pending` still run them on the
+    caller's thread.
+
+    Jobs are indexed by status and every transition updates the index, so
+    claiming the next ready job is O(1) in the number of stored jobs, stats
+    are read from container sizes and status listings cost only their
+    result size.
+
+    :meth:`claim` serves higher :class:`JobPriority` levels first and shares
+    each level between tenants by weighted deficit round robin (see
+    :class:`~workers.fair_scheduler.FairScheduler`), skipping tenants at
+    their concurrency cap, so one tenant's backlog cannot hold up others.
 
-    def __init__(self, max_retries: int = 3) -> None:
+    A failed job is RETRYING but not claimable until its backoff expires:
+    *retry_base_delay* seconds doubled per earlier failure, capped at
+    *retry_max_delay* and reduced by up to *retry_jitter* (a fraction) at
+    random so retries of jobs that failed together spread out.  A handler
+    can override the delay with :class:`RetryAfterError`.  Waiting jobs sit
+    on a heap ordered by due time, and :meth:`claim` sleeps until the
+    earliest one is due rather than polling.
+
+    Backoff is on by default (1 s base, 300 s cap), so a job that fails
+    during a :meth:`process_all_pending` sweep is no longer retried by the
+    next sweep but once its delay has passed.  ``retry_base_delay=0``
+    restores immediate retries.
+    """
+
+    def __init__(
+        self,
+        max_retries: int = 3,
+        tenant_concurrency: int | None = None,
+        retry_base_delay: float = 1.0,
+        retry_max_delay: float = 300.0,
+        retry_jitter: float = 0.5,
+    ) -> None:
+        if retry_base_delay < 0 or retry_max_delay < 0:
+            raise ValueError("Retry delays must not be negative")
+        if not 0 <= retry_jitter <= 1:
+            raise ValueError("retry_jitter must be between 0 and 1")
         self._jobs: dict[str, Job] = {}
         self._handlers: dict[str, Callable] = {}
+        self._cpu_bound: set[str] = set()
         self._max_retries = max_retries
+        # status -> jobs currently in it (dicts keep transition order)
+        self._by_status: dict[JobStatus, dict[str, Job]] = {s: {} for s in JobStatus}
+        # Ready entries are (sequence, job_id).  An entry is live while
+        # _ready_seq[job_id] still holds its sequence; anything else is
+        # stale and skipped by the scheduler.
+        self._scheduler = FairScheduler()
+        self._ready_seq: dict[str, int] = {}
+        # Sequence of each RUNNING job's claimed entry, so release() can put
+        # it back in its original place
+        self._claimed_seq: dict[str, int] = {}
+        self._sequence = itertools.count()
+        # Backoff heap of (due, sequence, job_id) on the monotonic clock; an
+        # entry is live while _retry_due[job_id] still holds its due time
+        self._delayed: list[tuple[float, int, str]] = []
+        self._retry_due: dict[str, float] = {}
+        self._retry_base_delay = retry_base_delay
+        self._retry_max_delay = retry_max_delay
+        self._retry_jitter = retry_jitter
+        self._tenant_concurrency = tenant_concurrency
+        self._tenant_limits: dict[str, int | None] = {}
+        self._tenant_running: dict[str, int] = {}
+        self._lock = threading.RLock()
+        # Notified whenever a job becomes ready or finishes running
+        self._changed = threading.Condition(self._lock)
+        # Bumped by wake() so blocked claim() calls return None
+        self._wakes = 0
+
+    def register(
+        self, task_name: str, handler: Callable, *, cpu_bound: bool = False
+    ) -> None:
+        """Register a handler function for a given task type.
+
+        Worker pools run *cpu_bound* handlers in their process pool, so such
+        handlers (and their payloads and results) must be picklable.
+        """
+        with self._lock:
+            self._handlers[task_name] = handler
+            if cpu_bound:
+                self._cpu_bound.add(task_name)
+            else:
+                self._cpu_bound.discard(task_name)
+
+    def get_handler(self, task_name: str) -> Callable | None:
+        return self._handlers.get(task_name)
+
+    def is_cpu_bound(self, task_name: str) -> bool:
+        return task_name in self._cpu_bound
 
-    def register(self, task_name: str, handler: Callable) -> None:
-        """Register a handler function for a given task type."""
-        self._handlers[task_name] = handler
+    def set_tenant_weight(self, tenant_id: str, weight: float) -> None:
+        """Give *tenant_id* *weight* (>= 1) times the default dispatch share."""
+        with self._lock:
+            self._scheduler.set_weight(tenant_id, weight)
 
-    def submit(self, task_name: str, payload: dict, tenant_id: str = "default") -> Job:
+    def set_tenant_concurrency(self, tenant_id: str, limit: int | None) -> None:
+        """Cap *tenant_id*'s RUNNING jobs (``None`` removes the cap)."""
+        with self._lock:
+            self._tenant_limits[tenant_id] = limit
+            self._notify()
+
+    def submit(
+        self,
+        task_name: str,
+        payload: dict,
+        tenant_id: str = "default",
+        priority: JobPriority = JobPriority.NORMAL,
+    ) -> Job:
         """Create and enqueue a new job."""
         job = Job(
             task_name=task_name,
             payload=payload,
             max_retries=self._max_retries,
             tenant_id=tenant_id,
+            priority=priority,
         )
-        self._jobs[job.job_id] = job
+        with self._lock:
+            self._jobs[job.job_id] = job
+            self._by_status[job.status][job.job_id] = job
+            self._enqueue(job)
+            self._notify()
         return job
 
     def process(self, job_id: str) -> Job:
-        """Execute the handler for a single job, managing status and retries."""
+        """Execute the handler for a single job, managing status and retries.
+
+        The job must be PENDING or a RETRYING job whose backoff has expired;
+        a job that is running elsewhere, backing off or finished raises
+        ``ValueError``.
+        """
         job = self._jobs.get(job_id)
         if job is None:
             raise KeyError(f"Job {job_id} not found")
@@ -67,46 +216,238 @@ class TaskQueue:
         if handler is None:
             raise ValueError(f"No handler registered for task '{job.task_name}'")
 
-        job.status = JobStatus.RUNNING
-        job.started_at = datetime.now(timezone.utc)
+        with self._lock:
+            if not self._take(job):
+                raise ValueError(f"Job {job_id} is not ready to run ({job.status})")
+        return self._run(job, handler)
 
-        try:
-            job.result = handler(job.payload)
-            job.status = JobStatus.COMPLETED
-            job.completed_at = datetime.now(timezone.utc)
-            job.error = None
-        except Exception as exc:  # noqa: BLE001
-            job.error = str(exc)
-            job.retry_count += 1
-            if job.retry_count < job.max_retries:
-                job.status = JobStatus.RETRYING
+    def claim(
+        self,
+        timeout: float | None = None,
+        accept: Callable[[str], bool] | None = None,
+    ) -> Job | None:
+        """Mark the next ready job RUNNING and return it.
+
+        Waits up to *timeout* seconds (forever if ``None``) for a PENDING or
+        due RETRYING job whose task name passes *accept* and whose tenant is
+        under its concurrency cap; returns ``None`` on timeout or after
+        :meth:`wake`.  Changes that leave nothing claimable, such as a
+        submission *accept* rejects, do not end the wait, and the wait wakes
+        on its own when the next backoff expires.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._lock:
+            wakes = self._wakes
+            job = self._next_ready(accept)
+            while job is None and timeout != 0 and self._wakes == wakes:
+                wait = None if deadline is None else deadline - time.monotonic()
+                if wait is not None and wait <= 0:
+                    break
+                due_in = self._next_due_in()
+                if due_in is not None and (wait is None or due_in < wait):
+                    wait = due_in
+                self._changed.wait(wait)
+                job = self._next_ready(accept)
+            if job is not None:
+                self._start(job)
+            return job
+
+    def finish(
+        self, job: Job, result: Any = None, error: BaseException | None = None
+    ) -> Job:
+        """Record the outcome of a RUNNING job, scheduling a retry on *error*.
+
+        A :class:`RetryAfterError` *result* counts as an error.
+        """
+        if isinstance(result, RetryAfterError):
+            result, error = None, result
+        with self._lock:
+            if error is None:
+                job.result = result
+                self._set_status(job, JobStatus.COMPLETED)
+                job.error = None
             else:
-                job.status = JobStatus.DEAD_LETTER
+                job.error = str(error)
+                job.retry_count += 1
+                if job.retry_count < job.max_retries:
+                    self._set_status(
+                        job, JobStatus.RETRYING, delay=self._retry_delay(job, error)
+                    )
+                else:
+                    self._set_status(job, JobStatus.DEAD_LETTER)
             job.completed_at = datetime.now(timezone.utc)
-
+            self._notify()
         return job
 
+    def release(self, job: Job) -> None:
+        """Return a claimed job that was never run to the ready set."""
+        with self._lock:
+            # Back to the head of its FIFO, ahead of newer entries.
+            self._set_status(
+                job,
+                JobStatus.RETRYING if job.retry_count else JobStatus.PENDING,
+                self._claimed_seq.get(job.job_id),
+            )
+            job.started_at = None
+            self._notify()
+
+    def wake(self) -> None:
+        """Wake every thread blocked in :meth:`claim` or :meth:`wait_idle`."""
+        with self._lock:
+            self._wakes += 1
+            self._notify()
+
+    def wait_idle(self, timeout: float | None = None) -> bool:
+        """Block until no job is pending, retrying or running."""
+        with self._lock:
+            return self._changed.wait_for(lambda: not self._active_count(), timeout)
+
+    def _notify(self) -> None:
+        """Signal a state change to waiters; called with the lock held."""
+        self._changed.notify_all()
+
+    def _active_count(self) -> int:
+        return sum(len(self._by_status[s]) for s in _ACTIVE_STATUSES)
+
+    def _retry_delay(self, job: Job, error: BaseException) -> float:
+        """Seconds before *job*'s next attempt, from a hint or the backoff."""
+        hint = getattr(error, "retry_after", None)
+        if isinstance(hint, (int, float)):
+            return min(max(float(hint), 0.0), self._retry_max_delay)
+        exponent = min(job.retry_count - 1, 64)
+        delay = min(self._retry_base_delay * 2**exponent, self._retry_max_delay)
+        return delay * (1 - self._retry_jitter * random.random())
+
+    def _next_due_in(self) -> float | None:
+        """Seconds until the earliest backoff expires, or ``None`` if none."""
+        delayed = self._delayed
+        while delayed and self._retry_due.get(delayed[0][2]) != delayed[0][0]:
+            heapq.heappop(delayed)
+        if not delayed:
+            return None
+        return max(delayed[0][0] - time.monotonic(), 0.0)
+
+    def _promote_due(self) -> None:
+        """Queue every RETRYING job whose backoff has expired."""
+        now = time.monotonic()
+        while self._delayed and self._delayed[0][0] <= now:
+            due, _, job_id = heapq.heappop(self._delayed)
+            if self._retry_due.get(job_id) == due:
+                del self._retry_due[job_id]
+                job = self._jobs[job_id]
+                job.retry_at = None
+                self._enqueue(job)
+
+    def _set_status(
+        self,
+        job: Job,
+        status: JobStatus,
+        sequence: int | None = None,
+        delay: float = 0.0,
+    ) -> None:
+        """Move *job* to *status*, keeping the indexes in step.
+
+        A job becoming ready is queued at the back, or at the front with its
+        old *sequence* if one is given; with a *delay* it waits on the
+        backoff heap first.
+        """
+        if job.status is JobStatus.RUNNING:
+            self._tenant_running[job.tenant_id] -= 1
+        if status is JobStatus.RUNNING:
+            running = self._tenant_running.get(job.tenant_id, 0)
+            self._tenant_running[job.tenant_id] = running + 1
+        self._by_status[job.status].pop(job.job_id, None)
+        self._by_status[status][job.job_id] = job
+        job.status = status
+        ready_sequence = self._ready_seq.pop(job.job_id, None)
+        self._claimed_seq.pop(job.job_id, None)
+        self._retry_due.pop(job.job_id, None)
+        job.retry_at = None
+        if status in _READY_STATUSES and delay > 0:
+            due = time.monotonic() + delay
+            self._retry_due[job.job_id] = due
+            heapq.heappush(self._delayed, (due, next(self._sequence), job.job_id))
+            job.retry_at = datetime.now(timezone.utc) + timedelta(seconds=delay)
+        elif status in _READY_STATUSES:
+            self._enqueue(job, sequence)
+        elif status is JobStatus.RUNNING and ready_sequence is not None:
+            self._claimed_seq[job.job_id] = ready_sequence
+
+    def _enqueue(self, job: Job, sequence: int | None = None) -> None:
+        front = sequence is not None
+        if sequence is None:
+            sequence = next(self._sequence)
+        self._ready_seq[job.job_id] = sequence
+        self._scheduler.push(
+            job.priority, job.tenant_id, job.task_name, (sequence, job.job_id), front
+        )
+
+    def _is_live(self, sequence: int, job_id: str) -> bool:
+        return self._ready_seq.get(job_id) == sequence
+
+    def _under_cap(self, tenant_id: str) -> bool:
+        limit = self._tenant_limits.get(tenant_id, self._tenant_concurrency)
+        return limit is None or self._tenant_running.get(tenant_id, 0) < limit
+
+    def _take(self, job: Job) -> bool:
+        """Mark *job* RUNNING if it is ready; called with the lock held."""
+        self._promote_due()
+        if job.job_id not in self._ready_seq:
+            return False
+        self._start(job)
+        return True
+
+    def _run(self, job: Job, handler: Callable) -> Job:
+        """Call *handler* for a job already marked RUNNING and record it."""
+        try:
+            result = handler(job.payload)
+        except Exception as exc:  # noqa: BLE001
+            return self.finish(job, error=exc)
+        return self.finish(job, result=result)
+
+    def _start(self, job: Job) -> None:
+        self._set_status(job, JobStatus.RUNNING)
+        job.started_at = datetime.now(timezone.utc)
+
+    def _next_ready(self, accept: Callable[[str], bool] | None) -> Job | None:
+        """Next job by priority and tenant fairness among accepted tasks."""
+        self._promote_due()
+        job_id = self._scheduler.pick(self._is_live, accept, self._under_cap)
+        return self._jobs[job_id] if job_id is not None else None
+
     def process_all_pending(self) -> list[Job]:
-        """Process every job that is PENDING or RETRYING."""
-        targets = [
-            j
-            for j in self._jobs.values()
-            if j.status in (JobStatus.PENDING, JobStatus.RETRYING)
-        ]
-        return [self.process(j.job_id) for j in targets]
+        """Process every PENDING or due RETRYING job, by priority then age.
+
+        Each job is claimed atomically before it runs, so jobs a concurrent
+        :meth:`claim` takes first are skipped rather than run twice.  Jobs
+        still backing off are left for a later sweep.
+        """
+        with self._lock:
+            self._promote_due()
+            ready = self._scheduler.live_entries(self._is_live)
+        processed = []
+        for job_id in ready:
+            job = self._jobs[job_id]
+            handler = self._handlers.get(job.task_name)
+            if handler is None:
+                raise ValueError(f"No handler registered for task '{job.task_name}'")
+            with self._lock:
+                if not self._take(job):
+                    continue
+            processed.append(self._run(job, handler))
+        return processed
 
     def get_job(self, job_id: str) -> Job | None:
         return self._jobs.get(job_id)
 
     def get_jobs_by_status(self, status: JobStatus) -> list[Job]:
-        return [j for j in self._jobs.values() if j.status == status]
+        with self._lock:
+            return list(self._by_status[status].values())
 
     def get_dead_letter_jobs(self) -> list[Job]:
         return self.get_jobs_by_status(JobStatus.DEAD_LETTER)
 
     def get_job_stats(self) -> dict:
         """Return a count of jobs grouped by status."""
-        stats: dict[str, int] = {s.value: 0 for s in JobStatus}
-        for job in self._jobs.values():
-            stats[job.status.value] += 1
-        return stats
+        with self._lock:
+            return {s.value: len(self._by_status[s]) for s in JobStatus}